@@ -1,8 +1,14 @@
 import falcon
+import json
 import logging
+from collections import OrderedDict
+from itertools import chain
 from wsgiref import simple_server
 
 from api_client.utility import StorageEngine
+from utils.compile_schema import json_default, LazySchema, LazySchemaList
+
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 def max_body(limit):
@@ -25,6 +31,61 @@ def max_body(limit):
     return hook
 
 
+def stream_json(value, compact=False, chunk_size=STREAM_CHUNK_SIZE, indent=4):
+    """ Serialize a value to JSON incrementally, so that the response can be sent while it is
+    encoded and without holding the whole document as a single string. Lazy schema views are
+    resolved as they are met.
+
+    :param value: the value to serialize
+    :param compact: use the most compact separators instead of the indentation
+    :type compact: bool
+    :param chunk_size: the minimum number of characters in each yielded chunk
+    :type chunk_size: int
+    :param indent: the indentation of the JSON document, None for a single line
+    :type indent: int
+    :return: a generator of utf-8 encoded chunks
+    """
+    if compact:
+        encoder = json.JSONEncoder(separators=(',', ':'), default=json_default)
+    else:
+        encoder = json.JSONEncoder(indent=indent, default=json_default)
+
+    buffer = []
+    buffered = 0
+    for chunk in encoder.iterencode(value):
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= chunk_size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def resolve_lazy_views(value):
+    """ Replace the lazy schema views found in a value by their resolved content, so that
+    their references are fetched before a response is committed. The containers holding no
+    lazy view are returned as they are, the others are copied.
+
+    :param value: the value to resolve
+    :return: the value without lazy views
+    """
+    if isinstance(value, (LazySchema, LazySchemaList)):
+        return value.resolve()
+    if isinstance(value, dict):
+        items = [(key, resolve_lazy_views(item)) for key, item in value.items()]
+        if all(item is value[key] for key, item in items):
+            return value
+        return OrderedDict(items)
+    if isinstance(value, (list, tuple)):
+        items = [resolve_lazy_views(item) for item in value]
+        if all(item is original for item, original in zip(items, value)):
+            return value
+        return items
+    return value
+
+
 class ClientBase(object):
     """ The base class for all client classes
     .. warning:: Do not use
@@ -41,6 +102,25 @@ class ClientBase(object):
             cls.logger = logging.getLogger('thingsapp.' + __name__)
         return object.__new__(cls)
 
+    @staticmethod
+    def set_response(req, resp, result, indent=4):
+        """ Stream the given result as JSON, compact when the compact query parameter is true.
+        The lazy schema views of the result are resolved and the first chunk is encoded before
+        the status is set: when they fail, the error is answered instead of a truncated
+        document.
+
+        :param req: the user request
+        :param resp: the server response
+        :param result: the JSON serializable result
+        :param indent: the indentation of the JSON document, None for a single line
+        """
+        chunks = stream_json(resolve_lazy_views(result),
+                             compact=req.get_param_as_bool('compact') is True, indent=indent)
+        first_chunk = next(chunks, b'')
+        resp.status = falcon.HTTP_201
+        resp.content_type = 'application/json'
+        resp.stream = chain([first_chunk], chunks)
+
     @staticmethod
     def get_request_body(req):
         try:
@@ -63,9 +143,7 @@ class NetworkCompilerClient(ClientBase):
         :param resp: the server response
         """
         doc = self.get_request_body(req)
-        proper_thing = self.db.resolve_network(doc)
-        resp.status = falcon.HTTP_201
-        resp.body = proper_thing
+        self.set_response(req, resp, self.db.resolve_network(doc))
 
 
 class Schema2ContextClient(ClientBase):
@@ -81,9 +159,7 @@ class Schema2ContextClient(ClientBase):
         :param resp: the server response
         """
         doc = self.get_request_body(req)
-        proper_thing = self.db.create_context(doc)
-        resp.status = falcon.HTTP_201
-        resp.body = proper_thing
+        self.set_response(req, resp, self.db.create_context(doc))
 
 
 class FullSemDiffClient(ClientBase):
@@ -99,9 +175,7 @@ class FullSemDiffClient(ClientBase):
         :param resp: the server response
         """
         doc = self.get_request_body(req)
-        proper_thing = self.db.create_full_sem_diff(doc)
-        resp.status = falcon.HTTP_201
-        resp.body = proper_thing
+        self.set_response(req, resp, self.db.create_full_sem_diff(doc))
 
 
 class SchemaValidatorClient(ClientBase):
@@ -116,9 +190,7 @@ class SchemaValidatorClient(ClientBase):
         :param resp: the server response
         """
         doc = self.get_request_body(req)
-        proper_thing = self.db.validate_schema(doc)
-        resp.status = falcon.HTTP_201
-        resp.body = proper_thing
+        self.set_response(req, resp, self.db.validate_schema(doc))
 
 
 class InstanceValidatorClient(ClientBase):
@@ -133,9 +205,7 @@ class InstanceValidatorClient(ClientBase):
         :param resp: the server response
         """
         doc = self.get_request_body(req)
-        proper_thing = self.db.validate_instance(doc)
-        resp.status = falcon.HTTP_201
-        resp.body = proper_thing
+        self.set_response(req, resp, self.db.validate_instance(doc))
 
 
 class NetworkValidatorClient(ClientBase):
@@ -150,9 +220,7 @@ class NetworkValidatorClient(ClientBase):
         :param resp: the server response
         """
         doc = self.get_request_body(req)
-        proper_thing = self.db.validate_network(doc)
-        resp.status = falcon.HTTP_201
-        resp.body = proper_thing
+        self.set_response(req, resp, self.db.validate_network(doc))
 
 
 class MergeEntitiesClient(ClientBase):
@@ -167,9 +235,7 @@ class MergeEntitiesClient(ClientBase):
         :param resp: the server response
         """
         doc = self.get_request_body(req)
-        proper_thing = self.db.merge_entities(doc)
-        resp.status = falcon.HTTP_201
-        resp.body = proper_thing
+        self.set_response(req, resp, self.db.merge_entities(doc), indent=None)
 
 
 """
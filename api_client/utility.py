@@ -2,10 +2,16 @@ import json
 import falcon
 import requests
 import datetime
+import threading
+from concurrent.futures import Future
 
 from jsonschema.validators import Draft4Validator, RefResolver
 
-from utils.compile_schema import resolve_schema_references, get_name, resolve_reference
+from utils.compile_schema import (
+    resolve_schema_references, get_name, resolve_reference, resolve_pointer
+)
+from utils.http_cache import cached_get
+from utils.document_store import resolver_handlers
 from utils.schema2context import resolve_network, process_schema_name, create_context_template
 from utils.prepare_fulldiff_input import resolve_network as fast_resolver
 from semDiff.fullDiff import FullSemDiff
@@ -13,46 +19,105 @@ from semDiff.mergeEntities import EntityMerge
 
 
 class StorageEngine(object):
-    """ This class is the middle layer that binds the API calls to the actual python code
+    """ This class is the middle layer that binds the API calls to the actual python code.
+    Its methods return JSON serializable values, the clients stream them to the response.
 
     """
 
     def __init__(self):
         self.cached_requests = {
             "resolved_network": {},
+            "bundled_network": {},
             "create_context": {},
             "create_full_sem_diff": {},
             "validate_schema": {},
             "validate_network": {},
             "validate_instance": {}
         }
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+    def cached_call(self, cache_name, key, compute):
+        """ Returns the cached result of an operation or computes and caches it. Concurrent
+        calls for the same key wait for a single computation and share its result, or its
+        error (errors are not cached).
+
+        :param cache_name: the name of the cache in cached_requests
+        :type cache_name: basestring
+        :param key: the key of the request in that cache (eg: the schema URL)
+        :param compute: a function without arguments computing the result
+        :return: the result of the operation
+        """
+        with self.lock:
+            if key in self.cached_requests[cache_name]:
+                return self.cached_requests[cache_name][key]['schema']
+            flight = self.in_flight.get((cache_name, key))
+            leader = flight is None
+            if leader:
+                flight = self.in_flight[(cache_name, key)] = Future()
+
+        if not leader:
+            return flight.result()
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self.lock:
+                del self.in_flight[(cache_name, key)]
+            flight.set_exception(e)
+            raise
+
+        with self.lock:
+            self.cached_requests[cache_name][key] = {
+                'schema': result,
+                'timestamp': datetime.datetime.now()
+            }
+            del self.in_flight[(cache_name, key)]
+        flight.set_result(result)
+        return result
 
     def resolve_network(self, schema):
-        """ Resolves all references of a given schema
+        """ Resolves all references of a given schema. When a JSON pointer is given in the
+        optional "pointer" attribute, only the schema found at that location is returned and
+        only the references needed to reach and resolve it are fetched. When the optional
+        "bundle" attribute is true, each referenced schema is returned once under
+        "definitions" instead of being inlined. Concurrent requests for the same network are
+        resolved once.
 
         :param schema: a json containing the schema_url attribute
         :type schema: dict
         :return: the resolved network
         """
 
-        processed_schemas = {}
         schema_url = schema['schema_url']
-
-        if schema_url not in self.cached_requests["resolved_network"].keys():
-            processed_schemas[get_name(schema_url)] = '#'
-            resolved_network = resolve_schema_references(resolve_reference(schema_url),
-                                                         processed_schemas,
-                                                         schema_url)
-            self.cached_requests["resolved_network"][schema_url] = {}
-            self.cached_requests["resolved_network"][schema_url]['schema'] = resolved_network
-            self.cached_requests["resolved_network"][schema_url][
-                'timestamp'] = datetime.datetime.now()
-
-            return json.dumps(resolved_network, indent=4)
-
-        else:
-            return json.dumps(self.cached_requests["resolved_network"][
-                                  schema_url]['schema'], indent=4)
+        pointer = schema.get('pointer')
+        bundle = schema.get('bundle', False) is True and not pointer
+        cache_name = "bundled_network" if bundle else "resolved_network"
+
+        if pointer:
+            with self.lock:
+                cached = self.cached_requests[cache_name].get(schema_url)
+            if cached is not None:
+                return resolve_pointer(cached['schema'], pointer)
+
+            processed_schemas = {get_name(schema_url): '#'}
+            lazy_network = resolve_schema_references(resolve_reference(schema_url),
+                                                     processed_schemas,
+                                                     schema_url,
+                                                     lazy=True)
+            sub_schema = resolve_pointer(lazy_network, pointer)
+            if hasattr(sub_schema, 'resolve'):
+                sub_schema = sub_schema.resolve(processed_schemas)
+            return sub_schema
+
+        def compute():
+            processed_schemas = {get_name(schema_url): '#'}
+            return resolve_schema_references(resolve_reference(schema_url),
+                                             processed_schemas,
+                                             schema_url,
+                                             bundle=bundle)
+
+        return self.cached_call(cache_name, schema_url, compute)
 
     def create_context(self, user_input):
         """ Resolve a network a creates the associated context files templates
@@ -89,7 +154,7 @@ class StorageEngine(object):
                 for vocab_name in local_context:
                     output[vocab_name][schema_name] = local_context[vocab_name]
 
-            return json.dumps(output, indent=4)
+            return output
 
     def create_full_sem_diff(self, user_input):
         """ Compares two networks based on their semantics values
@@ -103,7 +168,7 @@ class StorageEngine(object):
                                user_input['network_1'],
                                user_input['network_2'])
 
-        return json.dumps(sem_diff.twins, indent=4)
+        return sem_diff.twins
 
     def validate_schema(self, user_input):
         """ Validate a schema against its draft using Draft4Validator
@@ -114,13 +179,13 @@ class StorageEngine(object):
             (should return a boolean or a dict containing both variables)
         """
         try:
-            validation = Draft4Validator.check_schema(json.loads(requests.get(user_input).text))
+            validation = Draft4Validator.check_schema(json.loads(cached_get(user_input).text))
             if validation is not None:
-                return json.dumps(validation, indent=4)
+                return validation
             else:
-                return json.dumps("You schema is valid")
+                return "You schema is valid"
         except Exception:
-            return json.dumps("Problem loading the schema " + user_input)
+            return "Problem loading the schema " + user_input
 
     def validate_network(self, user_input):
         """ Resolves a network and validates all of its schemas using Draft4Validator
@@ -141,7 +206,7 @@ class StorageEngine(object):
                 validation[schema] = local_validation
             else:
                 validation[schema] = "This schema is valid"
-        return json.dumps(validation, indent=4)
+        return validation
 
     def validate_instance(self, user_input):
         """ Validates an instance against a schema
@@ -154,8 +219,8 @@ class StorageEngine(object):
         try:
             schema_url = user_input['schema_url']
             instance_url = user_input['instance_url']
-            schema = requests.get(schema_url)
-            instance = requests.get(instance_url)
+            schema = cached_get(schema_url)
+            instance = cached_get(instance_url)
 
             if schema.status_code != 200:
                 raise falcon.HTTPError(falcon.HTTP_400,
@@ -168,7 +233,7 @@ class StorageEngine(object):
 
             else:
                 try:
-                    resolver = RefResolver(schema_url, schema, {})
+                    resolver = RefResolver(schema_url, schema, {}, handlers=resolver_handlers())
                     drafter = Draft4Validator(json.loads(schema.text), resolver=resolver)
                     errors_array = sorted(drafter.iter_errors(json.loads(instance.text)),
                                           key=lambda e: e.path)
@@ -178,9 +243,9 @@ class StorageEngine(object):
                         errors[i] = errors_array[i].message
 
                     if len(errors) > 0:
-                        return json.dumps(errors, indent=4)
+                        return errors
                     else:
-                        return json.dumps("Your json is valid")
+                        return "Your json is valid"
 
                 except Exception:
                     raise falcon.HTTPError(falcon.HTTP_400,
@@ -201,17 +266,17 @@ class StorageEngine(object):
         """
         try:
             # TODO: HANDLE 404
-            schema_1 = json.loads(requests.get(user_input["schema_url_1"]).text)
-            schema_2 = json.loads(requests.get(user_input["schema_url_2"]).text)
-            context_1 = json.loads(requests.get(user_input["context_url_1"]).text)
-            context_2 = json.loads(requests.get(user_input["context_url_2"]).text)
+            schema_1 = json.loads(cached_get(user_input["schema_url_1"]).text)
+            schema_2 = json.loads(cached_get(user_input["schema_url_2"]).text)
+            context_1 = json.loads(cached_get(user_input["context_url_1"]).text)
+            context_2 = json.loads(cached_get(user_input["context_url_2"]).text)
             merged_schema = EntityMerge(schema_1, context_1, schema_2, context_2)
-            return json.dumps({
+            return {
                 "mergedSchema": merged_schema.output_schema,
                 "mergedContext": merged_schema.output_context
-            })
+            }
         except Exception as e:
-            return json.dumps("There is a problem with one of your schema or context: " + str(e))
+            return "There is a problem with one of your schema or context: " + str(e)
 
 
 """
@@ -0,0 +1,144 @@
+# Compares the explicit-stack utils.compile_schema._resolve_schema_references with the previous
+# recursive implementation (kept below as legacy_resolve_schema_references) on the DATS network
+# from tests/data and on a deep chain of schemas. All documents are served from the RefResolver
+# store, so no request is made. Run from the repository root with:
+#   python -m benchmarks.compile_schema_benchmark
+
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from copy import deepcopy
+from jsonschema.validators import RefResolver
+from utils.compile_schema import _resolve_schema_references, get_name, SchemaKey
+
+data_dir = os.path.join(os.path.dirname(__file__), "../tests/data")
+
+
+def legacy_resolve_schema_references(schema, resolver, loaded_schemas, object_path):
+    """ The recursive implementation replaced by the explicit-stack one, for comparison """
+
+    schema = OrderedDict(schema)
+
+    if SchemaKey.ref in schema:
+
+        if schema['$ref'][0] != '#':
+            reference_path = schema.pop(SchemaKey.ref, None)
+            resolved = OrderedDict(resolver.resolve(reference_path)[1])
+
+            if get_name(resolved['id']) not in loaded_schemas:
+                loaded_schemas[get_name(resolved['id'])] = object_path
+                schema.update(resolved)
+                schema = OrderedDict(schema)
+                return OrderedDict(legacy_resolve_schema_references(schema, resolver,
+                                                                    loaded_schemas,
+                                                                    object_path))
+
+            else:
+                res = {"$ref": loaded_schemas[get_name(resolved['id'])]}
+                schema.update(res)
+
+    for container in [SchemaKey.properties, SchemaKey.definitions]:
+        if container in schema:
+            for k, val in OrderedDict(schema)[container].items():
+                current_path = object_path + '/' + container + '/' + k
+                schema[container][k] = OrderedDict(
+                    legacy_resolve_schema_references(val, resolver, loaded_schemas,
+                                                     current_path))
+
+    for pattern in SchemaKey.sub_patterns:
+        if pattern in schema:
+            for i, val in enumerate(OrderedDict(schema)[pattern]):
+                current_path = object_path + '/' + pattern + '/' + str(deepcopy(i))
+                schema[pattern][i] = OrderedDict(
+                    legacy_resolve_schema_references(val, resolver, loaded_schemas,
+                                                     current_path))
+
+    if SchemaKey.items in OrderedDict(schema):
+        current_path = object_path + '/items'
+        schema[SchemaKey.items] = OrderedDict(
+            legacy_resolve_schema_references(schema[SchemaKey.items], resolver,
+                                             loaded_schemas, current_path))
+
+    return OrderedDict(schema)
+
+
+def load_dats_network():
+    """ The DATS person network (8 schemas) used by the semDiff tests """
+    with open(os.path.join(data_dir, "full_dats_miaca.json")) as data_file:
+        return json.load(data_file)[0]["schemas"], "person_schema.json"
+
+
+def make_chain_network(length):
+    """ A network where each schema references the next one through a property """
+    network = {}
+    for i in range(length):
+        network["chain_%s_schema.json" % i] = {
+            "id": "https://example.com/chain_%s_schema.json" % i,
+            "properties": {
+                "name": {"type": "string"},
+                "next": {"$ref": "chain_%s_schema.json#" % (i + 1)} if i + 1 < length
+                else {"type": "string"}
+            }
+        }
+    return network, "chain_0_schema.json"
+
+
+def run_once(implementation, network, root_name):
+    store = dict((schema["id"], deepcopy(schema)) for schema in network.values())
+    root = deepcopy(network[root_name])
+    resolver = RefResolver(root["id"], root, store=store)
+    loaded_schemas = {get_name(root["id"]): '#'}
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    output = implementation(OrderedDict(root), resolver, loaded_schemas, '#')
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return output, duration, peak
+
+
+def measure(implementation, network, root_name, repeat):
+    """ Best wall time and peak traced memory over the given number of runs """
+    try:
+        runs = [run_once(implementation, network, root_name) for _ in range(repeat)]
+    except RecursionError:
+        return None, {"error": "RecursionError"}
+    return runs[0][0], {
+        "time": min(run[1] for run in runs),
+        "peak_memory": min(run[2] for run in runs)
+    }
+
+
+def run_benchmark(repeat=5, chain_length=2000):
+    results = {}
+    cases = {
+        "dats": load_dats_network(),
+        "chain_200": make_chain_network(200),
+        "chain_%s" % chain_length: make_chain_network(chain_length)
+    }
+
+    for case_name, (network, root_name) in cases.items():
+        legacy_output, legacy = measure(legacy_resolve_schema_references,
+                                        network, root_name, repeat)
+        output, current = measure(_resolve_schema_references, network, root_name, repeat)
+        results[case_name] = {
+            "legacy": legacy,
+            "current": current,
+            "same_output": legacy_output == output if legacy_output is not None else None
+        }
+        if "error" not in legacy:
+            results[case_name]["speedup"] = round(legacy["time"] / current["time"], 2)
+            results[case_name]["memory_ratio"] = round(
+                legacy["peak_memory"] / current["peak_memory"], 2)
+
+    return results
+
+
+if __name__ == '__main__':
+    sys.setrecursionlimit(1000)
+    print(json.dumps(run_benchmark(), indent=4))
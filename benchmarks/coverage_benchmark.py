@@ -0,0 +1,334 @@
+# Compares the inverted-index semDiff.compareNetwork.NetworkCoverage with the previous
+# pairwise implementation (kept below as LegacyNetworkCoverage) on synthetic networks of
+# contexts, and checks that both give the same covered_entities, total_entities and
+# matched_entities. Also compares the copy-free semDiff.compareEntities.EntityCoverage with the
+# previous implementation (LegacyEntityCoverage) on every pair of entities of the DATS and
+# MIACA networks from tests/data. Run from the repository root with:
+#   python -m benchmarks.coverage_benchmark [size ...]
+
+
+import copy
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from urllib.parse import urlparse
+from semDiff.compareEntities import EntityCoverage
+from semDiff.compareNetwork import NetworkCoverage
+
+SIZES = [1000, 10000]
+data_dir = os.path.join(os.path.dirname(__file__), "../tests/data")
+
+
+class LegacyNetworkCoverage:
+    """ The pairwise implementation replaced by the inverted index, for comparison """
+
+    def __init__(self, networks_array):
+        network1 = self.process_network(networks_array[0])
+        network2 = self.process_network(networks_array[1])
+        coverage = self.compute_coverage(network1, network2)
+        self.covered_entities = coverage[0]
+        self.total_entities = coverage[1]
+        self.matched_entities = coverage[2]
+
+    @staticmethod
+    def process_network(network):
+        network_output = {}
+        for schema in network:
+            schema_name = copy.deepcopy(schema).replace("_schema.json", "").capitalize()
+            schema_name_in_context = copy.deepcopy(schema_name)
+
+            if "_" in schema_name:
+                schema_name_in_context = schema_name_in_context.replace("_", " ")\
+                    .title().replace(" ", "")
+
+            schema_type = None
+            schema_context = network[schema]
+
+            if schema_name_in_context in schema_context.keys():
+                schema_type = schema_context[schema_name_in_context]
+
+            schema_type_base_url = urlparse(schema_type).scheme
+            if schema_type is not None and schema_type_base_url not in ('http', 'https'):
+                if schema_type_base_url in schema_context.keys():
+                    schema_type.replace(schema_type_base_url, schema_context[schema_type_base_url])
+
+            network_output[schema_name] = schema_type
+
+        return network_output
+
+    @staticmethod
+    def compute_coverage(network_a, network_b):
+        coverage = {}
+        total_items = 0
+        matched_items = 0
+
+        network__b = copy.deepcopy(network_b)
+
+        for schema in network_a:
+            total_items += 1
+            context_type = network_a[schema]
+            matched = False
+
+            subtype = "true"
+            if context_type is not None \
+                    and ":" in context_type \
+                    and urlparse(context_type).scheme not in ["http", "https"]:
+                subtype = context_type.split(":")[1]
+
+            if context_type is not None:
+
+                for schema2 in list(network__b.keys()):
+                    context_type2 = network_b[schema2]
+
+                    if context_type == context_type2 and subtype != "":
+                        matched = True
+                        del network__b[schema2]
+                        if schema in coverage.keys():
+                            coverage[schema].append(schema2)
+                        else:
+                            coverage[schema] = [schema2]
+
+            if matched is False:
+                coverage[schema] = None
+            else:
+                matched_items += 1
+
+        output = [coverage, total_items, matched_items]
+        return output
+
+
+class LegacyEntityCoverage:
+    """ The implementation that copied its inputs, for comparison """
+
+    def __init__(self, schema_a, context_a, schema_b, context_b):
+        self.input1 = {
+            "schema": schema_a,
+            "context": context_a
+        }
+        self.input2 = {
+            "schema": schema_b,
+            "context": context_b
+        }
+
+        self.comparator1 = self.__build_context_dict(self.input1)
+        self.comparator2 = self.__build_context_dict(self.input2)
+        self.overlaps = self.__compute_context_coverage(self.comparator1[0], self.comparator2[0])
+        self.unmatched_with_sem = self.overlaps[2]
+        self.unmatched_without_sem = self.comparator2[1]
+
+        self.full_coverage = {
+            "coverage": self.overlaps[0],
+            "overlapping fields": self.overlaps[1],
+            "ignored fields": self.comparator1[1]
+        }
+
+    def __build_context_dict(self, schema_input):
+        sorted_values = {}
+        ignored_keys = ["@id", "@context", "@type"]
+        schema = copy.deepcopy(schema_input)
+        ignored_fields = []
+
+        # for each field in the schema
+        for field in schema['schema']['properties']:
+
+            # Ignoring useless keys
+            if field not in ignored_keys:
+
+                # If the field can be found in the context, process it
+                if field in schema["context"]["@context"].keys():
+
+                    # This is the raw semantic value of the field, it might need some processing
+                    raw_semantic_value = schema["context"]["@context"][field]
+
+                    # If the field raw semantic value is a string
+                    if isinstance(raw_semantic_value, str):
+                        sorted_values = self.__process_field(field,
+                                                             raw_semantic_value,
+                                                             schema["context"]["@context"],
+                                                             sorted_values)
+
+                    # if the field raw semantic value is not a string
+                    else:
+                        sorted_values = self.__process_field(field,
+                                                             raw_semantic_value['@id'],
+                                                             schema["context"]["@context"],
+                                                             sorted_values)
+
+                # if the field is absent from the context file, ignore it as it has no semantic
+                # definition
+                else:
+                    ignored_fields.append(field)
+
+        return sorted_values, ignored_fields
+
+    @staticmethod
+    def __process_field(field_name, field_value, context, comparator):
+
+        base_url = urlparse(field_value).scheme
+
+        # if the raw value is already an URL, it does not need processing
+        if base_url in ('http', 'https'):
+            if field_value not in comparator:
+                comparator[field_value] = [field_name]
+            else:
+                comparator[field_value].append(field_name)
+
+        # replacing semantic base to form an absolute IRI
+        else:
+            to_be_processed = True
+
+            if ":" in field_value:
+                if copy.deepcopy(field_value).split(":")[1] == "":
+                    to_be_processed = False
+
+            if to_be_processed is not False:
+                processed_semantic_value = field_value.replace(base_url + ":", context[base_url])
+
+                if processed_semantic_value not in comparator:
+                    comparator[processed_semantic_value] = [field_name]
+                else:
+                    comparator[processed_semantic_value].append(field_name)
+
+        return comparator
+
+    @staticmethod
+    def __compute_context_coverage(context1, context2):
+
+        unmatched_fields = copy.deepcopy(context2)
+        Overlap = namedtuple('Overlap', ['first_field', 'second_field'])
+        OverlapValue = namedtuple('OverlapValue', ['relative_coverage', 'absolute_coverage'])
+
+        overlap_number = 0
+        overlap_output = []
+        processed_field = 0
+
+        for field in context1:
+
+            processed_field += 1
+            if field in context2:
+                overlap_number += len(context1[field])
+
+                for first_field_val in context1[field]:
+                    for second_field_val in context2[field]:
+                        local_overlap = Overlap(first_field_val, second_field_val)
+                        overlap_output.append(local_overlap)
+                        if field in unmatched_fields:
+                            del unmatched_fields[field]
+
+        absolute_coverage = namedtuple('AbsoluteCoverage', ['overlap_number', 'total_fields'])
+        local_coverage = absolute_coverage(str(overlap_number), str(processed_field))
+        try:
+            local_overlap_value = OverlapValue(str(round((overlap_number * 100) / len(context1),
+                                                         2)),
+                                               local_coverage)
+        except ZeroDivisionError:
+            local_overlap_value = OverlapValue(0, 0)
+
+        return local_overlap_value, overlap_output, unmatched_fields
+
+
+def generate_context_network(size, type_count, seed):
+    """ A network of size entities whose contexts map the entity to one of type_count base
+    types. Some entities have no type, an empty subtype ("sdo:") or a full URL type. """
+    generator = random.Random(seed)
+    network = {}
+    for i in range(size):
+        name = "entity%s" % i
+        context = {"sdo": "https://schema.org/", "identifier": "sdo:identifier"}
+        draw = generator.random()
+        if draw < 0.05:
+            pass
+        elif draw < 0.08:
+            context[name.capitalize()] = "sdo:"
+        elif draw < 0.2:
+            context[name.capitalize()] = "https://example.org/Type%s" % generator.randrange(
+                type_count)
+        else:
+            context[name.capitalize()] = "sdo:Type%s" % generator.randrange(type_count)
+        network[name + "_schema.json"] = context
+    return network
+
+
+def measure(implementation, networks, repeat):
+    """ Best wall time over the given number of runs """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = implementation(networks)
+        durations.append(time.perf_counter() - start)
+    return output, min(durations)
+
+
+def load_entity_pairs():
+    """ Every (schema, context) pair of the DATS network with every pair of the MIACA network """
+    with open(os.path.join(data_dir, "full_dats_miaca.json")) as data_file:
+        networks = json.load(data_file)
+    entities = [[(network["schemas"][name], {"@context": network["contexts"][name]})
+                 for name in network["schemas"] if name in network["contexts"]]
+                for network in networks]
+    return [first + second for first in entities[0] for second in entities[1]]
+
+
+def measure_entities(implementation, pairs, repeat):
+    """ Best wall time and peak traced memory per comparison """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [implementation(*pair) for pair in pairs]
+        durations.append(time.perf_counter() - start)
+
+    peaks = []
+    for pair in pairs:
+        tracemalloc.start()
+        implementation(*pair)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return outputs, {
+        "time_per_comparison": min(durations) / len(pairs),
+        "peak_memory_per_comparison": sum(peaks) / len(pairs)
+    }
+
+
+def run_entity_benchmark(repeat=20):
+    pairs = load_entity_pairs()
+    legacy_outputs, legacy = measure_entities(LegacyEntityCoverage, pairs, repeat)
+    outputs, current = measure_entities(EntityCoverage, pairs, repeat)
+    return {
+        "comparisons": len(pairs),
+        "legacy": legacy,
+        "current": current,
+        "speedup": round(legacy["time_per_comparison"] / current["time_per_comparison"], 2),
+        "memory_ratio": round(legacy["peak_memory_per_comparison"]
+                              / current["peak_memory_per_comparison"], 2),
+        "same_output": all(legacy_output.full_coverage == output.full_coverage
+                           and legacy_output.unmatched_with_sem == output.unmatched_with_sem
+                           for legacy_output, output in zip(legacy_outputs, outputs))
+    }
+
+
+def run_benchmark(sizes=SIZES, repeat=3):
+    results = {"entity_coverage": run_entity_benchmark()}
+    for size in sizes:
+        networks = [generate_context_network(size, size // 2, 1),
+                    generate_context_network(size, size // 2, 2)]
+        legacy_output, legacy_time = measure(LegacyNetworkCoverage, networks, 1)
+        output, current_time = measure(NetworkCoverage, networks, repeat)
+        results[size] = {
+            "legacy": legacy_time,
+            "current": current_time,
+            "speedup": round(legacy_time / current_time, 2),
+            "matched_entities": output.matched_entities,
+            "same_output": (legacy_output.covered_entities == output.covered_entities
+                            and legacy_output.total_entities == output.total_entities
+                            and legacy_output.matched_entities == output.matched_entities)
+        }
+    return results
+
+
+if __name__ == '__main__':
+    sizes = [int(size) for size in sys.argv[1:]] or SIZES
+    print(json.dumps(run_benchmark(sizes), indent=4))
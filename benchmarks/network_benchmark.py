@@ -0,0 +1,129 @@
+# Measures how utils.prepare_fulldiff_input.resolve_network,
+# utils.compile_schema.resolve_schema_references and
+# utils.schema2context.generate_context_mapping scale on synthetic networks served from file://
+# or from a local HTTP server. Each run starts with an empty document store and without HTTP
+# cache, and records its wall time, peak traced memory and number of requests (or documents
+# loaded for file://). Run from the repository root with:
+#   python -m benchmarks.network_benchmark [output.json]
+
+
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.synthetic_network import generate_network, write_network, NetworkServer
+from utils.compile_schema import resolve_schema_references, get_name
+from utils.document_store import configure_document_store, resolver_handlers
+from utils.http_cache import disable_cache
+from utils.prepare_fulldiff_input import resolve_network
+from utils.schema2context import generate_context_mapping
+from utils.schema_graph import SchemaGraph
+
+CASES = [
+    {"name": "small", "size": 20, "fan_out": 2, "depth": 3},
+    {"name": "medium", "size": 100, "fan_out": 3, "depth": 5},
+    {"name": "large", "size": 500, "fan_out": 4, "depth": 8},
+    {"name": "cyclic", "size": 100, "fan_out": 3, "depth": 5, "cycle_rate": 0.5},
+    {"name": "wide", "size": 200, "fan_out": 10, "depth": 2, "items_rate": 0.5,
+     "any_of_rate": 0.5}
+]
+MODES = ["file", "http"]
+CONTEXT_REGEX = {"_schema.json": "_context.jsonld"}
+
+
+def compile_network(root_url):
+    root = resolver_handlers()[root_url.split(":")[0]](root_url)
+    return resolve_schema_references(root, {get_name(root_url): '#'}, root_url)
+
+
+TARGETS = {
+    "resolve_network": resolve_network,
+    "resolve_schema_references": compile_network,
+    "generate_context_mapping": lambda root_url: generate_context_mapping(root_url,
+                                                                          CONTEXT_REGEX)
+}
+
+
+def run_once(target, root_url, server):
+    store = configure_document_store()
+    if server is not None:
+        server.reset()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    target(root_url)
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "time": duration,
+        "peak_memory": peak,
+        "requests": server.requests if server is not None else None,
+        "documents_loaded": store.stats()["misses"]
+    }
+
+
+def measure(target, root_url, server, repeat):
+    """ Best wall time and peak traced memory over the given number of runs """
+    runs = [run_once(target, root_url, server) for _ in range(repeat)]
+    return {
+        "time": min(run["time"] for run in runs),
+        "peak_memory": min(run["peak_memory"] for run in runs),
+        "requests": runs[-1]["requests"],
+        "documents_loaded": runs[-1]["documents_loaded"]
+    }
+
+
+def run_case(case, mode, repeat):
+    parameters = dict((key, value) for key, value in case.items() if key != "name")
+    directory = tempfile.mkdtemp()
+    try:
+        if mode == "http":
+            with NetworkServer(directory) as server:
+                return measure_network(parameters, directory, server.url, server, repeat)
+        return measure_network(parameters, directory, "file://" + directory + "/", None, repeat)
+    finally:
+        shutil.rmtree(directory)
+
+
+def measure_network(parameters, directory, base_url, server, repeat):
+    network = generate_network(base_url=base_url, **parameters)
+    write_network(network, directory)
+    graph = SchemaGraph(network)
+    root_url = base_url + next(iter(network))
+
+    return {
+        "parameters": parameters,
+        "schemas": len(network),
+        "references": sum(len(references) for references in graph.references.values()),
+        "cycles": len(graph.cycles()),
+        "results": dict((name, measure(target, root_url, server, repeat))
+                        for name, target in TARGETS.items())
+    }
+
+
+def run_benchmark(cases=CASES, modes=MODES, repeat=3):
+    disable_cache()
+    results = {
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "cases": {}
+    }
+    for case in cases:
+        for mode in modes:
+            results["cases"][case["name"] + "_" + mode] = run_case(case, mode, repeat)
+    configure_document_store()
+    return results
+
+
+if __name__ == '__main__':
+    output = json.dumps(run_benchmark(), indent=4)
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "w") as output_file:
+            output_file.write(output)
+    else:
+        print(output)
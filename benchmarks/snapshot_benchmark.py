@@ -0,0 +1,95 @@
+# Compares the load time of prepared networks saved with utils.snapshot.save_snapshot with
+# their load time from JSON, with plain dicts and with the OrderedDicts the library builds when
+# it parses schemas. The inputs are the DATS and MIACA networks from tests/data and copies of
+# them with renamed schemas, scaled by the given factors. Run from the repository root with:
+#   python -m benchmarks.snapshot_benchmark [scale ...]
+
+
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from utils.snapshot import save_snapshot, load_snapshot
+
+SCALES = [1, 100]
+data_dir = os.path.join(os.path.dirname(__file__), "../tests/data")
+
+
+def generate_networks(scale):
+    """ Copies of the DATS and MIACA networks whose schemas and contexts are repeated scale
+    times under different names. Each copy is parsed again so that, as in real networks, the
+    copies share no objects that marshal could store once. """
+    with open(os.path.join(data_dir, "full_dats_miaca.json")) as input_file:
+        content = input_file.read()
+    copies = [json.loads(content) for _ in range(scale)]
+    return [{
+        "name": network["name"],
+        "schemas": dict((str(copy) + "_" + name, schema)
+                        for copy, networks in enumerate(copies)
+                        for name, schema in networks[position]["schemas"].items()),
+        "contexts": dict((str(copy) + "_" + name, context)
+                         for copy, networks in enumerate(copies)
+                         for name, context in networks[position]["contexts"].items())
+    } for position, network in enumerate(copies[0])]
+
+
+def best_time(function, repeat):
+    """ Best wall time of the given function over the given number of runs """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def load_json(path, object_pairs_hook=None):
+    with open(path) as input_file:
+        return json.load(input_file, object_pairs_hook=object_pairs_hook)
+
+
+def run_case(scale, directory, repeat):
+    networks = generate_networks(scale)
+    json_path = os.path.join(directory, "networks.json")
+    snapshot_path = os.path.join(directory, "networks.snapshot")
+    with open(json_path, "w") as output_file:
+        json.dump(networks, output_file)
+    save_snapshot(snapshot_path, networks)
+    assert load_snapshot(snapshot_path) == load_json(json_path)
+
+    json_time = best_time(lambda: load_json(json_path), repeat)
+    ordered_json_time = best_time(lambda: load_json(json_path, OrderedDict), repeat)
+    snapshot_time = best_time(lambda: load_snapshot(snapshot_path), repeat)
+    return {
+        "json_size": os.path.getsize(json_path),
+        "snapshot_size": os.path.getsize(snapshot_path),
+        "json": json_time,
+        "json_ordered": ordered_json_time,
+        "snapshot": snapshot_time,
+        "speedup": json_time / snapshot_time,
+        "speedup_ordered": ordered_json_time / snapshot_time
+    }
+
+
+def run_benchmark(scales=SCALES, repeat=10):
+    results = {
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "cases": {}
+    }
+    directory = tempfile.mkdtemp()
+    try:
+        for scale in scales:
+            results["cases"]["scale_" + str(scale)] = run_case(scale, directory, repeat)
+    finally:
+        shutil.rmtree(directory)
+    return results
+
+
+if __name__ == '__main__':
+    scales = [int(scale) for scale in sys.argv[1:]] or SCALES
+    print(json.dumps(run_benchmark(scales), indent=4))
@@ -0,0 +1,140 @@
+# Generates synthetic schema networks of configurable size, fan-out, depth, cycle rate and
+# items/anyOf usage, writes them to a directory and serves them from file:// or from a local
+# HTTP server that counts the requests it receives. Used by benchmarks.network_benchmark.
+
+
+import json
+import os
+import random
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+SCHEMA_NAME = "synthetic_%s_schema.json"
+
+
+def generate_network(size=50, fan_out=3, depth=4, cycle_rate=0.1, items_rate=0.3,
+                     any_of_rate=0.2, base_url="", seed=0):
+    """ Generate a network of schemas spread over depth levels below a root schema. Each schema
+    references up to fan_out schemas of the next level, every schema being referenced at least
+    once, and each reference points back to a schema of the same or an upper level with a
+    probability of cycle_rate.
+
+    :param size: the number of schemas
+    :param fan_out: the number of references of each schema
+    :param depth: the number of levels below the root schema
+    :param cycle_rate: the probability of a reference to go back up the network
+    :param items_rate: the probability of a reference to be in an array "items"
+    :param any_of_rate: the probability of a reference to be in an "anyOf"
+    :param base_url: the URL prefix of the schemas "id"
+    :param seed: the seed of the random generator
+    :return: a dictionary of schema names and their content, the root schema being the first
+    """
+    generator = random.Random(seed)
+    names = [SCHEMA_NAME % i for i in range(size)]
+    levels = [[names[0]]] + [names[1 + level::depth] for level in range(depth)]
+    levels = [level for level in levels if level]
+    references = dict((name, []) for name in names)
+
+    for level_index, level in enumerate(levels[:-1]):
+        next_level = levels[level_index + 1]
+
+        # every schema of the next level gets a parent
+        for i, name in enumerate(next_level):
+            references[level[i % len(level)]].append(name)
+
+        for name in level:
+            while len(references[name]) < fan_out:
+                if generator.random() < cycle_rate:
+                    upper_level = levels[generator.randint(0, level_index)]
+                    references[name].append(generator.choice(upper_level))
+                else:
+                    references[name].append(generator.choice(next_level))
+
+    for name in levels[-1]:
+        for _ in range(fan_out):
+            if generator.random() < cycle_rate:
+                references[name].append(generator.choice(names))
+
+    network = {}
+    for name in names:
+        properties = {
+            "@context": {"anyOf": [{"type": "string"}, {"type": "object"}]},
+            "@id": {"type": "string", "format": "uri"},
+            "@type": {"type": "string", "enum": [name.replace("_schema.json", "")]},
+            "name": {"type": "string", "description": "The name of the " + name},
+            "description": {"type": "string"}
+        }
+        for i, target in enumerate(references[name]):
+            reference = {"$ref": target + "#"}
+            draw = generator.random()
+            if draw < items_rate:
+                properties["link_%s" % i] = {"type": "array", "items": reference}
+            elif draw < items_rate + any_of_rate:
+                properties["link_%s" % i] = {"anyOf": [reference, {"type": "string"}]}
+            else:
+                properties["link_%s" % i] = reference
+
+        network[name] = {
+            "id": base_url + name,
+            "$schema": "http://json-schema.org/draft-04/schema",
+            "title": "Synthetic schema " + name,
+            "type": "object",
+            "properties": properties
+        }
+
+    return network
+
+
+def write_network(network, directory):
+    """ Write each schema of the network to its own file
+
+    :param network: a dictionary of schema names and their content
+    :param directory: the directory to write the schemas to
+    """
+    for name, schema in network.items():
+        with open(os.path.join(directory, name), "w") as schema_file:
+            json.dump(schema, schema_file, indent=4)
+
+
+class NetworkServer:
+    """ Serve a directory on a free local port, counting the GET requests. To be used as a
+    context manager, the base URL of the served files is then available as url.
+
+    :param directory: the directory to serve
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.requests = 0
+        self.url = None
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    def __enter__(self):
+        server = self
+
+        class Handler(SimpleHTTPRequestHandler):
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                super(Handler, self).do_GET()
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0),
+                                          partial(Handler, directory=self.directory))
+        self.url = "http://127.0.0.1:%s/" % self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset(self):
+        """ Reset the request counter """
+        with self._lock:
+            self.requests = 0
@@ -4,7 +4,7 @@ import os
 import time
 import datetime
 import urllib.parse
-from utils import to_boolean
+from utils import to_boolean, transport
 
 
 STAGING_RESOURCE_API_ENDPOINT = "https://resource.staging.metadatacenter.org"
@@ -63,7 +63,7 @@ class CEDARClient:
             for cedar_file in directory_files:
                 with open(cedar_file, 'rb') as f:
                     json_data = f.read()
-                r = requests.post(url, params=parameter, data=json_data, headers=headers)
+                r = transport.post(url, params=parameter, data=json_data, headers=headers)
 
                 #  log information
                 request_time = time.time() - start
@@ -99,7 +99,7 @@ class CEDARClient:
         """
         headers = self.get_headers(api_key)
         endpoint = self.select_endpoint(endpoint_type)
-        response = requests.request("GET", endpoint+"/users", headers=headers)
+        response = transport.request("GET", endpoint+"/users", headers=headers)
         return response
 
     def validate_resource(self, api_key, request_url, resource):
@@ -111,8 +111,8 @@ class CEDARClient:
         :return: True or False, depending if the resource validated or not, and a message
         """
         headers = self.get_headers(api_key)
-        response = requests.request("POST", request_url,
-                                    headers=headers, data=json.dumps(resource), verify=True)
+        response = transport.request("POST", request_url,
+                                     headers=headers, data=json.dumps(resource), verify=True)
         if response.status_code == requests.codes.ok:
             message = json.loads(response.text)
             return to_boolean(message["validates"]), message
@@ -161,8 +161,8 @@ class CEDARClient:
         :return: a response text loaded as a dictionary
         """
         headers = self.get_headers(api_key)
-        response = requests.request("POST", request_url, headers=headers,
-                                    data=json.dumps(resource), verify=True)
+        response = transport.request("POST", request_url, headers=headers,
+                                     data=json.dumps(resource), verify=True)
         if response.status_code == requests.codes.ok:
             return json.loads(response.text)
         else:
@@ -180,7 +180,7 @@ class CEDARClient:
         request_url = self.select_endpoint(endpoint_type) \
             + "/templates/https%3A%2F%2Frepo.metadatacenter.org%2Ftemplates%2F" \
             + template_id
-        response = requests.request("GET", request_url, headers=headers)
+        response = transport.request("GET", request_url, headers=headers)
         return response
 
     def get_folder_content(self, endpoint_type, api_key, folder_id):
@@ -194,7 +194,7 @@ class CEDARClient:
         headers = self.get_headers(api_key)
         request_url = self.select_endpoint(endpoint_type) \
             + "/folders/https%3A%2F%2Frepo.metadatacenter.org%2Ffolders%2F" + folder_id
-        response = requests.request("GET", request_url, headers=headers)
+        response = transport.request("GET", request_url, headers=headers)
         return response
 
     def create_template(self, endpoint_type, api_key, folder_id, template_file):
@@ -210,8 +210,8 @@ class CEDARClient:
         request_url = self.select_endpoint(endpoint_type) \
             + "/templates?folder_id=https%3A%2F%2Frepo.metadatacenter.org%2Ffolders%2F" + folder_id
         upload_schema = json.loads(template_file)
-        response = requests.request("POST", request_url,
-                                    headers=headers, data=json.dumps(upload_schema), verify=True)
+        response = transport.request("POST", request_url,
+                                     headers=headers, data=json.dumps(upload_schema), verify=True)
         return response
 
     def create_folder(self,
@@ -236,8 +236,8 @@ class CEDARClient:
             "name": new_folder_name,
             "description": new_folder_description
         }
-        response = requests.request("POST", request_url,
-                                    headers=headers, data=json.dumps(folder_json), verify=True)
+        response = transport.request("POST", request_url,
+                                     headers=headers, data=json.dumps(folder_json), verify=True)
         return response
 
     def delete_folder(self, endpoint_type, api_key, folder_id):
@@ -251,7 +251,7 @@ class CEDARClient:
         headers = self.get_headers(api_key)
         requests_url = self.select_endpoint(endpoint_type) \
             + "/folders/" + urllib.parse.quote_plus(folder_id)
-        response = requests.request("DELETE", requests_url, headers=headers)
+        response = transport.request("DELETE", requests_url, headers=headers)
         return response
 
     def delete_elements(self, endpoint_type, api_key, folder_id):
@@ -277,7 +277,7 @@ class CEDARClient:
                               target_type +
                               "&version=all&publication_status=all&sort=name&limit=500")
 
-            target_responses = requests.request("GET", targets_url, headers=headers)
+            target_responses = transport.request("GET", targets_url, headers=headers)
             for resource in json.loads(target_responses.text)["resources"]:
                 target_id = resource['@id'].split('/')[-1]
                 if target_type == 'template':
@@ -292,7 +292,7 @@ class CEDARClient:
                       "/templates/https%3A%2F%2Frepo.metadatacenter.org%2Ftemplates%2F" + \
                       template_id
         headers = self.get_headers(api_key)
-        response = requests.request("DELETE", request_url, headers=headers)
+        response = transport.request("DELETE", request_url, headers=headers)
         return response
 
     def delete_template_element(self, endpoint, api_key, template_id):
@@ -301,7 +301,7 @@ class CEDARClient:
                       "%2Ftemplate-elements%2F" + \
                       template_id
         headers = self.get_headers(api_key)
-        response = requests.request("DELETE", request_url, headers=headers)
+        response = transport.request("DELETE", request_url, headers=headers)
         return response
 
     def create_template_element(self, endpoint_type, api_key, folder_id, template_resource):
@@ -319,10 +319,10 @@ class CEDARClient:
             + folder_id
         with open(template_resource, 'r') as template:
             upload_schema = json.load(template)
-        response = requests.request("POST", request_url,
-                                    headers=headers,
-                                    data=upload_schema,
-                                    verify=True)
+        response = transport.request("POST", request_url,
+                                     headers=headers,
+                                     data=upload_schema,
+                                     verify=True)
         print(response.content)
         return response
 
@@ -341,8 +341,8 @@ class CEDARClient:
             'https://repo.metadatacenter.org/templates/', '')
         request_url = self.select_endpoint(endpoint_type) \
             + "/templates/https%3A%2F%2Frepo.metadatacenter.org%2Ftemplates%2F" + template_id
-        response = requests.request("PUT", request_url,
-                                    headers=headers, data=json.dumps(upload_schema), verify=True)
+        response = transport.request("PUT", request_url,
+                                     headers=headers, data=json.dumps(upload_schema), verify=True)
         return response
 
     def upload_element(self, server_alias, api_key, schema_file, remote_folder_id):
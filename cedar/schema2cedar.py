@@ -5,6 +5,8 @@ from urllib.parse import quote, urlparse
 import datetime
 import cedar.client
 import requests
+from utils.schema_graph import iter_references, escape_pointer
+from utils import transport
 import sys
 import os
 
@@ -656,6 +658,8 @@ class Schema2CedarTemplateElement(Schema2CedarBase):
             + "/template-elements?folder_id=https%3A%2F%2Frepo.metadatacenter.org%2Ffolders%2F" \
             + self.folder_id
 
+        references = dict(iter_references(schema, external_only=False))
+
         # For each field in the properties array
         for itemKey, itemVal in schema['properties'].items():
 
@@ -665,12 +669,15 @@ class Schema2CedarTemplateElement(Schema2CedarBase):
                 # set the schema_path to load to None
                 schema_as_json = None
                 multiple_items = False
+                field_pointer = '/properties/' + escape_pointer(itemKey)
 
-                if '$ref' in itemVal:
-                    schema_as_json = self.load_sub_spec(itemVal['$ref'], schema, itemKey)
+                if field_pointer in references:
+                    schema_as_json = self.load_sub_spec(references[field_pointer],
+                                                        schema, itemKey)
 
-                elif 'items' in itemVal and '$ref' in itemVal['items']:
-                    schema_as_json = self.load_sub_spec(itemVal['items']['$ref'], schema, itemKey)
+                elif field_pointer + '/items' in references:
+                    schema_as_json = self.load_sub_spec(references[field_pointer + '/items'],
+                                                        schema, itemKey)
                     multiple_items = True
 
                 elif ('items' in itemVal and ('anyOf' in itemVal['items']
@@ -708,11 +715,11 @@ class Schema2CedarTemplateElement(Schema2CedarBase):
 
                         if isinstance(validation, list) and validation[0] is True:
                             try:
-                                response = requests.request("POST",
-                                                            request_url,
-                                                            headers=headers,
-                                                            data=json.dumps(temp_spec),
-                                                            verify=True)
+                                response = transport.request("POST",
+                                                             request_url,
+                                                             headers=headers,
+                                                             data=json.dumps(temp_spec),
+                                                             verify=True)
                                 response.raise_for_status()
                             except requests.exceptions.HTTPError as err:
                                 print("Http Error:", err)
@@ -774,7 +781,7 @@ class Schema2CedarTemplateElement(Schema2CedarBase):
 
         if url_to_load:
             if field_key not in self.loaded_specs.keys():
-                string_from_url = requests.request("GET", url_to_load)
+                string_from_url = transport.request("GET", url_to_load)
                 string_to_json = json.loads(string_from_url.text)
             else:
                 string_to_json = self.loaded_specs[field_key]
@@ -1,20 +1,27 @@
-import copy
-from urllib.parse import urlparse
 from collections import namedtuple
+from utils.iri_expander import ABSOLUTE_SCHEMES, IRIExpander
+
+Overlap = namedtuple('Overlap', ['first_field', 'second_field'])
+OverlapValue = namedtuple('OverlapValue', ['relative_coverage', 'absolute_coverage'])
+AbsoluteCoverage = namedtuple('AbsoluteCoverage', ['overlap_number', 'total_fields'])
 
 
 class EntityCoverage:
     """ A class that compute the overlap between two JSON schemas semantic values taken from context
      files. This operation is not commutative. Thus, to find out if the schema/context pairs are
-     equivalent, we need to run both semDiff(s_a, c_a, s_b, c_b) and semDiff(s_b, c_b, s_a, c_a)
+     equivalent, we need to run both semDiff(s_a, c_a, s_b, c_b) and semDiff(s_b, c_b, s_a, c_a).
+     The schemas and contexts are treated as read-only: they are neither copied nor modified.
 
      :param schema_a: the content of the first schema
      :param context_a: the context content bound to the first schema
      :param schema_b: the content of the second schema
      :param context_b: the context content bound to the second schema
+     :param fingerprint_a: the fingerprint of the first schema, computed if not given
+     :param fingerprint_b: the fingerprint of the second schema, computed if not given
     """
 
-    def __init__(self, schema_a, context_a, schema_b, context_b):
+    def __init__(self, schema_a, context_a, schema_b, context_b,
+                 fingerprint_a=None, fingerprint_b=None):
         self.input1 = {
             "schema": schema_a,
             "context": context_a
@@ -24,8 +31,10 @@ class EntityCoverage:
             "context": context_b
         }
 
-        self.comparator1 = self.__build_context_dict(self.input1)
-        self.comparator2 = self.__build_context_dict(self.input2)
+        self.comparator1 = fingerprint_a if fingerprint_a is not None \
+            else self.__build_context_dict(self.input1)
+        self.comparator2 = fingerprint_b if fingerprint_b is not None \
+            else self.__build_context_dict(self.input2)
         self.overlaps = self.__compute_context_coverage(self.comparator1[0], self.comparator2[0])
         self.unmatched_with_sem = self.overlaps[2]
         self.unmatched_without_sem = self.comparator2[1]
@@ -36,45 +45,65 @@ class EntityCoverage:
             "ignored fields": self.comparator1[1]
         }
 
-    def __build_context_dict(self, schema_input):
+    @classmethod
+    def fingerprint(cls, schema, context, expander=None):
+        """ Computes the semantic fingerprint of a schema: its expanded IRIs with the fields
+        bound to them, and the fields ignored for having no semantic value. A fingerprint can
+        be computed once per entity and given to every comparison of that entity, it must not
+        be modified.
+
+        :param schema: the content of the schema
+        :param context: the context content bound to the schema
+        :param expander: the IRIExpander of the context, created if not given
+        :return: a dictionary of semantic values and their corresponding fields, and the list
+            of ignored fields
+        """
+        return cls.__build_context_dict({"schema": schema, "context": context}, expander)
+
+    @classmethod
+    def __build_context_dict(cls, schema_input, expander=None):
         """ A private method that associate each field in a schema to it's semantic value in the
         context and reverse the result
 
         :param schema_input:
+        :param expander: the IRIExpander of the context, created if not given
         :return sorted_values: a dictionary of semantic values and their corresponding field
         :return ignored_fields: a list of fields that were ignored due to having no semantic value
             in the context file
         """
         sorted_values = {}
         ignored_keys = ["@id", "@context", "@type"]
-        schema = copy.deepcopy(schema_input)
         ignored_fields = []
+        if expander is None:
+            expander = IRIExpander(schema_input["context"]["@context"])
 
         # for each field in the schema
-        for field in schema['schema']['properties']:
+        for field in schema_input['schema']['properties']:
 
             # Ignoring useless keys
             if field not in ignored_keys:
 
                 # If the field can be found in the context, process it
-                if field in schema["context"]["@context"].keys():
+                if field in schema_input["context"]["@context"].keys():
 
                     # This is the raw semantic value of the field, it might need some processing
-                    raw_semantic_value = schema["context"]["@context"][field]
+                    raw_semantic_value = schema_input["context"]["@context"][field]
 
                     # If the field raw semantic value is a string
                     if isinstance(raw_semantic_value, str):
-                        sorted_values = self.__process_field(field,
-                                                             raw_semantic_value,
-                                                             schema["context"]["@context"],
-                                                             sorted_values)
+                        sorted_values = cls.__process_field(field,
+                                                            raw_semantic_value,
+                                                            schema_input["context"]["@context"],
+                                                            sorted_values,
+                                                            expander)
 
                     # if the field raw semantic value is not a string
                     else:
-                        sorted_values = self.__process_field(field,
-                                                             raw_semantic_value['@id'],
-                                                             schema["context"]["@context"],
-                                                             sorted_values)
+                        sorted_values = cls.__process_field(field,
+                                                            raw_semantic_value['@id'],
+                                                            schema_input["context"]["@context"],
+                                                            sorted_values,
+                                                            expander)
 
                 # if the field is absent from the context file, ignore it as it has no semantic
                 # definition
@@ -84,7 +113,7 @@ class EntityCoverage:
         return sorted_values, ignored_fields
 
     @staticmethod
-    def __process_field(field_name, field_value, context, comparator):
+    def __process_field(field_name, field_value, context, comparator, expander=None):
         """ Private method that catches a given field semantic value from the given context and adds it
         to the output
 
@@ -92,34 +121,26 @@ class EntityCoverage:
         :param field_value: the value of the given field
         :param context: the context from which to retrieve the semantic value
         :param comparator: the output of __build_context_dict()
+        :param expander: the IRIExpander of the context, shared by the fields of a schema
         :return comparator: a dictionary of semantic values and corresponding fields from the given
             schema and context
         """
 
-        base_url = urlparse(field_value).scheme
-
-        # if the raw value is already an URL, it does not need processing
-        if base_url in ('http', 'https'):
-            if field_value not in comparator:
-                comparator[field_value] = [field_name]
-            else:
-                comparator[field_value].append(field_name)
-
-        # replacing semantic base to form an absolute IRI
-        else:
-            to_be_processed = True
+        if expander is None:
+            expander = IRIExpander(context)
+        parsed_value = expander.parse(field_value)
 
-            if ":" in field_value:
-                if copy.deepcopy(field_value).split(":")[1] == "":
-                    to_be_processed = False
+        # if the raw value is already an URL, it does not need processing, a compact IRI
+        # without reference (eg: "sdo:") is ignored
+        if parsed_value.prefix in ABSOLUTE_SCHEMES or parsed_value.reference != "":
 
-            if to_be_processed is not False:
-                processed_semantic_value = field_value.replace(base_url + ":", context[base_url])
+            # replacing semantic base to form an absolute IRI
+            processed_semantic_value = expander.expand(field_value)
 
-                if processed_semantic_value not in comparator:
-                    comparator[processed_semantic_value] = [field_name]
-                else:
-                    comparator[processed_semantic_value].append(field_name)
+            if processed_semantic_value not in comparator:
+                comparator[processed_semantic_value] = [field_name]
+            else:
+                comparator[processed_semantic_value].append(field_name)
 
         return comparator
 
@@ -136,9 +157,8 @@ class EntityCoverage:
             been matched in the first schema
         """
 
-        unmatched_fields = copy.deepcopy(context2)
-        Overlap = namedtuple('Overlap', ['first_field', 'second_field'])
-        OverlapValue = namedtuple('OverlapValue', ['relative_coverage', 'absolute_coverage'])
+        unmatched_fields = dict((field, fields) for field, fields in context2.items()
+                                if field not in context1)
 
         overlap_number = 0
         overlap_output = []
@@ -154,11 +174,8 @@ class EntityCoverage:
                     for second_field_val in context2[field]:
                         local_overlap = Overlap(first_field_val, second_field_val)
                         overlap_output.append(local_overlap)
-                        if field in unmatched_fields:
-                            del unmatched_fields[field]
 
-        absolute_coverage = namedtuple('AbsoluteCoverage', ['overlap_number', 'total_fields'])
-        local_coverage = absolute_coverage(str(overlap_number), str(processed_field))
+        local_coverage = AbsoluteCoverage(str(overlap_number), str(processed_field))
         try:
             local_overlap_value = OverlapValue(str(round((overlap_number * 100) / len(context1),
                                                          2)),
@@ -1,5 +1,5 @@
 from urllib.parse import urlparse
-import copy
+from utils.iri_expander import get_expander
 
 
 class NetworkCoverage:
@@ -7,29 +7,35 @@ class NetworkCoverage:
     comparing the semantic base type of each schema.
 
     :param networks_array: an array containing the two networks to compare
+    :param expanders: two dictionaries caching the IRIExpander of the contexts of each network
+        by schema name (see utils.iri_expander.get_expander), to share them between comparisons
     """
 
-    def __init__(self, networks_array):
-        network1 = self.__process_network(networks_array[0])
-        network2 = self.__process_network(networks_array[1])
+    def __init__(self, networks_array, expanders=None):
+        if expanders is None:
+            expanders = [{}, {}]
+        network1 = self.__process_network(networks_array[0], expanders[0])
+        network2 = self.__process_network(networks_array[1], expanders[1])
         coverage = self.__compute_coverage(network1, network2)
         self.covered_entities = coverage[0]
         self.total_entities = coverage[1]
         self.matched_entities = coverage[2]
 
     @staticmethod
-    def __process_network(network):
+    def __process_network(network, expanders=None):
         """ Private method that retrieve the base type of each entity in a given network
         for later comparison
 
         :param network: a dictionary of schemas and their context (the network itself)
+        :param expanders: a dictionary caching the IRIExpander of each context by schema name,
+            None to leave them uncached
         :return network_output: a dictionary of schemas and their base type retrieved from the
-            context
+            context, expanded to an absolute IRI
         """
         network_output = {}
         for schema in network:
-            schema_name = copy.deepcopy(schema).replace("_schema.json", "").capitalize()
-            schema_name_in_context = copy.deepcopy(schema_name)
+            schema_name = schema.replace("_schema.json", "").capitalize()
+            schema_name_in_context = schema_name
 
             if "_" in schema_name:
                 schema_name_in_context = schema_name_in_context.replace("_", " ")\
@@ -41,10 +47,12 @@ class NetworkCoverage:
             if schema_name_in_context in schema_context.keys():
                 schema_type = schema_context[schema_name_in_context]
 
-            schema_type_base_url = urlparse(schema_type).scheme
-            if schema_type is not None and schema_type_base_url not in ('http', 'https'):
-                if schema_type_base_url in schema_context.keys():
-                    schema_type.replace(schema_type_base_url, schema_context[schema_type_base_url])
+            # expanding compact types, the types without reference (eg: "sdo:") or with an
+            # unknown prefix are kept as they are
+            if isinstance(schema_type, str):
+                parsed_type = get_expander(expanders, schema, schema_context).parse(schema_type)
+                if parsed_type.reference != "" and parsed_type.iri is not None:
+                    schema_type = parsed_type.iri
 
             network_output[schema_name] = schema_type
 
@@ -52,7 +60,9 @@ class NetworkCoverage:
 
     @staticmethod
     def __compute_coverage(network_a, network_b):
-        """ Private method that compute the coverage between two networks
+        """ Private method that compute the coverage between two networks. The entities of the
+        second network are indexed by base type, each entity of the first network is matched
+        with all the entities of the second network sharing its type that were not matched yet.
 
         :param network_a: the output of __process_network for the first network
         :param network_b: the output of __process_network for the second network
@@ -63,12 +73,14 @@ class NetworkCoverage:
         total_items = 0
         matched_items = 0
 
-        network__b = copy.deepcopy(network_b)
+        entities_by_type = {}
+        for schema2, context_type2 in network_b.items():
+            if context_type2 is not None:
+                entities_by_type.setdefault(context_type2, []).append(schema2)
 
         for schema in network_a:
             total_items += 1
             context_type = network_a[schema]
-            matched = False
 
             subtype = "true"
             if context_type is not None \
@@ -76,22 +88,12 @@ class NetworkCoverage:
                     and urlparse(context_type).scheme not in ["http", "https"]:
                 subtype = context_type.split(":")[1]
 
-            if context_type is not None:
+            matches = None
+            if context_type is not None and subtype != "":
+                matches = entities_by_type.pop(context_type, None)
 
-                for schema2 in list(network__b.keys()):
-                    context_type2 = network_b[schema2]
-
-                    if context_type == context_type2 and subtype != "":
-                        matched = True
-                        del network__b[schema2]
-                        if schema in coverage.keys():
-                            coverage[schema].append(schema2)
-                        else:
-                            coverage[schema] = [schema2]
-
-            if matched is False:
-                coverage[schema] = None
-            else:
+            coverage[schema] = matches
+            if matches is not None:
                 matched_items += 1
 
         output = [coverage, total_items, matched_items]
@@ -0,0 +1,108 @@
+from semDiff.compareEntities import EntityCoverage, OverlapValue, AbsoluteCoverage
+
+
+class CoverageMatrix:
+    """ A sparse entity-by-IRI incidence matrix of several networks. Each entity (a schema with
+    its context) is a row, each expanded IRI a column, and each cell holds the number of fields
+    of the entity bound to the IRI. The overlap counts between all the entities are computed
+    at once by multiplying the matrix with its (binary) transpose, they are the same as the
+    coverage computed by EntityCoverage for each pair.
+
+    :param networks: a list of prepared networks (with their "schemas" and "contexts")
+    """
+
+    def __init__(self, networks):
+        self.entities = []
+        self.positions = {}
+        self.iris = {}
+        self.rows = []
+        self.columns = []
+        self.overlap_counts = None
+
+        for network_position, network in enumerate(networks):
+            for schema_name in network["schemas"]:
+                if schema_name in network["contexts"]:
+                    self.add_entity(network_position, schema_name,
+                                    network["schemas"][schema_name],
+                                    {"@context": network["contexts"][schema_name]})
+
+    def add_entity(self, network_position, schema_name, schema, context):
+        """ Adds an entity as a new row of the matrix
+
+        :param network_position: the position of the network of the entity
+        :param schema_name: the name of the schema
+        :param schema: the content of the schema
+        :param context: the context content bound to the schema
+        :return: the row of the entity
+        """
+        row = len(self.rows)
+        self.entities.append((network_position, schema_name))
+        self.positions[(network_position, schema_name)] = row
+        cells = {}
+        for iri, fields in EntityCoverage.fingerprint(schema, context)[0].items():
+            if iri not in self.iris:
+                self.iris[iri] = len(self.columns)
+                self.columns.append([])
+            cells[self.iris[iri]] = len(fields)
+            self.columns[self.iris[iri]].append(row)
+        self.rows.append(cells)
+        self.overlap_counts = None
+        return row
+
+    def multiply(self):
+        """ Computes the sparse product of the matrix with its binary transpose, column by
+        column: only the pairs of entities sharing at least one IRI are visited
+
+        :return: a list holding, for each row, a dictionary of the other rows and the number of
+            fields of the row bound to an IRI they share
+        """
+        overlap_counts = [{} for _ in self.rows]
+        for column, rows in enumerate(self.columns):
+            for first_row in rows:
+                fields = self.rows[first_row][column]
+                counts = overlap_counts[first_row]
+                for second_row in rows:
+                    if second_row != first_row:
+                        counts[second_row] = counts.get(second_row, 0) + fields
+        self.overlap_counts = overlap_counts
+        return overlap_counts
+
+    def coverage(self, first_entity, second_entity):
+        """ Returns the coverage of the first entity by the second one, as computed by
+        EntityCoverage (full_coverage["coverage"])
+
+        :param first_entity: the (network position, schema name) of the first entity
+        :param second_entity: the (network position, schema name) of the second entity
+        :return: an OverlapValue with the relative and absolute coverage
+        """
+        if self.overlap_counts is None:
+            self.multiply()
+        first_row = self.positions[first_entity]
+        second_row = self.positions[second_entity]
+        total_fields = len(self.rows[first_row])
+        if total_fields == 0:
+            return OverlapValue(0, 0)
+        overlap_number = self.overlap_counts[first_row].get(second_row, 0)
+        return OverlapValue(str(round((overlap_number * 100) / total_fields, 2)),
+                            AbsoluteCoverage(str(overlap_number), str(total_fields)))
+
+    def network_coverage(self, first_network, second_network):
+        """ Returns the coverage of every entity of the first network by the entities of the
+        second network that share at least one IRI with it
+
+        :param first_network: the position of the first network
+        :param second_network: the position of the second network
+        :return: a dictionary of (first schema name, second schema name) and their OverlapValue
+        """
+        if self.overlap_counts is None:
+            self.multiply()
+        output = {}
+        for first_row, (network_position, schema_name) in enumerate(self.entities):
+            if network_position != first_network:
+                continue
+            for second_row in sorted(self.overlap_counts[first_row]):
+                second_entity = self.entities[second_row]
+                if second_entity[0] == second_network:
+                    output[(schema_name, second_entity[1])] = self.coverage(
+                        (network_position, schema_name), second_entity)
+        return output
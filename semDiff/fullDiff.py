@@ -1,8 +1,21 @@
+import json
+import os
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from copy import deepcopy
 from semDiff import compareNetwork, compareEntities
 from utils.schema2context import generate_context_mapping, generate_labels_from_contexts
 from utils.prepare_fulldiff_input import load_context
+from utils.snapshot import load_snapshot
+from utils.iri_expander import get_expander
+
+Twins = namedtuple('Twins', ['first_entity', 'second_entity'])
+TwinCoverage = namedtuple('TwinCoverage', ['twins', 'overlap'])
+
+_worker_networks = None
+_worker_fingerprints = None
+_worker_expanders = None
 
 
 class FullSemDiff:
@@ -12,12 +25,20 @@ class FullSemDiff:
     attribute level between 'semantic synonyms'.
     """
 
-    def __init__(self, contexts, network_1, network_2):
+    def __init__(self, contexts, network_1, network_2, fingerprints=None, stream=False,
+                 expanders=None):
         """ The class constructor
 
         :param contexts: an array containing the two context networks to use
         :param network_1: a dictionary containing the first set of schemas
         :param network_2: a dictionary containing the second set of schemas
+        :param fingerprints: two dictionaries caching the fingerprints of the entities of each
+            network by schema name (see get_fingerprint), to share them between comparisons
+        :param stream: when True, nothing is compared nor kept by the constructor, the twins
+            are computed one by one by iterating over compare()
+        :param expanders: two dictionaries caching the IRIExpander of the contexts of each
+            network by schema name (see utils.iri_expander.get_expander), to share them between
+            comparisons
         """
 
         self.total_entities = 0
@@ -25,11 +46,30 @@ class FullSemDiff:
         self.twins = []
         self.needs_merging = {}
 
-        twin_tuple = namedtuple('Twins', ['first_entity', 'second_entity'])
-        twin_coverage = namedtuple('TwinCoverage', ['twins', 'overlap'])
+        self.contexts = contexts
+        self.network_1 = network_1
+        self.network_2 = network_2
+        self.fingerprints = fingerprints if fingerprints is not None else [{}, {}]
+        self.expanders = expanders if expanders is not None else [{}, {}]
+
+        if not stream:
+            for twin_coverage, needs_merging in self.compare():
+                self.twins.append(twin_coverage)
+                self.needs_merging.update(needs_merging)
+
+    def compare(self):
+        """ Compares the twins of the two networks, one pair at a time
+
+        :return: a generator of the TwinCoverage of each pair of twins and of the fields of the
+            second entity that need merging with the first one (an empty dictionary when there
+            are none)
+        """
+        contexts = self.contexts
+        fingerprints = self.fingerprints
+        expanders = self.expanders
 
         # Compute the comparison of entities based on their semantic type
-        entity_coverage = compareNetwork.NetworkCoverage(contexts)
+        entity_coverage = compareNetwork.NetworkCoverage(contexts, expanders)
 
         # for each mapped entity
         for entity_name in entity_coverage.covered_entities:
@@ -37,40 +77,93 @@ class FullSemDiff:
             twins = entity_coverage.covered_entities[entity_name]
 
             # if the entity has twins
-            if twins is not None and entity_name.lower() + "_schema.json" in network_1.keys():
-                entity_schema = network_1[entity_name.lower() + "_schema.json"]
+            if twins is not None and entity_name.lower() + "_schema.json" in self.network_1:
+                entity_schema = self.network_1[entity_name.lower() + "_schema.json"]
                 entity_context = {"@context": contexts[0][entity_name.lower() + "_schema.json"]}
+                entity_fingerprint = get_fingerprint(fingerprints[0],
+                                                     entity_name.lower() + "_schema.json",
+                                                     entity_schema, entity_context,
+                                                     expanders[0])
 
                 # For each twin
                 for twin in twins:
-                    if twin.lower() + "_schema.json" in network_2.keys():
+                    if twin.lower() + "_schema.json" in self.network_2:
                         self.half_twins += 1
-                        twin_schema = network_2[twin.lower() + "_schema.json"]
+                        twin_schema = self.network_2[twin.lower() + "_schema.json"]
                         twin_context = {"@context": contexts[1][twin.lower() + "_schema.json"]}
-                        local_twin = twin_tuple(entity_name, twin)
+                        local_twin = Twins(entity_name, twin)
 
                         # compare the entities
-                        attribute_diff = compareEntities.EntityCoverage(entity_schema,
-                                                                        entity_context,
-                                                                        twin_schema,
-                                                                        twin_context)
+                        attribute_diff = compareEntities.EntityCoverage(
+                            entity_schema, entity_context, twin_schema, twin_context,
+                            entity_fingerprint,
+                            get_fingerprint(fingerprints[1], twin.lower() + "_schema.json",
+                                            twin_schema, twin_context, expanders[1]))
                         # create the tuple
-                        attribute_coverage = twin_coverage(local_twin,
-                                                           attribute_diff.full_coverage)
-
-                        # adds it to output
-                        self.twins.append(attribute_coverage)
+                        attribute_coverage = TwinCoverage(local_twin,
+                                                          attribute_diff.full_coverage)
 
+                        needs_merging = {}
                         if len(attribute_diff.unmatched_with_sem) > 0:
-                            self.needs_merging[twin.lower() + "_schema.json"] = {}
-                            self.needs_merging[twin.lower() + "_schema.json"]['fields'] = []
+                            needs_merging[twin.lower() + "_schema.json"] = {
+                                'fields': [field[0] for field in
+                                           attribute_diff.unmatched_with_sem.values()],
+                                'merge_with': entity_name.lower() + "_schema.json"
+                            }
+
+                        yield attribute_coverage, needs_merging
 
-                        for semantic_url in attribute_diff.unmatched_with_sem:
-                            field = attribute_diff.unmatched_with_sem[semantic_url]
-                            self.needs_merging[twin.lower() + "_schema.json"]['merge_with'] = \
-                                entity_name.lower() + "_schema.json"
-                            self.needs_merging[twin.lower() + "_schema.json"][
-                                'fields'].append(field[0])
+
+def get_fingerprint(fingerprints, schema_name, schema, context, expanders=None):
+    """ Returns the fingerprint of an entity from the given cache, computing it on first use
+
+    :param fingerprints: a dictionary of schema names and their fingerprint
+    :param schema_name: the name of the schema
+    :param schema: the content of the schema
+    :param context: the context content bound to the schema
+    :param expanders: a dictionary caching the IRIExpander of each context by schema name
+    :return: the fingerprint computed by EntityCoverage.fingerprint
+    """
+    if schema_name not in fingerprints:
+        expander = get_expander(expanders, schema_name, context["@context"])
+        fingerprints[schema_name] = compareEntities.EntityCoverage.fingerprint(schema, context,
+                                                                               expander)
+    return fingerprints[schema_name]
+
+
+def compare_networks(networks, fingerprints, first, second, expanders=None):
+    """ Runs FullSemDiff on two of the given networks
+
+    :param networks: a list of prepared networks
+    :param fingerprints: a list of fingerprint caches, one per network
+    :param first: the position of the first network
+    :param second: the position of the second network
+    :param expanders: a list of IRIExpander caches, one per network
+    :return: the twins and the fields that need merging
+    """
+    if expanders is None:
+        expanders = [{} for _ in networks]
+    coverage = FullSemDiff([networks[first]["contexts"], networks[second]["contexts"]],
+                           networks[first]["schemas"],
+                           networks[second]["schemas"],
+                           [fingerprints[first], fingerprints[second]],
+                           expanders=[expanders[first], expanders[second]])
+    return coverage.twins, coverage.needs_merging
+
+
+def _init_pair_worker(networks):
+    """ Initializes a worker process of FullSemDiffMultiple with the networks to compare and
+    its own fingerprint and IRIExpander caches """
+    global _worker_networks, _worker_fingerprints, _worker_expanders
+    _worker_networks = networks
+    _worker_fingerprints = [{} for _ in networks]
+    _worker_expanders = [{} for _ in networks]
+
+
+def _compare_pair(pair):
+    """ Compares a pair of networks in a worker process of FullSemDiffMultiple """
+    return compare_networks(_worker_networks, _worker_fingerprints, pair[0], pair[1],
+                            _worker_expanders)
 
 
 class FullSemDiffMultiple:
@@ -78,37 +171,74 @@ class FullSemDiffMultiple:
     A class that computes the coverage at entity level and extracts
     'semantic synonyms' (named twins in the code) between multiple
     networks. It will then compute the coverage at attribute level between 'semantic synonyms'.
+    The pairs of networks are compared in this process, sharing the fingerprints of the
+    entities and the IRIExpanders of their contexts, or by a pool of processes.
     """
 
-    def __init__(self, networks):
+    def __init__(self, networks, max_workers=1):
+        """
+        :param networks: a list of prepared networks or the path of a snapshot of them
+        :type networks: list or str
+        :param max_workers: the maximum number of processes comparing pairs of networks, None
+            for the number of CPUs. The pairs are compared in this process when it is 1 (the
+            default) or when there is a single pair. The processes are spawned, not forked, so
+            that they are safe to start from a threaded server, and each one fingerprints the
+            entities it compares again: processes only pay off when there are many pairs of
+            large networks.
+        :type max_workers: int
+        """
+        if isinstance(networks, str):
+            networks = [dict((key, value) for key, value in network.items() if key != 'labels')
+                        for network in load_snapshot(networks)]
 
         self.networks = deepcopy(networks)
+        self.max_workers = max_workers
         self.contexts = []
         self.output = []
         self.ready_for_merge = []
+        self.fingerprints = []
+        self.expanders = []
 
         for network in self.networks:
             self.contexts.append(network["contexts"])
+            self.fingerprints.append({})
+            self.expanders.append({})
 
         self.compute_overlap()
 
     def compute_overlap(self, start_position=0):
-        local_overlap = []
-        for i in range(start_position + 1, len(self.networks)):
-            contexts = [self.networks[start_position]["contexts"], self.networks[i]["contexts"]]
-            coverage = FullSemDiff(contexts,
-                                   self.networks[start_position]["schemas"],
-                                   self.networks[i]["schemas"])
-            local_overlap.append(coverage.twins)
+        """ Compares every pair of networks from start_position. output holds, for each first
+        network, the twins found with each following network, and ready_for_merge the fields
+        that need merging, in the order of the pairs
 
-            if len(coverage.needs_merging) > 0:
-                self.ready_for_merge.append(coverage.needs_merging)
+        :param start_position: the position of the first network to compare
+        """
+        pairs = [(first, second) for first in range(start_position, len(self.networks))
+                 for second in range(first + 1, len(self.networks))]
+
+        if len(pairs) <= 1 or self.max_workers == 1:
+            results = [compare_networks(self.networks, self.fingerprints, first, second,
+                                        self.expanders)
+                       for first, second in pairs]
+        else:
+            networks = [{"contexts": network["contexts"], "schemas": network["schemas"]}
+                        for network in self.networks]
+            workers = min(self.max_workers or os.cpu_count() or 1, len(pairs))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                                     initializer=_init_pair_worker,
+                                     initargs=(networks,)) as pool:
+                results = list(pool.map(_compare_pair, pairs,
+                                        chunksize=max(1, len(pairs) // (workers * 4))))
 
-        if len(local_overlap) > 0:
-            self.output.append(local_overlap)
+        local_overlap = []
+        for (first, second), (twins, needs_merging) in zip(pairs, results):
+            local_overlap.append(twins)
+            if len(needs_merging) > 0:
+                self.ready_for_merge.append(needs_merging)
 
-        if start_position < len(self.networks):
-            self.compute_overlap(start_position + 1)
+            if second == len(self.networks) - 1:
+                self.output.append(local_overlap)
+                local_overlap = []
 
 
 class FullDiffGenerator:
@@ -120,41 +250,15 @@ class FullDiffGenerator:
 
     def __init__(self, first_network, second_network):
         """
-        :param first_network: the first network to compare from
-        :type first_network: dict
-        :param second_network:  the second network to compare against
-        :type second_network: dict
+        :param first_network: the first network to compare from, or the path of a snapshot
+            holding it
+        :type first_network: dict or str
+        :param second_network:  the second network to compare against, or the path of a
+            snapshot holding it
+        :type second_network: dict or str
         """
 
-        network_1_resolved = generate_context_mapping(first_network['url'], first_network['regex'])
-        raw_context_1 = {
-            'contexts': network_1_resolved[0]
-        }
-
-        context_1 = load_context(raw_context_1)
-
-        network_2_resolved = generate_context_mapping(second_network['url'],
-                                                      second_network['regex'])
-        raw_context_2 = {
-            'contexts': network_2_resolved[0]
-        }
-        context_2 = load_context(raw_context_2)
-
-        labels = generate_labels_from_contexts(context_1, {})
-        labels = generate_labels_from_contexts(context_2, labels)
-
-        prepared_input = [
-            {
-                "name": first_network['name'],
-                "schemas": network_1_resolved[1],
-                "contexts": context_1
-            },
-            {
-                "name": second_network['name'],
-                "schemas": network_2_resolved[1],
-                "contexts": context_2
-            }
-        ]
+        prepared_input, labels = self.prepare_networks(first_network, second_network)
 
         overlaps = FullSemDiffMultiple(prepared_input)
         self.json = {
@@ -166,3 +270,164 @@ class FullDiffGenerator:
 
         if len(overlaps.ready_for_merge) > 0:
             self.json["fields_to_merge"] = overlaps.ready_for_merge[0]
+
+    @classmethod
+    def prepare_networks(cls, first_network, second_network):
+        """ Prepares the two networks to compare and merges their labels
+
+        :param first_network: the first network to compare from, or the path of a snapshot
+        :param second_network: the second network to compare against, or the path of a snapshot
+        :return: the two prepared networks (without their labels) and the labels of both
+        """
+        prepared_input = [cls.prepare_network(first_network)]
+        prepared_input.append(cls.prepare_network(second_network, prepared_input[0]['labels']))
+
+        labels = prepared_input[0].pop('labels')
+        labels.update(prepared_input[1].pop('labels'))
+        return prepared_input, labels
+
+    @classmethod
+    def iter_records(cls, first_network, second_network):
+        """ Compares two networks without building the whole report: each record is yielded as
+        soon as it is computed and nothing is kept once it is consumed. The records are, in
+        this order:
+
+        - {"type": "networks", "network1": name, "network2": name}
+        - {"type": "schema", "network": "network1" or "network2", "name": name, "schema": schema}
+          for each schema of each network
+        - {"type": "context", "network": "network1" or "network2", "name": name,
+          "context": context} for each context of each network
+        - {"type": "labels", "labels": the labels of both networks}
+        - {"type": "overlap", "twins": [first entity, second entity], "overlap": coverage} for
+          each pair of twins, as in the "overlaps" of the report
+        - {"type": "merge", "schema": name, "merge_with": name, "fields": [field names]} after
+          the overlap of a pair whose second entity needs merging; when a schema needs merging
+          with several entities, the last record wins, as in the "fields_to_merge" of the report
+
+        read_json_lines builds the report of FullDiffGenerator back from these records.
+
+        :param first_network: the first network to compare from, or the path of a snapshot
+        :param second_network: the second network to compare against, or the path of a snapshot
+        :return: a generator of JSON serializable records
+        """
+        prepared_input, labels = cls.prepare_networks(first_network, second_network)
+        yield {
+            "type": "networks",
+            "network1": prepared_input[0].get("name"),
+            "network2": prepared_input[1].get("name")
+        }
+        for network_name, network in zip(["network1", "network2"], prepared_input):
+            for schema_name, schema in network["schemas"].items():
+                yield {"type": "schema", "network": network_name, "name": schema_name,
+                       "schema": schema}
+            for schema_name, context in network["contexts"].items():
+                yield {"type": "context", "network": network_name, "name": schema_name,
+                       "context": context}
+        yield {"type": "labels", "labels": labels}
+        labels = None  # not needed anymore by the comparison
+
+        sem_diff = FullSemDiff([prepared_input[0]["contexts"], prepared_input[1]["contexts"]],
+                               prepared_input[0]["schemas"],
+                               prepared_input[1]["schemas"],
+                               stream=True)
+        for twin_coverage, needs_merging in sem_diff.compare():
+            yield {
+                "type": "overlap",
+                "twins": twin_coverage.twins,
+                "overlap": twin_coverage.overlap
+            }
+            for schema_name, merge in needs_merging.items():
+                yield {
+                    "type": "merge",
+                    "schema": schema_name,
+                    "merge_with": merge["merge_with"],
+                    "fields": merge["fields"]
+                }
+
+    @classmethod
+    def write_json_lines(cls, first_network, second_network, output):
+        """ Compares two networks and writes the records of iter_records as JSON lines, each
+        one flushed as soon as it is computed
+
+        :param first_network: the first network to compare from, or the path of a snapshot
+        :param second_network: the second network to compare against, or the path of a snapshot
+        :param output: the path of the file to write, or a text file object (eg: a socket
+            wrapped with socket.makefile("w"))
+        :type output: str or file
+        :return: the number of records written
+        """
+        if isinstance(output, str):
+            with open(output, "w") as output_file:
+                return cls.write_json_lines(first_network, second_network, output_file)
+
+        written = 0
+        for record in cls.iter_records(first_network, second_network):
+            output.write(json.dumps(record, separators=(',', ':')) + "\n")
+            output.flush()
+            written += 1
+        return written
+
+    @staticmethod
+    def read_json_lines(records):
+        """ Builds the report of FullDiffGenerator (its json attribute) from the records written
+        by write_json_lines, eg: to give it to MergeEntityFromDiff. The overlaps are lists
+        instead of TwinCoverage tuples, as when the report is loaded from JSON.
+
+        :param records: the path of a JSON lines file, or an iterable of its lines
+        :type records: str or file
+        :return: the report
+        """
+        if isinstance(records, str):
+            with open(records) as records_file:
+                return FullDiffGenerator.read_json_lines(records_file)
+
+        report = {"overlaps": []}
+        for line in records:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record["type"] == "networks":
+                for network_name in ["network1", "network2"]:
+                    report[network_name] = {"name": record[network_name], "schemas": {},
+                                            "contexts": {}}
+            elif record["type"] == "schema":
+                report[record["network"]]["schemas"][record["name"]] = record["schema"]
+            elif record["type"] == "context":
+                report[record["network"]]["contexts"][record["name"]] = record["context"]
+            elif record["type"] == "labels":
+                report["labels"] = record["labels"]
+            elif record["type"] == "overlap":
+                report["overlaps"].append([record["twins"], record["overlap"]])
+            elif record["type"] == "merge":
+                report.setdefault("fields_to_merge", {})[record["schema"]] = {
+                    "fields": record["fields"],
+                    "merge_with": record["merge_with"]
+                }
+        return report
+
+    @staticmethod
+    def prepare_network(network, known_labels=None):
+        """ Resolves a network and its contexts and generates the labels of its terms. The
+        output can be saved with utils.snapshot.save_snapshot and given back as a path.
+
+        :param network: the network to prepare ('name', 'url' and 'regex' attributes), or the
+            path of a snapshot of prepared networks (the first one is used)
+        :type network: dict or str
+        :param known_labels: labels already generated, that don't need to be queried again
+        :type known_labels: dict
+        :return: the prepared network with its name, schemas, contexts and labels
+        """
+        if isinstance(network, str):
+            prepared_network = load_snapshot(network)[0]
+        else:
+            network_resolved = generate_context_mapping(network['url'], network['regex'])
+            prepared_network = {
+                "name": network['name'],
+                "schemas": network_resolved[1],
+                "contexts": load_context({'contexts': network_resolved[0]})
+            }
+
+        if 'labels' not in prepared_network:
+            prepared_network['labels'] = generate_labels_from_contexts(
+                prepared_network['contexts'], dict(known_labels or {}))
+        return prepared_network
@@ -1,9 +1,17 @@
 import copy
 import json
 import os
+import re
 from jsonschema.validators import Draft4Validator
 from semDiff.compareEntities import EntityCoverage
 from utils.schema2context import process_schema_name
+from utils.compile_schema import resolve_pointer
+from utils.schema_graph import SchemaGraph, iter_references, reference_target
+from utils.snapshot import load_snapshot
+
+# the $refs followed when adding a field or a schema to the merge: at its root, in its items
+# and in their allOf, anyOf or oneOf
+FOLLOWED_REFERENCES = re.compile(r'^(/items)?(/(allOf|anyOf|oneOf)/[0-9]+)?$')
 
 
 class EntityMerge:
@@ -41,16 +49,20 @@ class EntityMerge:
 class MergeEntityFromDiff:
     """ A class that merges network2 into network1 based on overlaps from FullDiff
 
-    :param overlaps: a variable containing
+    :param overlaps: a variable containing the output of FullDiffGenerator, or the path of a
+        snapshot of it
     """
 
     def __init__(self, overlaps):
+        if isinstance(overlaps, str):
+            overlaps = load_snapshot(overlaps)
         self.overlaps = overlaps["overlaps"]
         self.output = {
             "schemas": copy.deepcopy(overlaps["network1"]['schemas']),
             "contexts": copy.deepcopy(overlaps["network1"]['contexts'])
         }
         self.content = overlaps
+        self.network2_graph = SchemaGraph(overlaps["network2"]['schemas'])
         self.name_mapping = {}  # {"oldName":"newName"}
 
         self.output_name = \
@@ -168,114 +180,54 @@ class MergeEntityFromDiff:
         self.modify_references()
 
     def find_references(self, field):
-        """ Find $ref at root, in items or in allOf, anyOf, oneOf, adds the schema/context
-        to the merge and change reference names
+        """ Find the $ref of a field (at root, in items or in allOf, anyOf, oneOf) and adds the
+        referenced schemas to the merge
 
         :param field: a schema field
         :type field: dict
         :return:
         """
-        look_for = ["anyOf", "oneOf", "allOf"]
-
-        # $ref at root
-        if '$ref' in field:
-            sub_schema_name = field['$ref'].replace("#", '')
-            self.add_schema(sub_schema_name)
-
-        # $ref in anyOf, oneOf or allOf
-        for item in look_for:
-            if item in field:
-                for sub_item in field[item]:
-                    if '$ref' in sub_item:
-                        sub_schema_name = sub_item['$ref'].replace("#", '')
-                        self.add_schema(sub_schema_name)
-
-        # $ref in items
-        if 'items' in field:
-            if '$ref' in field['items']:
-                sub_schema_name = field['items']['$ref'].replace('#', '')
-                self.add_schema(sub_schema_name)
-
-            for item in look_for:
-                if item in field['items']:
-                    for sub_item in field['items'][item]:
-                        if '$ref' in sub_item:
-                            sub_schema_name = sub_item['$ref']
-                            self.add_schema(sub_schema_name)
+        for pointer, reference in iter_references(field):
+            if FOLLOWED_REFERENCES.match(pointer):
+                self.add_schema(reference_target(reference))
 
     def add_schema(self, schema_name):
-        """ Adds the schema to the merge
+        """ Adds the schema, and the schemas of network2 it references (see
+        FOLLOWED_REFERENCES), to the merge
 
         :param schema_name:
         :return:
         """
-        if schema_name not in self.name_mapping:
-            if schema_name is not None and schema_name not in self.output['schemas']:
-                schema_name = schema_name.replace("#", '')
+        pending = [schema_name]
+        while pending:
+            schema_name = pending.pop(0)
+            if schema_name is not None \
+                    and schema_name not in self.name_mapping \
+                    and schema_name not in self.output['schemas']:
                 self.output['schemas'][schema_name] = \
                     self.content['network2']['schemas'][schema_name]
-                """if schema_name in self.content['network2']['contexts']:
-                    self.output['contexts'][schema_name] = \
-                        self.content['network2']['contexts'][schema_name]"""
-                self.find_references(self.content['network2']['schemas'][schema_name])
+                pending.extend(reference.target for reference
+                               in self.network2_graph.references.get(schema_name, [])
+                               if FOLLOWED_REFERENCES.match(reference.pointer))
 
     def modify_references(self):
         """ Modify the $ref names
 
         :return:
         """
-        look_for = ["anyOf", "oneOf", "allOf"]
         delete_schemas = []
+        graph = SchemaGraph(self.output['schemas'])
 
-        for schema in self.output['schemas']:
+        for schema in graph.schemas:
 
             if schema in self.name_mapping:
                 delete_schemas.append(schema)
 
             else:
-                if 'properties' in self.output['schemas'][schema]:
-                    for item in self.output['schemas'][schema]['properties']:
-                        field = self.output['schemas'][schema]['properties'][item]
-
-                        if '$ref' in field:
-                            field_ref = field['$ref'].replace('#', '')
-                            if field_ref in self.name_mapping:
-                                self.output['schemas'][schema]['properties'][item]['$ref'] = \
-                                    self.name_mapping[field_ref] + '#'
-
-                        for reference in look_for:
-                            if reference in field:
-                                sub_item_iterator = 0
-                                for sub_item in field[reference]:
-                                    if '$ref' in sub_item:
-                                        field_ref = sub_item['$ref']
-                                        if field_ref in self.name_mapping:
-                                            self.output['schemas'][schema]['properties'][
-                                                reference][sub_item_iterator]['$ref'] = \
-                                                self.name_mapping[field_ref] + "#"
-                                    sub_item_iterator += 1
-
-                        if 'items' in field:
-
-                            if '$ref' in field['items']:
-                                field_ref = field['items']['$ref'].replace('#', '')
-                                if field_ref in self.name_mapping:
-                                    self.output['schemas'][
-                                        schema]['properties'][item]['items']['$ref'] = \
-                                        self.name_mapping[field_ref] + '#'
-
-                            for reference in look_for:
-                                if reference in field['items']:
-                                    sub_item_iterator = 0
-                                    for sub_item in field['items'][reference]:
-                                        if '$ref' in sub_item:
-                                            field_ref = sub_item['$ref']
-                                            if field_ref in self.name_mapping:
-                                                self.output['schemas'][schema]['properties'][
-                                                    reference]['items'][
-                                                    sub_item_iterator]['$ref'] = \
-                                                    self.name_mapping[field_ref] + "#"
-                                        sub_item_iterator += 1
+                for reference in graph.references[schema]:
+                    if reference.target in self.name_mapping:
+                        resolve_pointer(self.output['schemas'][schema], reference.pointer)[
+                            '$ref'] = self.name_mapping[reference.target] + '#'
 
         for schema in delete_schemas:
             del self.output['schemas'][schema]
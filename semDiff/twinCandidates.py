@@ -0,0 +1,184 @@
+import hashlib
+import random
+from semDiff.compareEntities import EntityCoverage
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+DEFAULT_PERMUTATIONS = 128
+DEFAULT_THRESHOLD = 0.5
+
+
+def hash_iri(iri):
+    """ A 32 bits hash of an IRI, stable between processes
+
+    :param iri: the IRI to hash
+    :return: an integer
+    """
+    return int.from_bytes(hashlib.sha1(iri.encode("utf-8")).digest()[:4], "big")
+
+
+def jaccard(first_iris, second_iris):
+    """ The exact Jaccard similarity of two sets of IRIs
+
+    :param first_iris: the first set (or dictionary keys view)
+    :param second_iris: the second set (or dictionary keys view)
+    :return: the size of their intersection divided by the size of their union
+    """
+    union = len(first_iris | second_iris)
+    return len(first_iris & second_iris) / union if union > 0 else 0.0
+
+
+def optimal_bands(threshold, num_permutations):
+    """ Chooses the number of LSH bands (and of rows per band) whose S-curve threshold,
+    (1 / bands) ** (1 / rows), is the closest to the given Jaccard threshold
+
+    :param threshold: the Jaccard similarity threshold
+    :param num_permutations: the number of MinHash permutations
+    :return: the number of bands and the number of rows per band
+    """
+    best = None
+    for bands in range(1, num_permutations + 1):
+        rows = num_permutations // bands
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class MinHashLSH:
+    """ MinHash sketches of sets of IRIs, bucketed by LSH bands: sets whose Jaccard similarity
+    is above the threshold share at least one bucket with a high probability.
+
+    :param threshold: the Jaccard similarity threshold used to choose the bands
+    :param num_permutations: the number of hash functions of the sketches
+    :param seed: the seed of the hash functions
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_permutations=DEFAULT_PERMUTATIONS,
+                 seed=1):
+        generator = random.Random(seed)
+        self.permutations = [(generator.randrange(1, MERSENNE_PRIME),
+                              generator.randrange(0, MERSENNE_PRIME))
+                             for _ in range(num_permutations)]
+        self.bands, self.rows = optimal_bands(threshold, num_permutations)
+        self.buckets = [{} for _ in range(self.bands)]
+        self.sketches = {}
+
+    def sketch(self, iris):
+        """ Computes the MinHash sketch of a set of IRIs
+
+        :param iris: the IRIs
+        :return: a tuple of num_permutations hash values
+        """
+        hashes = [hash_iri(iri) for iri in iris]
+        return tuple(min(((a * value + b) % MERSENNE_PRIME) & MAX_HASH for value in hashes)
+                     for a, b in self.permutations)
+
+    def add(self, key, iris):
+        """ Sketches a set of IRIs and adds it to the buckets of its bands
+
+        :param key: the key of the set
+        :param iris: the IRIs, a set must not be empty
+        :return: the sketch
+        """
+        sketch = self.sketch(iris)
+        self.sketches[key] = sketch
+        for band in range(self.bands):
+            band_values = sketch[band * self.rows:(band + 1) * self.rows]
+            self.buckets[band].setdefault(band_values, []).append(key)
+        return sketch
+
+    def similarity(self, first_key, second_key):
+        """ Estimates the Jaccard similarity of two sets from their sketches
+
+        :param first_key: the key of the first set
+        :param second_key: the key of the second set
+        :return: the estimated Jaccard similarity
+        """
+        first_sketch = self.sketches[first_key]
+        second_sketch = self.sketches[second_key]
+        equal = sum(1 for first, second in zip(first_sketch, second_sketch) if first == second)
+        return equal / len(first_sketch)
+
+    def candidate_pairs(self):
+        """ Lists the pairs of keys sharing at least one bucket
+
+        :return: a set of (first key, second key) pairs, in insertion order of the keys
+        """
+        order = dict((key, position) for position, key in enumerate(self.sketches))
+        pairs = set()
+        for band_buckets in self.buckets:
+            for keys in band_buckets.values():
+                for i, first_key in enumerate(keys):
+                    for second_key in keys[i + 1:]:
+                        if order[first_key] < order[second_key]:
+                            pairs.add((first_key, second_key))
+                        else:
+                            pairs.add((second_key, first_key))
+        return pairs
+
+
+class TwinCandidates:
+    """ An approximate generator of twin candidates between the entities of several networks
+    (eg: registries), that does not need their types to be equal. Each entity is described by
+    the set of the expanded IRIs of its fields, sketched with MinHash and bucketed with LSH. The
+    pairs of entities of different networks sharing a bucket are then filtered on the exact
+    Jaccard similarity of their IRIs, and can be scored with EntityCoverage (see score).
+
+    :param networks: a list of prepared networks (with their "schemas" and "contexts")
+    :param threshold: the Jaccard similarity threshold of the candidates
+    :param num_permutations: the number of MinHash permutations, more is more accurate
+    :param seed: the seed of the MinHash hash functions
+    """
+
+    def __init__(self, networks, threshold=DEFAULT_THRESHOLD,
+                 num_permutations=DEFAULT_PERMUTATIONS, seed=1):
+        self.networks = networks
+        self.threshold = threshold
+        self.lsh = MinHashLSH(threshold, num_permutations, seed)
+        self.fingerprints = {}
+
+        for network_position, network in enumerate(networks):
+            for schema_name in network["schemas"]:
+                if schema_name not in network["contexts"]:
+                    continue
+                entity = (network_position, schema_name)
+                self.fingerprints[entity] = EntityCoverage.fingerprint(
+                    network["schemas"][schema_name], self.context(entity))
+                if len(self.fingerprints[entity][0]) > 0:
+                    self.lsh.add(entity, self.fingerprints[entity][0].keys())
+
+        self.candidates = []
+        for first_entity, second_entity in self.lsh.candidate_pairs():
+            if first_entity[0] == second_entity[0]:
+                continue
+            similarity = jaccard(self.fingerprints[first_entity][0].keys(),
+                                 self.fingerprints[second_entity][0].keys())
+            if similarity >= threshold:
+                self.candidates.append((first_entity, second_entity, similarity))
+        self.candidates.sort()
+
+    def context(self, entity):
+        """ The context bound to an entity, in the form expected by EntityCoverage
+
+        :param entity: the (network position, schema name) of the entity
+        :return: the context
+        """
+        return {"@context": self.networks[entity[0]]["contexts"][entity[1]]}
+
+    def score(self):
+        """ Computes the exact coverage of each candidate with EntityCoverage
+
+        :return: a list of (first entity, second entity, similarity, full coverage)
+        """
+        output = []
+        for first_entity, second_entity, similarity in self.candidates:
+            coverage = EntityCoverage(self.networks[first_entity[0]]["schemas"][first_entity[1]],
+                                      self.context(first_entity),
+                                      self.networks[second_entity[0]]["schemas"][
+                                          second_entity[1]],
+                                      self.context(second_entity),
+                                      self.fingerprints[first_entity],
+                                      self.fingerprints[second_entity])
+            output.append((first_entity, second_entity, similarity, coverage.full_coverage))
+        return output
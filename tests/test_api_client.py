@@ -1,14 +1,18 @@
 import json
 import os
-from mock import patch
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from mock import patch, Mock
 from falcon import testing
 
 from api_client.client import (
     create_client,
+    stream_json,
     ClientBase,
     NetworkCompilerClient
 )
 from api_client.utility import StorageEngine
+from utils.compile_schema import resolve_schema_references, LazySchema
 
 
 class MockedRequest:
@@ -59,6 +63,157 @@ class APIAppTest(APIClientTestCase):
         self.assertEqual(result.json, doc)
         mock_api_patcher.stop()
 
+    def test_resolve_network_pointer(self):
+        mock_reference_patcher = patch("api_client.utility.resolve_reference")
+        mock_reference = mock_reference_patcher.start()
+        mock_reference.return_value = {
+            "id": "https://example.com/schema/main_schema.json",
+            "properties": {
+                "person": {"$ref": "person_schema.json#"},
+                "place": {"$ref": "place_schema.json#"}
+            }
+        }
+        network = {
+            "person_schema.json#": {
+                "id": "https://example.com/schema/person_schema.json",
+                "properties": {
+                    "name": {"type": "string"},
+                    "identifier": {"$ref": "identifier_schema.json#"}
+                }
+            },
+            "identifier_schema.json#": {
+                "id": "https://example.com/schema/identifier_schema.json",
+                "properties": {"value": {"type": "string"}}
+            }
+        }
+        mock_resolver_patcher = patch("utils.compile_schema.RefResolver.resolve")
+        mock_resolver = mock_resolver_patcher.start()
+        mock_resolver.side_effect = lambda reference: ["", network[reference]]
+
+        api_input = {"schema_url": "https://example.com/schema/main_schema.json",
+                     "pointer": "/properties/person/properties/identifier"}
+        result = self.simulate_get('/resolve_network', body=json.dumps(api_input))
+
+        self.assertEqual(result.json, {
+            "id": "https://example.com/schema/identifier_schema.json",
+            "properties": {"value": {"type": "string"}}
+        })
+        self.assertEqual([call[0][0] for call in mock_resolver.call_args_list],
+                         ["person_schema.json#", "identifier_schema.json#"])
+        mock_resolver_patcher.stop()
+        mock_reference_patcher.stop()
+
+    def test_resolve_network_bundle(self):
+        mock_api_patcher = patch("api_client.utility.resolve_schema_references")
+        mock_api = mock_api_patcher.start()
+        mock_api.return_value = {"definitions": {}}
+        mock_reference_patcher = patch("api_client.utility.resolve_reference")
+        mock_reference_patcher.start()
+
+        api_input = {"schema_url": "https://w3id.org/dats/schema/access_schema.json",
+                     "bundle": True}
+        result = self.simulate_get('/resolve_network', body=json.dumps(api_input))
+        self.simulate_get('/resolve_network', body=json.dumps(api_input))
+
+        self.assertEqual(result.json, {"definitions": {}})
+        self.assertEqual(mock_api.call_count, 1)
+        self.assertEqual(mock_api.call_args[1]["bundle"], True)
+        mock_reference_patcher.stop()
+        mock_api_patcher.stop()
+
+    def test_resolve_network_single_flight(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_resolver(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return {"id": "access_schema.json"}
+
+        db = StorageEngine()
+        api_input = {"schema_url": "https://w3id.org/dats/schema/access_schema.json"}
+        with patch("api_client.utility.resolve_schema_references",
+                   side_effect=slow_resolver) as mock_api, \
+                patch("api_client.utility.resolve_reference"):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                leader = pool.submit(db.resolve_network, api_input)
+                started.wait(5)
+                followers = [pool.submit(db.resolve_network, api_input) for i in range(3)]
+                release.set()
+                results = [leader.result()] + [follower.result() for follower in followers]
+
+            self.assertEqual(mock_api.call_count, 1)
+            self.assertTrue(all(result is results[0] for result in results))
+            self.assertEqual(db.in_flight, {})
+
+            mock_api.side_effect = ValueError("unreachable")
+            with self.assertRaises(ValueError):
+                db.cached_call("create_context", "key", mock_api)
+            self.assertEqual(db.in_flight, {})
+            self.assertEqual(db.cached_requests["create_context"], {})
+
+    def test_stream_json(self):
+        value = {"schemas": [{"name": "schema_%s" % i} for i in range(100)]}
+        chunks = list(stream_json(value, chunk_size=256))
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual(b''.join(chunks).decode('utf-8'), json.dumps(value, indent=4))
+        self.assertEqual(b''.join(stream_json(value, compact=True)).decode('utf-8'),
+                         json.dumps(value, separators=(',', ':')))
+
+    def test_stream_json_lazy_schema(self):
+        network = {"person_schema.json#": {"id": "https://example.com/person_schema.json",
+                                           "properties": {"name": {"type": "string"}}}}
+        with patch("utils.compile_schema.RefResolver.resolve",
+                   side_effect=lambda reference: ["", network[reference]]):
+            lazy_schema = resolve_schema_references(
+                {"properties": {"person": {"$ref": "person_schema.json#"}}}, {},
+                "https://example.com/main_schema.json", lazy=True)
+            chunks = b''.join(stream_json(lazy_schema, compact=True)).decode('utf-8')
+        self.assertEqual(json.loads(chunks), {"properties": {"person": {
+            "id": "https://example.com/person_schema.json",
+            "properties": {"name": {"type": "string"}}}}})
+
+    def test_resolve_network_compact(self):
+        mock_api_patcher = patch("api_client.utility.resolve_schema_references")
+        mock_api = mock_api_patcher.start()
+        mock_api.return_value = {"properties": {"name": {"type": "string"}}}
+        mock_reference_patcher = patch("api_client.utility.resolve_reference")
+        mock_reference_patcher.start()
+
+        api_input = {"schema_url": "https://w3id.org/dats/schema/access_schema.json"}
+        result = self.simulate_get('/resolve_network', body=json.dumps(api_input),
+                                   query_string="compact=true")
+        self.assertEqual(result.text, '{"properties":{"name":{"type":"string"}}}')
+
+        result = self.simulate_get('/resolve_network', body=json.dumps(api_input))
+        self.assertEqual(result.text, json.dumps(mock_api.return_value, indent=4))
+        mock_reference_patcher.stop()
+        mock_api_patcher.stop()
+
+    def test_set_response_lazy_error(self):
+        resolver = Mock()
+        resolver.resolve.side_effect = ValueError("unreachable schema")
+        network = {"name": "network", "schema": LazySchema({"$ref": "missing.json#"}, resolver)}
+        api_input = {"schema_url": "https://w3id.org/dats/schema/access_schema.json"}
+
+        with patch("api_client.utility.StorageEngine.resolve_network", return_value=network):
+            result = self.simulate_get('/resolve_network', body=json.dumps(api_input))
+        self.assertEqual(result.status_code, 500)
+        self.assertEqual(resolver.resolve.call_count, 1)
+
+        resolver.resolve.side_effect = None
+        resolver.resolve.return_value = ["", {"type": "string"}]
+        with patch("api_client.utility.StorageEngine.resolve_network", return_value=network):
+            result = self.simulate_get('/resolve_network', body=json.dumps(api_input))
+        self.assertEqual(result.status_code, 201)
+        self.assertEqual(result.json, {"name": "network", "schema": {"type": "string"}})
+
+    def test_merge_entities_format(self):
+        merge = {"mergedSchema": {"id": "merged_schema.json"}, "mergedContext": {}}
+        with patch("api_client.utility.StorageEngine.merge_entities", return_value=merge):
+            result = self.simulate_get("/merge", body=json.dumps({}))
+        self.assertEqual(result.text, json.dumps(merge))
+
     def test_create_context(self):
         mock_api_patcher = patch("api_client.utility.resolve_network")
         mock_api = mock_api_patcher.start()
@@ -161,7 +316,7 @@ class APIAppTest(APIClientTestCase):
 
     def test_schema_validator(self):
 
-        mock_request_patcher = patch("api_client.utility.requests.get")
+        mock_request_patcher = patch('utils.transport.get')
         mock_request = mock_request_patcher.start()
 
         class MockedRequest:
@@ -195,7 +350,7 @@ class APIAppTest(APIClientTestCase):
             MockedRequest({"abc": "def"}, 200),
             MockedRequest({"cde": "123"}, 200)
         ]
-        mock_request_patcher = patch("api_client.utility.requests.get", side_effect=side_effect)
+        mock_request_patcher = patch('utils.transport.get', side_effect=side_effect)
         mock_request_patcher.start()
         result = self.simulate_get('/validate/instance', body=json.dumps(user_input))
         self.assertTrue(result.json == "Your json is valid")
@@ -206,7 +361,7 @@ class APIAppTest(APIClientTestCase):
             MockedRequest({"abc": "def"}, 400),
             MockedRequest({"cde": "123"}, 200)
         ]
-        mock_request_patcher = patch("api_client.utility.requests.get",
+        mock_request_patcher = patch('utils.transport.get',
                                      side_effect=side_effect_error)
         mock_request_patcher.start()
         result_error = self.simulate_get('/validate/instance', body=json.dumps(user_input))
@@ -221,7 +376,7 @@ class APIAppTest(APIClientTestCase):
             MockedRequest({"abc": "def"}, 200),
             MockedRequest({"cde": "123"}, 400)
         ]
-        mock_request_patcher = patch("api_client.utility.requests.get",
+        mock_request_patcher = patch('utils.transport.get',
                                      side_effect=side_effect_error_2)
         mock_request_patcher.start()
         result_error = self.simulate_get('/validate/instance', body=json.dumps(user_input))
@@ -236,7 +391,7 @@ class APIAppTest(APIClientTestCase):
             MockedRequest("abc", 200),
             MockedRequest({"cde": "123"}, 200)
         ]
-        mock_request_patcher = patch("api_client.utility.requests.get",
+        mock_request_patcher = patch('utils.transport.get',
                                      side_effect=side_effect_error_3)
         mock_request_patcher.start()
         result_error = self.simulate_get('/validate/instance', body=json.dumps(user_input))
@@ -420,7 +575,7 @@ class APIAppTest(APIClientTestCase):
             }
         }
 
-        mock_request_patcher = patch("api_client.utility.requests.get", side_effect=side_effect)
+        mock_request_patcher = patch('utils.transport.get', side_effect=side_effect)
         mock_request_patcher.start()
         result = self.simulate_get("/merge", body=json.dumps(user_input))
         self.assertTrue(result.json == expected_output)
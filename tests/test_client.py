@@ -21,7 +21,7 @@ class TestClient(object):
     @classmethod
     def setup_class(cls):
         cls.client = CEDARClient()
-        cls.mock_request_patcher = patch('cedar.client.requests.request')
+        cls.mock_request_patcher = patch('utils.transport.request')
         cls.mock_request = cls.mock_request_patcher.start()
 
     @classmethod
@@ -1,6 +1,8 @@
 import unittest
 import os
 import json
+from copy import deepcopy
+from types import MappingProxyType
 from semDiff.compareEntities import EntityCoverage
 
 
@@ -102,3 +104,32 @@ class SemDiffTestCase(unittest.TestCase):
             _EntityCoverage__compute_context_coverage(comparator3[0], comparator1[0])
         self.assertTrue(coverage3[0][0] == 0)
         self.assertTrue(coverage3[0][1] == 0)
+
+    def test_read_only_inputs(self):
+        def freeze(value):
+            if isinstance(value, dict):
+                return MappingProxyType(dict((key, freeze(val)) for key, val in value.items()))
+            if isinstance(value, list):
+                return tuple(freeze(val) for val in value)
+            return value
+
+        inputs = [self.schema_1, self.context_1, self.schema_2, self.context_2]
+        originals = deepcopy(inputs)
+        comparator = EntityCoverage(*[freeze(value) for value in inputs])
+        self.assertEqual(comparator.full_coverage, self.semantic_comparator.full_coverage)
+        self.assertEqual(comparator.unmatched_with_sem,
+                         self.semantic_comparator.unmatched_with_sem)
+
+        EntityCoverage(*inputs)
+        self.assertEqual(inputs, originals)
+
+    def test_modified_context(self):
+        schema = {"properties": {"name": {"type": "string"}}}
+        context = {"@context": {"sdo": "https://schema.org/", "name": "sdo:name"}}
+        self.assertEqual(EntityCoverage.fingerprint(schema, context)[0],
+                         {"https://schema.org/name": ["name"]})
+
+        # the prefixes of a context are not remembered between fingerprints
+        context["@context"]["sdo"] = "http://schema.org/"
+        self.assertEqual(EntityCoverage.fingerprint(schema, context)[0],
+                         {"http://schema.org/name": ["name"]})
@@ -63,7 +63,7 @@ class EntityCoverageTestCase(unittest.TestCase):
         self.assertTrue('Identifier_info' in processed_network.keys())
         self.assertTrue(processed_network['Identifier_info'] is None)
         self.assertTrue('Person' in processed_network.keys())
-        self.assertTrue(processed_network['Person'] == 'sdo:Person')
+        self.assertTrue(processed_network['Person'] == 'https://schema.org/Person')
 
     def test___compute_coverage(self):
         DATS_network = self.semantic_comparator._NetworkCoverage__process_network(DATS_data)
@@ -77,3 +77,15 @@ class EntityCoverageTestCase(unittest.TestCase):
         self.assertTrue(coverage[0]['Person'] == ['Source'])
         self.assertTrue(coverage[1] == 2)
         self.assertTrue(coverage[2] == 1)
+
+    def test___compute_coverage_shared_types(self):
+        network_a = {"Person": "sdo:Person", "Author": "sdo:Person", "Empty": "sdo:",
+                     "Thing": None, "Dataset": "https://schema.org/Dataset"}
+        network_b = {"Source": "sdo:Person", "Other": None, "Empty": "sdo:",
+                     "Dataset": "https://schema.org/Dataset", "Contact": "sdo:Person"}
+        coverage = self.semantic_comparator._NetworkCoverage__compute_coverage(network_a,
+                                                                               network_b)
+        self.assertEqual(coverage[0], {"Person": ["Source", "Contact"], "Author": None,
+                                       "Empty": None, "Thing": None, "Dataset": ["Dataset"]})
+        self.assertEqual(coverage[1], 5)
+        self.assertEqual(coverage[2], 2)
@@ -1,6 +1,7 @@
 from collections import OrderedDict
 from nose.tools import eq_
 from mock import patch
+from jsonschema import Draft4Validator, RefResolver
 from utils import compile_schema
 import os
 import json
@@ -46,6 +47,7 @@ class TestCaseSchemaCompiler(object):
         eq_(tested_output.definitions, "definitions")
         eq_(tested_output.pattern_properties, "patternProperties")
         eq_(tested_output.sub_patterns, ['anyOf', 'oneOf', 'allOf'])
+        eq_(tested_output.ids, ['id', '$id'])
 
     def test_resolve_schema_references(self):
 
@@ -75,3 +77,218 @@ class TestCaseSchemaCompiler(object):
 
         output_json = self.compiler.resolve_schema_references(schema, loaded_schemas, "123")
         eq_(output_json, expected_output)
+
+    def test_resolve_schema_references_deep_network(self):
+        network = {}
+        for i in range(3000):
+            network["chain_%s.json#" % i] = {
+                "id": "schemas/chain_%s.json" % i,
+                "properties": {
+                    "next": {"$ref": "chain_%s.json#" % (i + 1)},
+                    "first": {"$ref": "chain_0.json#"}
+                }
+            }
+        network["chain_3000.json#"] = {"id": "schemas/chain_3000.json", "type": "string"}
+        self.mock_resolver.side_effect = lambda reference: ["", network[reference]]
+
+        loaded_schemas = {}
+        output_json = self.compiler.resolve_schema_references({"$ref": "chain_0.json#"},
+                                                              loaded_schemas)
+        self.mock_resolver.side_effect = None
+
+        eq_(len(loaded_schemas), 3001)
+        eq_(output_json["properties"]["first"], {"$ref": "#"})
+        eq_(output_json["properties"]["next"]["properties"]["first"], {"$ref": "#"})
+        eq_(loaded_schemas["chain_2.json"], "#/properties/next/properties/next")
+
+        # the resolved documents are left untouched
+        eq_(network["chain_0.json#"]["properties"]["next"], {"$ref": "chain_1.json#"})
+
+    def test_lazy_schema(self):
+        network = {
+            "second_test.json#": {
+                "id": "schemas/second_test.json",
+                "properties": {
+                    "name": {"type": "string"},
+                    "third": {"$ref": "third_test.json#"}
+                }
+            },
+            "third_test.json#": {
+                "id": "schemas/third_test.json",
+                "properties": {"second": {"$ref": "second_test.json#"}}
+            }
+        }
+        self.mock_resolver.side_effect = lambda reference: ["", network[reference]]
+        self.mock_resolver.reset_mock()
+
+        schema = {
+            "id": "schemas/test.json",
+            "properties": {
+                "field_1": {"description": "first field", "$ref": "second_test.json#"},
+                "field_2": {"anyOf": [{"$ref": "third_test.json#"}, {"type": "string"}]}
+            }
+        }
+        lazy_schema = self.compiler.resolve_schema_references(schema, {}, lazy=True)
+        eq_(self.mock_resolver.call_count, 0)
+
+        field_1 = lazy_schema["properties"]["field_1"]
+        eq_(field_1["description"], "first field")
+        eq_(field_1["properties"]["name"], {"type": "string"})
+        eq_(sorted(field_1.keys()), ["description", "id", "properties"])
+        eq_(self.mock_resolver.call_count, 1)
+
+        # memoized
+        eq_(lazy_schema["properties"]["field_1"] is field_1, True)
+        eq_(self.mock_resolver.call_count, 1)
+
+        eq_(self.compiler.resolve_pointer(lazy_schema, "/properties/field_2/anyOf/1"),
+            {"type": "string"})
+        eq_(self.mock_resolver.call_count, 1)
+
+        # circular references are only followed on access
+        cycle = field_1["properties"]["third"]["properties"]["second"]["properties"]["third"]
+        eq_(cycle["id"], "schemas/third_test.json")
+
+        eq_(field_1["properties"]["third"].resolve({"test.json": "#"}), {
+            "id": "schemas/third_test.json",
+            "properties": {
+                "second": {
+                    "id": "schemas/second_test.json",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "third": {"$ref": "#"}
+                    }
+                }
+            }
+        })
+        eq_(network["third_test.json#"]["properties"]["second"], {"$ref": "second_test.json#"})
+
+        # lazy views are serialized through resolve()
+        try:
+            json.dumps(field_1)
+            raise AssertionError("a lazy view is not a dict")
+        except TypeError:
+            pass
+        eq_(json.loads(json.dumps(field_1, default=self.compiler.json_default)),
+            json.loads(json.dumps(field_1.resolve())))
+        eq_(json.loads(json.dumps(lazy_schema["properties"]["field_2"]["anyOf"],
+                                  default=self.compiler.json_default))[1], {"type": "string"})
+        self.mock_resolver.side_effect = None
+
+    def test_lazy_schema_root_cycle(self):
+        schema = {
+            "id": "https://example.com/test.json",
+            "properties": {
+                "name": {"type": "string"},
+                "parent": {"$ref": "test.json#"}
+            }
+        }
+        self.mock_resolver.side_effect = lambda reference: ["", schema]
+
+        lazy_schema = self.compiler.resolve_schema_references(schema, {}, lazy=True)
+        eq_(json.loads(json.dumps(lazy_schema, default=self.compiler.json_default)), {
+            "id": "https://example.com/test.json",
+            "properties": {
+                "name": {"type": "string"},
+                "parent": {"$ref": "#"}
+            }
+        })
+        eq_(schema["properties"]["parent"], {"$ref": "test.json#"})
+        self.mock_resolver.side_effect = None
+
+    def test_bundle_schema_references(self):
+        network = {
+            "https://example.com/second_test.json": {
+                "id": "https://example.com/second_test.json",
+                "properties": {
+                    "name": {"$ref": "#/definitions/name"},
+                    "third": {"$ref": "third_test.json#"}
+                },
+                "definitions": {"name": {"type": "string"}}
+            },
+            "https://example.com/third_test.json": {
+                "id": "https://example.com/third_test.json",
+                "properties": {
+                    "second": {"$ref": "second_test.json#/definitions/name"},
+                    "root": {"$ref": "test.json#"}
+                }
+            }
+        }
+        self.mock_resolver.side_effect = lambda reference: ["", network[reference]]
+
+        schema = {
+            "id": "https://example.com/test.json",
+            "properties": {
+                "field_1": {"$ref": "second_test.json#"},
+                "field_2": {"items": {"$ref": "third_test.json#"}}
+            }
+        }
+        loaded_schemas = {"test.json": "#"}
+        output_json = self.compiler.resolve_schema_references(
+            schema, loaded_schemas, "https://example.com/test.json", bundle=True)
+        self.mock_resolver.side_effect = None
+
+        eq_(output_json, {
+            "id": "https://example.com/test.json",
+            "properties": {
+                "field_1": {"$ref": "#/definitions/second_test.json"},
+                "field_2": {"items": {"$ref": "#/definitions/third_test.json"}}
+            },
+            "definitions": {
+                "second_test.json": {
+                    "properties": {
+                        "name": {"$ref": "#/definitions/second_test.json/definitions/name"},
+                        "third": {"$ref": "#/definitions/third_test.json"}
+                    },
+                    "definitions": {"name": {"type": "string"}}
+                },
+                "third_test.json": {
+                    "properties": {
+                        "second": {"$ref": "#/definitions/second_test.json/definitions/name"},
+                        "root": {"$ref": "#"}
+                    }
+                }
+            }
+        })
+        eq_(loaded_schemas["third_test.json"], "#/definitions/third_test.json")
+
+        # the resolved documents are left untouched
+        eq_(network["https://example.com/third_test.json"]["properties"]["root"],
+            {"$ref": "test.json#"})
+
+
+class TestCaseBundleValidation(object):
+
+    def test_bundle_is_self_contained(self):
+        network = {
+            "https://example.com/child_schema.json": {
+                "id": "https://example.com/child_schema.json",
+                "properties": {
+                    "name": {"$ref": "#/definitions/name"},
+                    "grandchild": {"$ref": "grandchild_schema.json#"}
+                },
+                "definitions": {"name": {"type": "string"}}
+            },
+            "https://example.com/grandchild_schema.json": {
+                "id": "https://example.com/grandchild_schema.json",
+                "properties": {"value": {"$ref": "#/definitions/value"}},
+                "definitions": {"value": {"type": "integer"}}
+            }
+        }
+        schema = {
+            "id": "https://example.com/root_schema.json",
+            "properties": {"child": {"$ref": "child_schema.json#"}}
+        }
+        bundle = compile_schema.resolve_schema_references(
+            schema, {"root_schema.json": "#"}, schema["id"], refs=dict(network), bundle=True)
+        bundle = json.loads(json.dumps(bundle))
+
+        with patch('jsonschema.validators.RefResolver.resolve_remote',
+                   side_effect=AssertionError("network access")) as mock_remote:
+            validator = Draft4Validator(
+                bundle, resolver=RefResolver.from_schema(bundle, id_of=Draft4Validator.ID_OF))
+            valid = {"child": {"name": "a", "grandchild": {"value": 1}}}
+            invalid = {"child": {"name": 1, "grandchild": {"value": "a"}}}
+            eq_(list(validator.iter_errors(valid)), [])
+            eq_(len(list(validator.iter_errors(invalid))), 2)
+            eq_(mock_remote.call_count, 0)
@@ -0,0 +1,46 @@
+import json
+import os
+import unittest
+from semDiff.compareEntities import EntityCoverage
+from semDiff.coverageMatrix import CoverageMatrix
+
+
+class CoverageMatrixTestCase(unittest.TestCase):
+
+    def setUp(self):
+        data_path = os.path.join(os.path.dirname(__file__), "data")
+        with open(os.path.join(data_path, "full_dats_miaca.json")) as input_file:
+            self.networks = json.load(input_file)
+        self.matrix = CoverageMatrix(self.networks)
+
+    def test_incidence_matrix(self):
+        self.assertEqual(len(self.matrix.entities), 7)
+        person = self.matrix.rows[self.matrix.positions[(0, "person_schema.json")]]
+        self.assertEqual(sum(person.values()), 7)
+        for column, rows in enumerate(self.matrix.columns):
+            for row in rows:
+                self.assertTrue(column in self.matrix.rows[row])
+
+    def test_coverage(self):
+        for first_entity in self.matrix.entities:
+            for second_entity in self.matrix.entities:
+                if first_entity[0] == second_entity[0]:
+                    continue
+                first_network = self.networks[first_entity[0]]
+                second_network = self.networks[second_entity[0]]
+                entity_coverage = EntityCoverage(
+                    first_network["schemas"][first_entity[1]],
+                    {"@context": first_network["contexts"][first_entity[1]]},
+                    second_network["schemas"][second_entity[1]],
+                    {"@context": second_network["contexts"][second_entity[1]]})
+                self.assertEqual(self.matrix.coverage(first_entity, second_entity),
+                                 entity_coverage.full_coverage["coverage"])
+
+    def test_network_coverage(self):
+        coverage = self.matrix.network_coverage(0, 1)
+        self.assertEqual(len(coverage), 4)
+        person = coverage[("person_schema.json", "source_schema.json")]
+        self.assertEqual(person.relative_coverage, "57.14")
+        self.assertEqual(person.absolute_coverage.overlap_number, "4")
+        self.assertEqual(person.absolute_coverage.total_fields, "7")
+        self.assertEqual(self.matrix.network_coverage(1, 1), {})
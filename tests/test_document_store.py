@@ -0,0 +1,101 @@
+import json
+import os
+import unittest
+from mock import patch
+from jsonschema.validators import RefResolver
+from utils import document_store
+
+
+class MockedResponse:
+
+    def __init__(self, body):
+        self.text = json.dumps(body)
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class DocumentStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.store = document_store.configure_document_store(max_documents=2)
+
+    def tearDown(self):
+        document_store.configure_document_store()
+
+    def test_store(self):
+        self.store["https://example.com/a.json#"] = {"id": "a"}
+        self.assertEqual(self.store["HTTPS://example.com/a.json"], {"id": "a"})
+        self.assertTrue("https://example.com/a.json" in self.store)
+        self.assertEqual(len(self.store), 1)
+        del self.store["https://example.com/a.json"]
+        self.assertEqual(len(self.store), 0)
+
+    def test_eviction(self):
+        self.store["https://example.com/a.json"] = {"id": "a"}
+        self.store["https://example.com/b.json"] = {"id": "b"}
+        self.store["https://example.com/a.json"]
+        self.store["https://example.com/c.json"] = {"id": "c"}
+        self.assertEqual(sorted(self.store), ["https://example.com/a.json",
+                                              "https://example.com/c.json"])
+        self.assertEqual(self.store.stats()["evictions"], 1)
+
+    def test_get_or_load(self):
+        loaded = []
+
+        def loader(uri):
+            loaded.append(uri)
+            return {"id": uri}
+
+        first = self.store.get_or_load("https://example.com/a.json", loader)
+        second = self.store.get_or_load("https://example.com/a.json#", loader)
+        self.assertTrue(first is second)
+        self.assertEqual(loaded, ["https://example.com/a.json"])
+        self.assertEqual(self.store.stats(), {"hits": 1, "misses": 1,
+                                              "evictions": 0, "documents": 1})
+        self.store.clear()
+        self.assertEqual(self.store.stats()["documents"], 0)
+
+    @patch('utils.document_store.time')
+    @patch('utils.transport.get')
+    def test_ttl(self, mock_request, mock_time):
+        store = document_store.configure_document_store(ttl=60)
+        mock_request.return_value = MockedResponse({"id": "https://example.com/a.json",
+                                                    "version": 1})
+        mock_time.time.return_value = 1000
+        handler = document_store.resolver_handlers()["https"]
+        self.assertEqual(handler("https://example.com/a.json")["version"], 1)
+
+        mock_request.return_value = MockedResponse({"id": "https://example.com/a.json",
+                                                    "version": 2})
+        mock_time.time.return_value = 1059
+        self.assertEqual(handler("https://example.com/a.json")["version"], 1)
+        mock_time.time.return_value = 1060
+        self.assertEqual(handler("https://example.com/a.json")["version"], 2)
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertEqual(store.stats()["documents"], 1)
+
+    def test_get_document_store(self):
+        self.assertTrue(document_store.get_document_store() is self.store)
+
+        document_store._store = None
+        with patch.dict(os.environ, {document_store.TTL_VARIABLE: "300"}):
+            self.assertEqual(document_store.get_document_store().ttl, 300)
+
+    @patch('utils.transport.get')
+    def test_resolver_handlers(self, mock_request):
+        mock_request.return_value = MockedResponse({"id": "https://example.com/b.json",
+                                                    "type": "string"})
+        schema = {"id": "https://example.com/a.json"}
+
+        for _ in range(3):
+            resolver = RefResolver("https://example.com/a.json", schema, store={},
+                                   handlers=document_store.resolver_handlers())
+            self.assertEqual(resolver.resolve("b.json#")[1]["type"], "string")
+        self.assertEqual(mock_request.call_count, 1)
+
+        schema_path = os.path.join(os.path.dirname(__file__), "data", "person_schema.json")
+        handler = document_store.resolver_handlers()["file"]
+        document = handler("file://" + schema_path)
+        self.assertEqual(document["id"], "https://w3id.org/dats/schema/person_schema.json")
+        self.assertTrue(handler("file://" + schema_path) is document)
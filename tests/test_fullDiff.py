@@ -1,9 +1,15 @@
 import unittest
+import io
 import json
 import os
+import tempfile
 from collections import OrderedDict
 from mock import patch
-from semDiff.fullDiff import FullSemDiff, FullSemDiffMultiple, FullDiffGenerator
+from semDiff.fullDiff import FullSemDiff, FullSemDiffMultiple, FullDiffGenerator, compare_networks
+from semDiff.compareEntities import EntityCoverage
+from semDiff.mergeEntities import MergeEntityFromDiff
+from utils.snapshot import save_snapshot
+from utils.iri_expander import IRIExpander
 
 DATS_contexts = {
     "person_schema.json": {
@@ -186,6 +192,68 @@ class FellSemDiffMultipleTestCase(unittest.TestCase):
         self.assertTrue(len(self.full_diff.output[1][0]) == 0)
         self.assertTrue(len(self.full_diff.output) == 2)
 
+    def test_fingerprints(self):
+        data_path = os.path.join(os.path.dirname(__file__), "data/")
+        with open(os.path.join(data_path, "full_dats_miaca.json")) as input_file:
+            dats, miaca = json.load(input_file)
+        networks = [dats, miaca, dict(dats, name="DATS copy")]
+
+        fingerprint = EntityCoverage.fingerprint
+        with patch.object(EntityCoverage, 'fingerprint', side_effect=fingerprint) as mock_print:
+            full_diff = FullSemDiffMultiple(networks, max_workers=1)
+
+        fingerprinted = set()
+        for network_fingerprints, network in zip(full_diff.fingerprints, networks):
+            for schema_name in network_fingerprints:
+                fingerprinted.add((network["name"], schema_name))
+        self.assertEqual(mock_print.call_count, len(fingerprinted))
+        self.assertTrue(mock_print.call_count > 0)
+
+        expected_output = [FullSemDiff([networks[0]["contexts"], networks[1]["contexts"]],
+                                       networks[0]["schemas"], networks[1]["schemas"]).twins,
+                           FullSemDiff([networks[0]["contexts"], networks[2]["contexts"]],
+                                       networks[0]["schemas"], networks[2]["schemas"]).twins]
+        self.assertEqual(full_diff.output[0], expected_output)
+
+    def test_expanders(self):
+        data_path = os.path.join(os.path.dirname(__file__), "data/")
+        with open(os.path.join(data_path, "full_dats_miaca.json")) as input_file:
+            networks = json.load(input_file)
+        fingerprints = [{}, {}]
+        expanders = [{}, {}]
+
+        with patch('utils.iri_expander.IRIExpander', side_effect=IRIExpander) as mock_expander:
+            first_output = compare_networks(networks, fingerprints, 0, 1, expanders)
+            compiled = mock_expander.call_count
+            for _ in range(3):
+                self.assertEqual(compare_networks(networks, fingerprints, 0, 1, expanders),
+                                 first_output)
+        self.assertEqual(mock_expander.call_count, compiled)
+        self.assertEqual(compiled, len(expanders[0]) + len(expanders[1]))
+        self.assertTrue(0 < len(expanders[0]) <= len(networks[0]["contexts"]))
+        self.assertEqual(first_output, compare_networks(networks, [{}, {}], 0, 1))
+
+    def test_parallel_pairs(self):
+        data_path = os.path.join(os.path.dirname(__file__), "data/")
+        with open(os.path.join(data_path, "full_dats_miaca.json")) as input_file:
+            dats, miaca = json.load(input_file)
+        networks = [dats, miaca, dict(dats, name="DATS copy"), dict(miaca, name="MIACA copy")]
+
+        with patch('semDiff.fullDiff.ProcessPoolExecutor') as mock_pool:
+            full_diff = FullSemDiffMultiple(networks)
+            self.assertEqual(mock_pool.call_count, 0)
+        parallel_diff = FullSemDiffMultiple(networks, max_workers=2)
+        self.assertEqual([len(overlaps) for overlaps in full_diff.output], [3, 2, 1])
+        self.assertEqual(parallel_diff.output, full_diff.output)
+        self.assertEqual(parallel_diff.ready_for_merge, full_diff.ready_for_merge)
+        self.assertEqual(full_diff.output[0][0][0].twins.first_entity, "Person")
+
+        with patch('semDiff.fullDiff.ProcessPoolExecutor') as mock_pool:
+            mock_pool.return_value.__enter__.return_value.map.return_value = \
+                [([], {})] * 6
+            FullSemDiffMultiple(networks, max_workers=2)
+        self.assertEqual(mock_pool.call_args[1]["mp_context"].get_start_method(), "spawn")
+
 
 class FullDiffGeneratorTestCase(unittest.TestCase):
 
@@ -300,3 +368,71 @@ class FullDiffGeneratorTestCase(unittest.TestCase):
                         .first_field ==
                         report.json["overlaps"][0].overlap['overlapping fields'][0]
                         .second_field)
+
+    def test_write_json_lines(self):
+        data_path = os.path.join(os.path.dirname(__file__), "data/")
+        with open(os.path.join(data_path, "full_dats_miaca.json")) as input_file:
+            dats, miaca = json.load(input_file)
+        labels = {"sdo:identifier": "identifier"}
+
+        with tempfile.TemporaryDirectory() as directory, \
+                patch('semDiff.fullDiff.generate_labels_from_contexts',
+                      return_value=labels):
+            snapshots = [os.path.join(directory, "dats.snap"),
+                         os.path.join(directory, "miaca.snap")]
+            save_snapshot(snapshots[0], [dats])
+            save_snapshot(snapshots[1], [miaca])
+            report = FullDiffGenerator(snapshots[0], snapshots[1])
+
+            output = io.StringIO()
+            written = FullDiffGenerator.write_json_lines(snapshots[0], snapshots[1], output)
+            output_path = os.path.join(directory, "report.jsonl")
+            FullDiffGenerator.write_json_lines(snapshots[0], snapshots[1], output_path)
+            with open(output_path) as output_file:
+                self.assertEqual(output_file.read(), output.getvalue())
+
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(len(records), written)
+        self.assertEqual(records[0], {"type": "networks", "network1": dats["name"],
+                                      "network2": miaca["name"]})
+        self.assertEqual([record for record in records if record["type"] == "labels"],
+                         [{"type": "labels", "labels": labels}])
+        self.assertEqual(len([record for record in records if record["type"] == "schema"]),
+                         len(dats["schemas"]) + len(miaca["schemas"]))
+
+        overlaps = [[record["twins"], record["overlap"]] for record in records
+                    if record["type"] == "overlap"]
+        self.assertEqual(overlaps, json.loads(json.dumps(report.json["overlaps"])))
+        self.assertTrue(len(overlaps) > 0)
+
+        fields_to_merge = {}
+        for record in records:
+            if record["type"] == "merge":
+                fields_to_merge[record["schema"]] = {"fields": record["fields"],
+                                                     "merge_with": record["merge_with"]}
+        self.assertEqual(fields_to_merge, report.json.get("fields_to_merge", {}))
+        self.assertTrue(len(fields_to_merge) > 0)
+
+        self.assertEqual(FullDiffGenerator.read_json_lines(output.getvalue().splitlines()),
+                         json.loads(json.dumps(report.json)))
+
+    def test_json_lines_merge(self):
+        with open(os.path.join(os.path.dirname(__file__), "fullDiffOutput",
+                               "overlap_example.json")) as input_file:
+            example = json.load(input_file)
+
+        with tempfile.TemporaryDirectory() as directory, \
+                patch('semDiff.fullDiff.generate_labels_from_contexts', return_value={}):
+            snapshots = []
+            for network_name in ["network1", "network2"]:
+                snapshots.append(os.path.join(directory, network_name + ".snap"))
+                save_snapshot(snapshots[-1], [example[network_name]])
+            report = FullDiffGenerator(snapshots[0], snapshots[1]).json
+
+            output_path = os.path.join(directory, "report.jsonl")
+            FullDiffGenerator.write_json_lines(snapshots[0], snapshots[1], output_path)
+            streamed_report = FullDiffGenerator.read_json_lines(output_path)
+
+        self.assertTrue(len(streamed_report["fields_to_merge"]) > 0)
+        self.assertEqual(MergeEntityFromDiff(streamed_report).output,
+                         MergeEntityFromDiff(json.loads(json.dumps(report))).output)
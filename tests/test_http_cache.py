@@ -0,0 +1,164 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+from utils import http_cache
+
+
+class MockedResponse:
+
+    def __init__(self, body, status_code=200, headers=None):
+        self.content = json.dumps(body).encode("utf-8")
+        self.text = self.content.decode("utf-8")
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.encoding = "utf-8"
+
+
+class HTTPCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.mock_request_patcher = patch('utils.transport.get')
+        self.mock_request = self.mock_request_patcher.start()
+
+    def tearDown(self):
+        self.mock_request_patcher.stop()
+        http_cache.disable_cache()
+        shutil.rmtree(self.directory)
+
+    def test_canonical_url(self):
+        self.assertEqual(http_cache.canonical_url("HTTPS://W3ID.org:443/dats/a.json#"),
+                         "https://w3id.org/dats/a.json")
+        self.assertEqual(http_cache.canonical_url("http://example.com"),
+                         "http://example.com/")
+
+    def test_hit_and_miss(self):
+        self.mock_request.return_value = MockedResponse({"id": "a.json"})
+        cache = http_cache.HTTPCache(self.directory)
+
+        first = cache.get("https://example.com/a.json")
+        second = cache.get("https://example.com/a.json#")
+        self.assertEqual(first.text, second.text)
+        self.assertEqual(second.json(), {"id": "a.json"})
+        self.assertEqual(self.mock_request.call_count, 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+        # the index survives a new instance
+        cache.flush()
+        reloaded = http_cache.HTTPCache(self.directory)
+        self.assertEqual(reloaded.get("https://example.com/a.json").json(), {"id": "a.json"})
+        self.assertEqual(self.mock_request.call_count, 1)
+
+    def test_content_addressed(self):
+        self.mock_request.return_value = MockedResponse({"id": "same"})
+        cache = http_cache.HTTPCache(self.directory)
+        cache.get("https://example.com/a.json")
+        cache.get("https://example.com/b.json")
+        self.assertEqual(len(os.listdir(cache.objects_dir)), 1)
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertEqual(cache.stats()["size"], len(json.dumps({"id": "same"})))
+
+        # the body is kept until no entry points to it
+        cache.invalidate("https://example.com/a.json")
+        self.assertEqual(len(os.listdir(cache.objects_dir)), 1)
+        cache.invalidate("https://example.com/b.json")
+        self.assertEqual(os.listdir(cache.objects_dir), [])
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_batched_index(self):
+        self.mock_request.return_value = MockedResponse({"id": "a.json"})
+        cache = http_cache.HTTPCache(self.directory, save_interval=3600)
+        for name in ["a", "b", "c"]:
+            cache.get("https://example.com/" + name + ".json")
+        self.assertFalse(os.path.exists(cache.index_file))
+
+        cache.flush()
+        with open(cache.index_file) as index_file:
+            self.assertEqual(len(json.load(index_file)), 3)
+        reloaded = http_cache.HTTPCache(self.directory)
+        self.assertEqual(reloaded.stats()["size"], cache.stats()["size"])
+
+        cache = http_cache.HTTPCache(self.directory, save_interval=0)
+        cache.invalidate("https://example.com/a.json")
+        with open(cache.index_file) as index_file:
+            self.assertEqual(len(json.load(index_file)), 2)
+
+    def test_invalidate_during_revalidation(self):
+        self.mock_request.return_value = MockedResponse({"id": "a.json"},
+                                                        headers={"ETag": '"v1"'})
+        cache = http_cache.HTTPCache(self.directory, ttl=0)
+        cache.get("https://example.com/a.json")
+
+        def invalidated(url, **kwargs):
+            cache.invalidate(url)
+            return MockedResponse(None, status_code=304)
+
+        self.mock_request.side_effect = invalidated
+        response = cache.get("https://example.com/a.json")
+        self.assertEqual(response.json(), {"id": "a.json"})
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_revalidation(self):
+        self.mock_request.return_value = MockedResponse({"id": "a.json"},
+                                                        headers={"ETag": '"v1"'})
+        cache = http_cache.HTTPCache(self.directory, ttl=0)
+        cache.get("https://example.com/a.json")
+
+        self.mock_request.return_value = MockedResponse(None, status_code=304)
+        response = cache.get("https://example.com/a.json")
+        self.assertEqual(response.json(), {"id": "a.json"})
+        self.assertEqual(self.mock_request.call_args[1]["headers"]["If-None-Match"], '"v1"')
+        self.assertEqual(cache.stats()["revalidated"], 1)
+
+    def test_not_cached_on_error(self):
+        self.mock_request.return_value = MockedResponse({}, status_code=404)
+        cache = http_cache.HTTPCache(self.directory)
+        cache.get("https://example.com/a.json")
+        cache.get("https://example.com/a.json")
+        self.assertEqual(self.mock_request.call_count, 2)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_eviction(self):
+        cache = http_cache.HTTPCache(self.directory, max_size=30)
+        for name in ["a", "b", "c"]:
+            self.mock_request.return_value = MockedResponse({"id": name + ".json"})
+            cache.get("https://example.com/" + name + ".json")
+        self.assertEqual(cache.stats()["entries"], 1)
+        self.assertEqual(len(os.listdir(cache.objects_dir)), 1)
+        cache.get("https://example.com/c.json")
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_invalidate_and_clear(self):
+        self.mock_request.return_value = MockedResponse({"id": "a.json"})
+        cache = http_cache.HTTPCache(self.directory)
+        cache.get("https://example.com/a.json")
+        cache.invalidate("https://example.com/a.json")
+        cache.get("https://example.com/a.json")
+        self.assertEqual(self.mock_request.call_count, 2)
+        cache.clear()
+        self.assertEqual(cache.stats(), {"hits": 0, "misses": 0, "revalidated": 0,
+                                         "entries": 0, "size": 0})
+        self.assertEqual(os.listdir(cache.objects_dir), [])
+
+    def test_cached_get(self):
+        self.mock_request.return_value = MockedResponse({"id": "a.json"})
+        http_cache.cached_get("https://example.com/a.json")
+        http_cache.cached_get("https://example.com/a.json")
+        self.assertEqual(self.mock_request.call_count, 2)
+
+        cache = http_cache.configure_cache(self.directory)
+        http_cache.cached_get("https://example.com/a.json")
+        self.assertEqual(http_cache.cached_get("https://example.com/a.json").json(),
+                         {"id": "a.json"})
+        self.assertEqual(self.mock_request.call_count, 3)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_get_cache_from_environment(self):
+        with patch.dict(os.environ, {http_cache.CACHE_DIR_VARIABLE: self.directory}):
+            cache = http_cache.get_cache()
+            self.assertEqual(cache.directory, self.directory)
+            self.assertTrue(http_cache.get_cache() is cache)
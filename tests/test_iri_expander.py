@@ -0,0 +1,37 @@
+import unittest
+from mock import patch
+from utils import iri_expander
+
+
+class IRIExpanderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.context = {
+            "sdo": "https://schema.org/",
+            "obo": "http://purl.obolibrary.org/obo/",
+            "label": {"@id": "sdo:name"},
+            "Person": "sdo:Person"
+        }
+
+    def test_parse(self):
+        expander = iri_expander.IRIExpander(self.context)
+        self.assertEqual(expander.parse("sdo:Person"),
+                         ("sdo", "Person", "https://schema.org/Person"))
+        self.assertEqual(expander.parse("obo:OBI_0000011"),
+                         ("obo", "OBI_0000011", "http://purl.obolibrary.org/obo/OBI_0000011"))
+        self.assertEqual(expander.parse("https://schema.org/name").iri, "https://schema.org/name")
+        self.assertEqual(expander.parse("sdo:").reference, "")
+        self.assertEqual(expander.parse("label:name").iri, None)
+        self.assertEqual(expander.parse("Person").reference, None)
+
+        self.assertEqual(expander.expand("sdo:Person"), "https://schema.org/Person")
+        with self.assertRaises(KeyError):
+            expander.expand("edam:data_3424")
+
+    def test_memoization(self):
+        expander = iri_expander.IRIExpander(self.context)
+        with patch('utils.iri_expander.urlparse',
+                   side_effect=iri_expander.urlparse) as mock_parse:
+            for _ in range(3):
+                expander.expand("sdo:Person")
+            self.assertEqual(mock_parse.call_count, 1)
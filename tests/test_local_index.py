@@ -0,0 +1,116 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+from utils import local_index
+from utils.prepare_fulldiff_input import resolve_network
+
+
+class LocalSchemaIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, "nested"))
+        self.schemas = {
+            "main_schema.json": {
+                "id": "https://example.com/schema/main_schema.json",
+                "properties": {
+                    "second": {"$ref": "second_schema.json#"},
+                    "third": {"items": {"$ref": "third_schema.json#"}}
+                }
+            },
+            "nested/second_schema.json": {
+                "id": "https://example.com/schema/second_schema.json",
+                "properties": {"third": {"$ref": "third_schema.json#"}}
+            },
+            "nested/third_schema.json": {
+                "properties": {"name": {"type": "string", "description": "x" * 200}},
+                "id": "https://example.com/schema/third_schema.json"
+            }
+        }
+        for name, schema in self.schemas.items():
+            with open(os.path.join(self.directory, name), "w") as schema_file:
+                json.dump(schema, schema_file)
+        with open(os.path.join(self.directory, "duplicate.json"), "w") as schema_file:
+            json.dump(self.schemas["main_schema.json"], schema_file)
+        with open(os.path.join(self.directory, "notes.txt"), "w") as notes_file:
+            notes_file.write('{"id": "https://example.com/notes"}')
+
+        self.mock_request_patcher = patch('utils.transport.get',
+                                          side_effect=AssertionError("No HTTP expected"))
+        self.mock_request_patcher.start()
+
+    def tearDown(self):
+        self.mock_request_patcher.stop()
+        shutil.rmtree(self.directory)
+
+    def test_scan(self):
+        index = local_index.LocalSchemaIndex(self.directory)
+        self.assertEqual(len(index), 3)
+        self.assertTrue("HTTPS://example.com/schema/main_schema.json#" in index)
+        self.assertEqual(index.path("https://example.com/schema/third_schema.json"),
+                         os.path.join(self.directory, "nested", "third_schema.json"))
+        self.assertEqual(index.duplicates, {
+            "https://example.com/schema/main_schema.json": [
+                os.path.join(self.directory, "main_schema.json")]
+        })
+        with self.assertRaises(KeyError):
+            index.load("https://example.com/schema/unknown_schema.json")
+
+    def test_mmap(self):
+        with patch('utils.local_index.MMAP_THRESHOLD', 100):
+            index = local_index.LocalSchemaIndex(self.directory)
+            third = index.load("https://example.com/schema/third_schema.json")
+        self.assertEqual(third, self.schemas["nested/third_schema.json"])
+        self.assertTrue(index.load("https://example.com/schema/third_schema.json") is third)
+
+    def test_read_id(self):
+        schema = {
+            "properties": {"nested": {"id": "https://example.com/schema/nested.json"}},
+            "@context": {"id": "@id", "name": "sdo:\\\"name\""},
+            "items": [{"$id": "https://example.com/schema/item.json"}],
+            "id": "https://example.com/schema/root_schema.json",
+            "$id": "https://example.com/schema/other.json"
+        }
+        path = os.path.join(self.directory, "root_schema.json")
+        for content in [json.dumps(schema), json.dumps(schema, indent=4)]:
+            with open(path, "w") as schema_file:
+                schema_file.write(content)
+            self.assertEqual(local_index.LocalSchemaIndex.read_id(path),
+                             "https://example.com/schema/root_schema.json")
+            with patch('utils.local_index.MMAP_THRESHOLD', 10):
+                self.assertEqual(local_index.LocalSchemaIndex.read_id(path),
+                                 "https://example.com/schema/root_schema.json")
+
+        del schema["id"], schema["$id"]
+        with open(path, "w") as schema_file:
+            json.dump(schema, schema_file)
+        self.assertEqual(local_index.LocalSchemaIndex.read_id(path), None)
+        self.assertEqual(local_index.find_root_id(b'[{"id": "a"}]'), None)
+        self.assertEqual(local_index.find_root_id(b'{"id": 1, "x": "y", "$id": "b"}'), "b")
+
+    def test_resolve_network(self):
+        os.remove(os.path.join(self.directory, "duplicate.json"))
+        index = local_index.LocalSchemaIndex(self.directory)
+        expected_output = {
+            "main_schema.json": self.schemas["main_schema.json"],
+            "second_schema.json": self.schemas["nested/second_schema.json"],
+            "third_schema.json": self.schemas["nested/third_schema.json"]
+        }
+
+        network = resolve_network("file://" + os.path.join(self.directory, "main_schema.json"),
+                                  index=index)
+        self.assertEqual(network, expected_output)
+
+        network = resolve_network("https://example.com/schema/main_schema.json", index=index)
+        self.assertEqual(network, expected_output)
+
+        # the documents of the index are not handed out
+        for schema in network.values():
+            schema["properties"]["injected"] = {"type": "string"}
+        self.assertEqual(index.load("https://example.com/schema/main_schema.json"),
+                         self.schemas["main_schema.json"])
+        self.assertEqual(resolve_network("https://example.com/schema/main_schema.json",
+                                         index=index), expected_output)
@@ -3,6 +3,7 @@ import os
 import json
 from mock import patch, mock_open
 from semDiff.mergeEntities import EntityMerge, MergeEntityFromDiff
+from utils.schema_graph import SchemaGraph
 
 schema_1 = {
     "id": "https://w3id.org/dats/schema/person_schema.json",
@@ -167,6 +168,18 @@ class MergeEntityFromDiffTestCase(unittest.TestCase):
         merger = MergeEntityFromDiff(self.overlaps)
         self.assertTrue(merger.output == expected_output)
 
+    def test_modify_references(self):
+        merger = MergeEntityFromDiff(self.overlaps)
+        self.assertTrue(len(merger.name_mapping) > 0)
+
+        graph = SchemaGraph(merger.output['schemas'])
+        for schema_name in graph.schemas:
+            for reference in graph.references[schema_name]:
+                self.assertFalse(reference.target in merger.name_mapping, reference)
+        main_schema = merger.output['schemas']['test1_main_test2_main_merged_schema.json']
+        self.assertEqual(main_schema['properties']['field_1']['items']['anyOf'][0]['$ref'],
+                         "test1_second_test2_second_merged_schema.json#")
+
     def test_validate_output(self):
         merger = MergeEntityFromDiff(self.overlaps)
         merger.output['schemas']['wrong_schema.json'] = {
@@ -20,7 +20,7 @@ class TestFlowRepoClient(object):
     def setup_class(cls):
         cls.client = FlowRepoClient(map_file, "this is a fake ID", 2)
 
-        cls.mock_request_patcher = mock.patch('validate.miflowcyt_validate.requests.request')
+        cls.mock_request_patcher = mock.patch('utils.transport.request')
         cls.mock_request = cls.mock_request_patcher.start()
 
         cls.mock_xmljson_patcher = mock.patch('validate.miflowcyt_validate.xmljson.parker.data')
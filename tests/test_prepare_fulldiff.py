@@ -1,7 +1,11 @@
+import asyncio
 import json
+import os
+import shutil
+import tempfile
 import unittest
 from nose.tools import eq_
-from mock import patch
+from mock import patch, Mock
 from utils import prepare_fulldiff_input
 
 
@@ -17,7 +21,7 @@ class TestCasePrepareFullDiffInput(unittest.TestCase):
         # cls.mock_resolver_patcher.stop()
 
     def test_load_context(self):
-        mock_request_patcher = patch('utils.prepare_fulldiff_input.requests.get')
+        mock_request_patcher = patch('utils.transport.get')
         mock_request = mock_request_patcher.start()
 
         contexts_mapping = {
@@ -47,10 +51,49 @@ class TestCasePrepareFullDiffInput(unittest.TestCase):
             self.assertTrue('There is a problem with your url or schema'
                             in context.exception)
 
+    def test_load_context_with_report(self):
+        mock_request_patcher = patch('utils.transport.get')
+        mock_request = mock_request_patcher.start()
+
+        contexts_mapping = {
+            "networkName": "test1",
+            "contexts": {
+                "first_schema": "https://example.com/first_context.jsonld",
+                "second_schema": "https://example.com/second_context.jsonld",
+                "third_schema": "https://example.com/third_context.jsonld"
+            }
+        }
+
+        class RequestMockResponse:
+
+            def __init__(self, text):
+                self.text = text
+
+        def get(url, **kwargs):
+            eq_(kwargs["timeout"], 5)
+            if "second" in url:
+                raise IOError("Connection refused")
+            if "third" in url:
+                return RequestMockResponse("Not found")
+            return RequestMockResponse(json.dumps({"@context": {"test": "sdo:test"}}))
+
+        mock_request.side_effect = get
+        contexts, failures = self.pre_process.load_context_with_report(contexts_mapping,
+                                                                       max_workers=2,
+                                                                       timeout=5)
+        mock_request_patcher.stop()
+
+        eq_(contexts, {"first_schema": {"test": "sdo:test"}})
+        eq_(sorted(failures), ["second_schema", "third_schema"])
+        eq_(failures["second_schema"], {"url": "https://example.com/second_context.jsonld",
+                                        "error": "OSError",
+                                        "message": "Connection refused"})
+        eq_(failures["third_schema"]["error"], "JSONDecodeError")
+
     def test_resolve_network(self):
         mock_resolver_patcher = patch('utils.prepare_fulldiff_input.RefResolver.resolve')
         mock_resolver = mock_resolver_patcher.start()
-        mock_request_patcher = patch('utils.prepare_fulldiff_input.requests.get')
+        mock_request_patcher = patch('utils.transport.get')
         mock_request = mock_request_patcher.start()
 
         schema_url = "http://justatest.com"
@@ -194,8 +237,12 @@ class TestCasePrepareFullDiffInput(unittest.TestCase):
             ["https://w3id.org/dats/schema/person_schema.json", "dats_mapping.json"]
         ]
 
-        input_networks = {"networks": prepare_fulldiff_input.prepare_multiple_input(networks_map)}
+        progress = []
+        input_networks = {"networks": prepare_fulldiff_input.prepare_multiple_input(
+            networks_map, max_workers=2,
+            progress_callback=lambda done, total, name: progress.append((done, total)))}
         self.assertTrue(input_networks == expected_output)
+        eq_(progress, [(1, 3), (2, 3), (3, 3)])
         mock_resolve_network_patcher.stop()
         mock_load_context_patcher.stop()
 
@@ -298,3 +345,202 @@ class TestCasePrepareFullDiffInput(unittest.TestCase):
 
         mock_resolve_network_patcher.stop()
         mock_load_context_patcher.stop()
+
+    def test_get_external_refs(self):
+        schema = {
+            "id": "test_schema.json",
+            "$ref": "#/definitions/field_1",
+            "definitions": {
+                "field_1": {"$ref": "second_schema.json#"}
+            },
+            "properties": {
+                "field_1": {"$ref": "third_schema.json#"},
+                "field_2": {"items": {"anyOf": [{"$ref": "second_schema.json#"},
+                                                {"$ref": "fourth_schema.json#"}]}}
+            }
+        }
+        self.assertEqual(self.pre_process.get_external_refs(schema),
+                         ["third_schema.json#", "second_schema.json#", "fourth_schema.json#"])
+
+    def test_crawl_schema_refs(self):
+        schemas = {
+            "first_schema.json": {
+                "id": "https://example.com/first_schema.json",
+                "properties": {
+                    "second": {"$ref": "second_schema.json#"},
+                    "third": {"items": {"$ref": "third_schema.json#"}}
+                }
+            },
+            "second_schema.json": {
+                "id": "https://example.com/second_schema.json",
+                "properties": {
+                    "fourth": {"anyOf": [{"$ref": "fourth_schema.json#"}]},
+                    "first": {"$ref": "first_schema.json#"}
+                }
+            },
+            "third_schema.json": {
+                "id": "https://example.com/third_schema.json",
+                "definitions": {"second": {"$ref": "second_schema.json#"}}
+            },
+            "fourth_schema.json": {
+                "id": "https://example.com/fourth_schema.json",
+                "properties": {"name": {"type": "string"}}
+            }
+        }
+
+        class Resolver:
+            calls = []
+
+            def resolve(self, reference):
+                self.calls.append(reference)
+                return "", schemas[reference.replace('#', '')]
+
+        root = schemas["first_schema.json"]
+        expected_output = self.pre_process.resolve_schema_ref(
+            root, Resolver(), {"first_schema.json": root})
+        resolver = Resolver()
+        resolver.calls = []
+        output = self.pre_process.crawl_schema_refs(root, resolver,
+                                                    {"first_schema.json": root}, 2)
+        eq_(output, expected_output)
+        eq_(output, schemas)
+        eq_(sorted(resolver.calls), ["fourth_schema.json#",
+                                     "second_schema.json#",
+                                     "third_schema.json#"])
+
+    def test_resolve_network_async(self):
+        schemas = {
+            "first_schema.json": {
+                "id": "https://example.com/first_schema.json",
+                "properties": {"second": {"$ref": "second_schema.json#"}}
+            },
+            "second_schema.json": {
+                "id": "https://example.com/second_schema.json",
+                "properties": {"first": {"$ref": "first_schema.json#"}}
+            }
+        }
+
+        def side_effect(url, **kwargs):
+            schema = schemas[url.split("/")[-1].replace("#", "")]
+            return Mock(status_code=200, text=json.dumps(schema), json=lambda: schema)
+
+        async def resolve_both():
+            return await asyncio.gather(
+                self.pre_process.resolve_network_async("https://example.com/first_schema.json"),
+                self.pre_process.load_context_async({"contexts": {}}))
+
+        with patch('utils.transport.get', side_effect=side_effect):
+            network, contexts = asyncio.run(resolve_both())
+            eq_(network, schemas)
+            eq_(contexts, {})
+
+            # the sync version still works when called from a running loop
+            async def resolve_sync():
+                return self.pre_process.resolve_network("https://example.com/first_schema.json")
+            eq_(asyncio.run(resolve_sync()), schemas)
+
+    def test_re_resolve_network(self):
+        directory = tempfile.mkdtemp()
+
+        def write_schema(name, references):
+            with open(os.path.join(directory, name), "w") as schema_file:
+                json.dump({
+                    "id": "https://example.com/" + name,
+                    "properties": dict((ref, {"$ref": ref + "#"}) for ref in references)
+                }, schema_file)
+
+        try:
+            write_schema("root_schema.json", ["a_schema.json", "b_schema.json", "d_schema.json"])
+            write_schema("a_schema.json", [])
+            write_schema("b_schema.json", [])
+            write_schema("d_schema.json", [])
+            root_location = "file://" + os.path.join(directory, "root_schema.json")
+            network = self.pre_process.resolve_network(root_location)
+            eq_(sorted(network), ["a_schema.json", "b_schema.json",
+                                  "d_schema.json", "root_schema.json"])
+
+            write_schema("root_schema.json", ["a_schema.json", "b_schema.json"])
+            write_schema("a_schema.json", ["c_schema.json"])
+            write_schema("c_schema.json", [])
+            new_network, report = self.pre_process.re_resolve_network(
+                root_location, network, [root_location, "a_schema.json"])
+
+            eq_(sorted(new_network), ["a_schema.json", "b_schema.json",
+                                      "c_schema.json", "root_schema.json"])
+            self.assertTrue(new_network["b_schema.json"] is network["b_schema.json"])
+            eq_(report, {"reused": ["b_schema.json"],
+                         "refetched": ["root_schema.json", "a_schema.json"],
+                         "added": ["c_schema.json"],
+                         "removed": ["d_schema.json"]})
+        finally:
+            shutil.rmtree(directory)
+
+    def test_re_resolve_network_ids(self):
+        directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(directory, "sub"))
+
+        def write_schema(path, name, references):
+            with open(os.path.join(directory, path), "w") as schema_file:
+                json.dump({
+                    "id": "https://example.com/schemas/" + name,
+                    "properties": dict((ref, {"$ref": ref + "#"}) for ref in references)
+                }, schema_file)
+
+        try:
+            # the id of the root is not its file name and a_schema.json is in a subdirectory
+            write_schema("root.json", "root_schema.json", ["sub/a_schema.json", "b_schema.json"])
+            write_schema("sub/a_schema.json", "sub/a_schema.json", [])
+            write_schema("b_schema.json", "b_schema.json", [])
+            root_location = "file://" + os.path.join(directory, "root.json")
+            network = self.pre_process.resolve_network(root_location)
+            eq_(sorted(network), ["a_schema.json", "b_schema.json", "root_schema.json"])
+
+            write_schema("sub/a_schema.json", "sub/a_schema.json", ["c_schema.json"])
+            write_schema("c_schema.json", "c_schema.json", [])
+            new_network, report = self.pre_process.re_resolve_network(
+                root_location, network, ["a_schema.json"])
+            eq_(sorted(new_network), ["a_schema.json", "b_schema.json",
+                                      "c_schema.json", "root_schema.json"])
+            eq_(report, {"reused": ["root_schema.json", "b_schema.json"],
+                         "refetched": ["a_schema.json"],
+                         "added": ["c_schema.json"],
+                         "removed": []})
+
+            write_schema("root.json", "root_schema.json", ["b_schema.json"])
+            new_network, report = self.pre_process.re_resolve_network(
+                root_location, new_network, [root_location])
+            eq_(sorted(new_network), ["b_schema.json", "root_schema.json"])
+            eq_(report["refetched"], ["root_schema.json"])
+            eq_(report["removed"], ["a_schema.json", "c_schema.json"])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_resolve_network_copies(self):
+        directory = tempfile.mkdtemp()
+        try:
+            for name, references in [("root_schema.json", ["a_schema.json"]),
+                                     ("a_schema.json", [])]:
+                with open(os.path.join(directory, name), "w") as schema_file:
+                    json.dump({
+                        "id": "https://example.com/" + name,
+                        "properties": dict((ref, {"$ref": ref + "#"}) for ref in references)
+                    }, schema_file)
+            root_location = "file://" + os.path.join(directory, "root_schema.json")
+
+            network = self.pre_process.resolve_network(root_location)
+            network["a_schema.json"]["properties"]["injected"] = {"type": "string"}
+            network["root_schema.json"]["properties"]["a_schema.json"]["$ref"] = "#"
+
+            new_network = self.pre_process.resolve_network(root_location)
+            eq_(new_network["a_schema.json"]["properties"], {})
+            eq_(new_network["root_schema.json"]["properties"],
+                {"a_schema.json": {"$ref": "a_schema.json#"}})
+            self.assertFalse(new_network["a_schema.json"] is network["a_schema.json"])
+
+            changed_network, report = self.pre_process.re_resolve_network(
+                root_location, new_network, ["a_schema.json"])
+            changed_network["a_schema.json"]["properties"]["injected"] = {"type": "string"}
+            eq_(self.pre_process.resolve_network(root_location)["a_schema.json"]["properties"],
+                {})
+        finally:
+            shutil.rmtree(directory)
@@ -19,7 +19,7 @@ class TestSchema2Cedar(object):
                                                                folder_id,
                                                                user_id)
 
-        cls.mock_request_patcher = patch('cedar.schema2cedar.requests.request')
+        cls.mock_request_patcher = patch('utils.transport.request')
         cls.mock_json_patcher = patch('cedar.schema2cedar.json.loads')
 
         cls.mock_request = cls.mock_request_patcher.start()
@@ -1,3 +1,4 @@
+import asyncio
 import unittest
 from mock import patch, mock_open
 import os
@@ -12,6 +13,7 @@ from utils.schema2context import (
     generate_contexts_from_regex,
     generate_context_mapping,
     generate_labels_from_contexts,
+    generate_labels_from_contexts_async,
     generate_context_mapping_dict
 )
 
@@ -92,7 +94,7 @@ class TestSchema2Context(unittest.TestCase):
     def test_create_context_template_from_url(self):
         url = "https://w3id.org/dats/schema/person_schema.json"
 
-        self.mock_request_patcher = patch('utils.schema2context.requests.get')
+        self.mock_request_patcher = patch('utils.transport.get')
         self.mock_request = self.mock_request_patcher.start()
         self.mock_request.return_value.status_code = 200
 
@@ -210,7 +212,7 @@ class TestSchema2Context(unittest.TestCase):
             }
         }
 
-        self.mock_request_patcher = patch('utils.schema2context.requests.get')
+        self.mock_request_patcher = patch('utils.transport.get')
         self.mock_request = self.mock_request_patcher.start()
         self.mock_request.return_value.status_code = 200
 
@@ -334,7 +336,7 @@ class TestSchema2Context(unittest.TestCase):
             }
         }
 
-        self.mock_request_patcher = patch('utils.schema2context.requests.get')
+        self.mock_request_patcher = patch('utils.transport.get')
         self.mock_request = self.mock_request_patcher.start()
         self.mock_request.return_value.status_code = 200
 
@@ -504,7 +506,7 @@ class TestSchema2Context(unittest.TestCase):
             MockErrorRequest()
         ]
 
-        mock_request_patcher = patch("utils.schema2context.requests.get", side_effect=side_effect)
+        mock_request_patcher = patch('utils.transport.get', side_effect=side_effect)
         mock_request_patcher.start()
 
         context = {
@@ -566,6 +568,47 @@ class TestSchema2Context(unittest.TestCase):
 
         mock_request_patcher.stop()
 
+    def test_generate_labels_from_contexts_async(self):
+        labels = {
+            "planned process": MockedRequest("planned process", 200),
+            "obi": MockedRequest("Ontology for Biomedical Investigations", 200),
+            "raw image": MockedRequest("Raw Image", 200)
+        }
+
+        def side_effect(url):
+            if "OBI_0000011" in url:
+                return labels["planned process"]
+            if "data_3424" in url:
+                return labels["raw image"]
+            return labels["obi"]
+
+        context = {
+            'first_schema.json': {
+                "@context": {
+                    'obo': 'http://purl.obolibrary.org/obo/',
+                    "edam": "http://edamontology.org/",
+                    "investigation": "obo:OBI_0000011",
+                    "image": "edam:data_3424"
+                }
+            },
+            'second_schema.json': {
+                'obo': 'http://purl.obolibrary.org/obo/',
+                "process": "obo:OBI_0000011"
+            }
+        }
+
+        with patch('utils.transport.get', side_effect=side_effect) as mock_request:
+            output = asyncio.run(generate_labels_from_contexts_async(
+                context, {"http://edamontology.org/": "EDAM"}, max_workers=2))
+            self.assertEqual(mock_request.call_count, 3)
+
+        self.assertEqual(output, {
+            "http://edamontology.org/": "EDAM",
+            "http://purl.obolibrary.org/obo/": "Ontology for Biomedical Investigations",
+            "obo:OBI_0000011": "planned process",
+            "edam:data_3424": "Raw Image"
+        })
+
     def test_generate_context_mapping_dict(self):
         generate_mapping_patcher = patch("utils.schema2context.generate_context_mapping")
         generate_mapping = generate_mapping_patcher.start()
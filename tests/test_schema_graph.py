@@ -0,0 +1,79 @@
+import unittest
+from utils.schema_graph import SchemaGraph, iter_references, reference_target
+
+
+class SchemaGraphTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.network = {
+            "main_schema.json": {
+                "id": "https://example.com/main_schema.json",
+                "properties": {
+                    "local": {"$ref": "#/definitions/local"},
+                    "second": {"$ref": "second_schema.json#"},
+                    "list/of": {"items": {"anyOf": [{"$ref": "third_schema.json#"},
+                                                    {"$ref": "second_schema.json#"}]}}
+                },
+                "definitions": {"local": {"type": "string"}}
+            },
+            "second_schema.json": {
+                "id": "https://example.com/second_schema.json",
+                "properties": {"third": {"$ref": "third_schema.json#"}}
+            },
+            "third_schema.json": {
+                "id": "https://example.com/third_schema.json",
+                "properties": {
+                    "fourth": {"$ref": "https://example.com/fourth_schema.json#/definitions/a"}
+                }
+            }
+        }
+
+    def test_iter_references(self):
+        schema = self.network["main_schema.json"]
+        self.assertEqual(list(iter_references(schema)), [
+            ("/properties/second", "second_schema.json#"),
+            ("/properties/list~1of/items/anyOf/0", "third_schema.json#"),
+            ("/properties/list~1of/items/anyOf/1", "second_schema.json#")
+        ])
+        self.assertEqual(list(iter_references(schema, external_only=False))[0],
+                         ("/properties/local", "#/definitions/local"))
+        self.assertEqual(reference_target("https://example.com/fourth_schema.json#/a"),
+                         "fourth_schema.json")
+
+    def test_edges(self):
+        graph = SchemaGraph(self.network)
+        self.assertEqual(graph.dependencies("main_schema.json"),
+                         ["second_schema.json", "third_schema.json"])
+        self.assertEqual(graph.dependents("third_schema.json"),
+                         ["main_schema.json", "second_schema.json"])
+        self.assertEqual(graph.missing(), ["fourth_schema.json"])
+        self.assertEqual(graph.reachable("second_schema.json"),
+                         ["second_schema.json", "third_schema.json", "fourth_schema.json"])
+        self.assertEqual(graph.reachable("third_schema.json", reverse=True),
+                         ["third_schema.json", "main_schema.json", "second_schema.json"])
+        self.assertEqual(len(graph.references["main_schema.json"]), 3)
+
+    def test_topological_order(self):
+        graph = SchemaGraph(self.network)
+        self.assertEqual(graph.topological_order(),
+                         ["third_schema.json", "second_schema.json", "main_schema.json"])
+        self.assertEqual(graph.cycles(), [])
+        self.assertFalse(graph.has_cycles())
+
+    def test_cycles(self):
+        graph = SchemaGraph(self.network)
+        graph.add_schema("third_schema.json", {
+            "properties": {"main": {"$ref": "main_schema.json#"}}
+        })
+        graph.add_schema("self_schema.json", {
+            "properties": {"self": {"$ref": "self_schema.json#"}}
+        })
+        self.assertEqual(graph.missing(), [])
+        self.assertEqual(graph.cycles(), [["main_schema.json", "second_schema.json",
+                                           "third_schema.json"],
+                                          ["self_schema.json"]])
+        self.assertEqual(sorted(graph.topological_order()), sorted(graph.schemas))
+
+        graph.remove_schema("third_schema.json")
+        self.assertEqual(graph.dependents("main_schema.json"), [])
+        self.assertEqual(graph.cycles(), [["self_schema.json"]])
@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+from mock import patch
+from utils import snapshot
+from semDiff.fullDiff import FullSemDiffMultiple, FullDiffGenerator
+from semDiff.mergeEntities import MergeEntityFromDiff
+
+data_path = os.path.join(os.path.dirname(__file__), "data")
+full_diff_path = os.path.join(os.path.dirname(__file__), "fullDiffOutput")
+
+
+class SnapshotTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "networks.snapshot")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_and_load(self):
+        content = [OrderedDict([("name", "test"), ("schemas", {"a.json": {"type": "object"}}),
+                                ("twins", ("first", "second")), ("coverage", [1.5, None, True])])]
+        snapshot.save_snapshot(self.path, content)
+        loaded = snapshot.load_snapshot(self.path)
+        self.assertEqual(loaded, [{"name": "test", "schemas": {"a.json": {"type": "object"}},
+                                   "twins": ["first", "second"],
+                                   "coverage": [1.5, None, True]}])
+        self.assertEqual(list(loaded[0]), ["name", "schemas", "twins", "coverage"])
+
+    def test_invalid_snapshot(self):
+        with open(self.path, "wb") as snapshot_file:
+            snapshot_file.write(b'{"networks": []}')
+        with self.assertRaises(ValueError):
+            snapshot.load_snapshot(self.path)
+
+        snapshot.save_snapshot(self.path, {})
+        with patch('utils.snapshot.SNAPSHOT_VERSION', snapshot.SNAPSHOT_VERSION + 1):
+            with self.assertRaises(ValueError):
+                snapshot.load_snapshot(self.path)
+
+        # written by another interpreter
+        with patch('utils.snapshot.PYTHON_TAG', b"cpython-36"):
+            snapshot.save_snapshot(self.path, {})
+        with self.assertRaises(ValueError):
+            snapshot.load_snapshot(self.path)
+
+    def test_full_sem_diff_multiple(self):
+        with open(os.path.join(data_path, "fullDiff_input_example.json")) as input_file:
+            networks = json.load(input_file)["networks"]
+        snapshot.save_snapshot(self.path, networks)
+
+        expected_output = FullSemDiffMultiple(networks)
+        output = FullSemDiffMultiple(self.path)
+        self.assertEqual(output.output, expected_output.output)
+        self.assertEqual(output.networks, expected_output.networks)
+
+    def test_full_diff_generator(self):
+        with open(os.path.join(full_diff_path, "network1.json")) as network_file:
+            network = json.load(network_file)
+        network["labels"] = {"obo:OBI_0000011": "planned process"}
+        snapshot.save_snapshot(self.path, [network])
+
+        with patch('semDiff.fullDiff.generate_context_mapping') as mock_resolver:
+            report = FullDiffGenerator(self.path, self.path)
+            self.assertEqual(mock_resolver.call_count, 0)
+
+        self.assertEqual(report.json["network1"]["schemas"], network["schemas"])
+        self.assertEqual(report.json["network1"], report.json["network2"])
+        self.assertEqual(report.json["labels"], network["labels"])
+
+    def test_merge_entity_from_diff(self):
+        with open(os.path.join(full_diff_path, "overlap_example.json")) as input_file:
+            overlaps = json.load(input_file)
+        with open(os.path.join(full_diff_path, "merges", "example_merge.json")) as output_file:
+            expected_output = json.load(output_file)
+        snapshot.save_snapshot(self.path, overlaps)
+
+        self.assertEqual(MergeEntityFromDiff(self.path).output, expected_output)
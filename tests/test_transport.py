@@ -0,0 +1,45 @@
+import unittest
+from mock import patch
+from utils import transport
+
+
+class TransportTestCase(unittest.TestCase):
+
+    def tearDown(self):
+        transport.configure_transport()
+
+    def test_adapter(self):
+        client = transport.Transport(retries=5, backoff_factor=1, pool_maxsize=3)
+        for prefix in ("http://", "https://"):
+            adapter = client.session.get_adapter(prefix + "example.com")
+            self.assertEqual(adapter.max_retries.total, 5)
+            self.assertEqual(adapter.max_retries.backoff_factor, 1)
+            self.assertEqual(adapter.max_retries.status_forcelist, transport.RETRY_STATUSES)
+            self.assertFalse("POST" in adapter.max_retries.allowed_methods)
+            self.assertEqual(adapter._pool_maxsize, 3)
+            self.assertTrue(adapter._pool_block)
+        client.close()
+
+    @patch('utils.transport.requests.Session.request')
+    def test_request(self, mock_request):
+        client = transport.Transport(timeout=12)
+        client.request("GET", "https://example.com/schema.json")
+        mock_request.assert_called_with("GET", "https://example.com/schema.json", timeout=12)
+        client.request("POST", "https://example.com/schema.json", timeout=3, data="{}")
+        mock_request.assert_called_with("POST", "https://example.com/schema.json",
+                                        timeout=3, data="{}")
+
+    @patch('utils.transport.requests.Session.request')
+    def test_shared_transport(self, mock_request):
+        shared = transport.get_transport()
+        self.assertTrue(transport.get_transport() is shared)
+
+        configured = transport.configure_transport(timeout=7)
+        self.assertFalse(configured is shared)
+        self.assertTrue(transport.get_transport() is configured)
+
+        transport.get("https://example.com/schema.json", params={"q": "test"})
+        mock_request.assert_called_with("GET", "https://example.com/schema.json",
+                                        params={"q": "test"}, timeout=7)
+        transport.delete("https://example.com/schema.json")
+        mock_request.assert_called_with("DELETE", "https://example.com/schema.json", timeout=7)
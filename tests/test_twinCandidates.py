@@ -0,0 +1,79 @@
+import json
+import os
+import unittest
+from mock import patch
+from semDiff.compareEntities import EntityCoverage
+from semDiff.twinCandidates import MinHashLSH, TwinCandidates, jaccard, optimal_bands
+
+
+class MinHashLSHTestCase(unittest.TestCase):
+
+    def test_optimal_bands(self):
+        bands, rows = optimal_bands(0.5, 128)
+        self.assertTrue(bands * rows <= 128)
+        self.assertTrue(abs((1.0 / bands) ** (1.0 / rows) - 0.5) < 0.05)
+
+    def test_similarity(self):
+        lsh = MinHashLSH(num_permutations=256)
+        first = ["https://schema.org/term%s" % i for i in range(100)]
+        second = ["https://schema.org/term%s" % i for i in range(50, 150)]
+        lsh.add("first", first)
+        lsh.add("copy", list(reversed(first)))
+        lsh.add("second", second)
+        lsh.add("other", ["http://purl.obolibrary.org/obo/OBI_%s" % i for i in range(100)])
+
+        self.assertEqual(lsh.sketches["first"], MinHashLSH(num_permutations=256).sketch(first))
+        self.assertEqual(lsh.similarity("first", "copy"), 1.0)
+        self.assertTrue(abs(lsh.similarity("first", "second") - 1 / 3.0) < 0.1)
+        self.assertTrue(lsh.similarity("first", "other") < 0.05)
+        self.assertTrue(("first", "copy") in lsh.candidate_pairs())
+        self.assertFalse(("first", "other") in lsh.candidate_pairs())
+
+
+class TwinCandidatesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        data_path = os.path.join(os.path.dirname(__file__), "data")
+        with open(os.path.join(data_path, "full_dats_miaca.json")) as input_file:
+            self.networks = json.load(input_file)
+
+    def test_candidates(self):
+        candidates = TwinCandidates(self.networks, threshold=0.3)
+        self.assertEqual([(first[1], second[1]) for first, second, _ in candidates.candidates],
+                         [("organization_schema.json", "source_schema.json"),
+                          ("person_schema.json", "source_schema.json"),
+                          ("place_schema.json", "source_schema.json")])
+
+        networks = [self.networks[0], dict(self.networks[0], name="DATS copy")]
+        candidates = TwinCandidates(networks, threshold=0.9)
+        pairs = set()
+        for first_entity, second_entity, similarity in candidates.candidates:
+            self.assertEqual((first_entity[0], second_entity[0]), (0, 1))
+            self.assertEqual(similarity, 1.0)
+            pairs.add((first_entity[1], second_entity[1]))
+        for network_position, schema_name in candidates.lsh.sketches:
+            self.assertTrue((schema_name, schema_name) in pairs)
+
+    def test_exact_similarity(self):
+        self.assertEqual(jaccard({"a", "b"}, {"b", "c"}), 1 / 3.0)
+        self.assertEqual(jaccard(set(), set()), 0.0)
+
+        # the MinHash estimate only selects the pairs to check
+        with patch.object(MinHashLSH, 'similarity', return_value=1.0):
+            candidates = TwinCandidates(self.networks, threshold=0.3)
+        for first_entity, second_entity, similarity in candidates.candidates:
+            self.assertEqual(similarity,
+                             jaccard(candidates.fingerprints[first_entity][0].keys(),
+                                     candidates.fingerprints[second_entity][0].keys()))
+            self.assertTrue(similarity >= 0.3)
+        self.assertEqual(candidates.candidates, TwinCandidates(self.networks, 0.3).candidates)
+
+    def test_score(self):
+        candidates = TwinCandidates(self.networks, threshold=0.3)
+        for first_entity, second_entity, similarity, coverage in candidates.score():
+            expected_coverage = EntityCoverage(
+                self.networks[0]["schemas"][first_entity[1]],
+                {"@context": self.networks[0]["contexts"][first_entity[1]]},
+                self.networks[1]["schemas"][second_entity[1]],
+                {"@context": self.networks[1]["contexts"][second_entity[1]]})
+            self.assertEqual(coverage, expected_coverage.full_coverage)
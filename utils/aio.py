@@ -0,0 +1,47 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+def run_sync(coroutine):
+    """ Run a coroutine to completion from synchronous code. When the current thread already
+    runs an event loop, the coroutine is run on a new loop in a worker thread.
+
+    :param coroutine: the coroutine to run
+    :return: the result of the coroutine
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coroutine).result()
+
+
+async def run_blocking(function, *args, **kwargs):
+    """ Call a blocking function (eg: an HTTP request) in the default executor of the running
+    loop so that it does not block the loop
+
+    :param function: the function to call
+    :return: the result of the function
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, partial(function, *args, **kwargs))
+
+
+async def gather_blocking(function, items, max_workers):
+    """ Call a blocking function on each item in the default executor of the running loop,
+    at most max_workers at the same time
+
+    :param function: the function to call with each item
+    :param items: the items
+    :param max_workers: the maximum number of calls running at the same time
+    :return: the list of results, in the order of the items
+    """
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def call(item):
+        async with semaphore:
+            return await run_blocking(function, item)
+
+    return list(await asyncio.gather(*[call(item) for item in items]))
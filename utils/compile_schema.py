@@ -1,8 +1,10 @@
 import json
-import requests
-from copy import deepcopy as copy
 from jsonschema.validators import RefResolver
 from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from urllib.parse import urldefrag, urljoin
+from utils.http_cache import cached_get
+from utils.document_store import resolver_handlers
 
 ignored_keys = ["@id", "@type", "@context"]
 iterables = ['anyOf', 'oneOf', 'allOf']
@@ -15,7 +17,7 @@ def resolve_reference(schema_url):
     :return: an exception or a decoded json schema as a dictionary
     """
     try:
-        return json.loads(requests.request('GET', schema_url).text, object_pairs_hook=OrderedDict)
+        return json.loads(cached_get(schema_url).text, object_pairs_hook=OrderedDict)
     except Exception:
         return Exception
 
@@ -30,103 +32,304 @@ def get_name(schema_url):
     return name
 
 
-def resolve_schema_references(schema, loaded_schemas, schema_url=None, refs=None):
+def resolve_schema_references(schema, loaded_schemas, schema_url=None, refs=None, lazy=False,
+                              bundle=False):
     """ Resolves and replaces json-schema $refs with the appropriate dict.
-    Recursively walks the given schema dict, converting every instance
+    Walks the given schema dict, converting every instance
     of $ref in a 'properties' structure with a resolved dict.
     This modifies the input schema and also returns it.
+    In lazy mode nothing is resolved upfront: a LazySchema view is returned and each $ref is
+    only fetched and resolved when its subtree is first accessed.
+    In bundle mode each referenced schema is added once under 'definitions' and the $refs are
+    rewritten to point to it (eg: '#/definitions/identifier_info_schema.json').
 
     :param schema: the schema dict
     :param loaded_schemas: a recursive dictionary that stores the path of
-        already loaded schemas to prevent circularity issues
+        already loaded schemas to prevent circularity issues (not used in lazy mode)
     :param refs: a dict of <string, dict> which forms a store of referenced schemata
     :param schema_url: the URL of the schema
+    :param lazy: return a LazySchema instead of the fully resolved schema
+    :param bundle: bundle the referenced schemas under 'definitions' instead of inlining them
     :return: schema
     """
 
     schema = OrderedDict(schema)
     refs = refs or {}
-    if schema_url:
-        return _resolve_schema_references(schema,
-                                          RefResolver(schema_url, schema, store=refs),
-                                          loaded_schemas,
-                                          '#')
-    else:
-        return _resolve_schema_references(schema,
-                                          RefResolver("", schema, store=refs),
-                                          loaded_schemas,
-                                          '#')
-
-
-def _resolve_schema_references(schema, resolver, loaded_schemas, object_path):
+    resolver = RefResolver(schema_url or "", schema, store=refs, handlers=resolver_handlers())
+    if lazy:
+        return LazySchema(schema, resolver)
+    if bundle:
+        return _bundle_schema_references(schema, resolver, loaded_schemas)
+    return _resolve_schema_references(schema, resolver, loaded_schemas, '#')
+
+
+def _resolve_schema_references(schema, resolver, loaded_schemas, object_path, copy_nodes=False):
     """ Iterate over the json until it find a $ref and replace it with the loaded object or a
-    reference to an already loaded object
+    reference to an already loaded object. The schema is walked with an explicit stack, in the
+    same order as a recursive walk, and its nodes are updated in place. The content of a
+    resolved reference is shared with the resolver and only the nodes that are walked are
+    copied, so that the documents held by the resolver are never modified.
 
     :param schema: the schema or portion of schema to process
     :param resolver: the RefResolver object that will realize the task of loading/updating the
     object
     :param loaded_schemas: a dictionary of a already loaded schemas (prevent recursion issues)
     :param object_path: a string containing the path of the current level inside the document
+    :param copy_nodes: copy the nodes below the given schema as they are walked instead of
+        updating them in place
     :return schema: the updated schema
     """
 
-    schema = OrderedDict(schema)
+    # each entry is a node, its path and whether its children belong to a resolved document
+    stack = [(schema, object_path, copy_nodes)]
 
-    if SchemaKey.ref in schema:
+    while stack:
+        node, path, shared = stack.pop()
 
-        if schema['$ref'][0] != '#':
-            reference_path = schema.pop(SchemaKey.ref, None)
-            resolved = OrderedDict(resolver.resolve(reference_path)[1])
+        if SchemaKey.ref in node and node[SchemaKey.ref][0] != '#':
+            reference_path = node.pop(SchemaKey.ref)
+            resolved = resolver.resolve(reference_path)[1]
 
             if get_name(resolved['id']) not in loaded_schemas:
-                loaded_schemas[get_name(resolved['id'])] = object_path
-                schema.update(resolved)
-                schema = OrderedDict(schema)
-                return OrderedDict(_resolve_schema_references(schema, resolver, loaded_schemas,
-                                                              object_path))
+                loaded_schemas[get_name(resolved['id'])] = path
+                node.update(resolved)
+                stack.append((node, path, True))
+                continue
 
             else:
-                res = {"$ref": loaded_schemas[get_name(resolved['id'])]}
-                schema.update(res)
-
-    if SchemaKey.properties in schema:
-        for k, val in OrderedDict(schema)[SchemaKey.properties].items():
-            current_path = object_path + '/properties/'+k
-            schema[SchemaKey.properties][k] = OrderedDict(
-                                                _resolve_schema_references(val,
-                                                                           resolver,
-                                                                           loaded_schemas,
-                                                                           current_path))
-
-    if SchemaKey.definitions in schema:
-        for k, val in OrderedDict(schema)[SchemaKey.definitions].items():
-            current_path = object_path + '/definitions/' + k
-            schema[SchemaKey.definitions][k] = OrderedDict(
-                                                _resolve_schema_references(val,
-                                                                           resolver,
-                                                                           loaded_schemas,
-                                                                           current_path))
-
-    for pattern in SchemaKey.sub_patterns:
-        i = 0
-        if pattern in schema:
-            for val in OrderedDict(schema)[pattern]:
-                iterator = str(copy(i))
-                current_path = object_path + '/' + pattern + '/' + iterator
-                schema[pattern][i] = OrderedDict(_resolve_schema_references(val,
-                                                                            resolver,
-                                                                            loaded_schemas,
-                                                                            current_path))
-                i += 1
-
-    if SchemaKey.items in OrderedDict(schema):
-        current_path = object_path + '/items'
-        schema[SchemaKey.items] = OrderedDict(_resolve_schema_references(schema[SchemaKey.items],
-                                                                         resolver,
-                                                                         loaded_schemas,
-                                                                         current_path))
-
-    return OrderedDict(schema)
+                node[SchemaKey.ref] = loaded_schemas[get_name(resolved['id'])]
+
+        children = []
+
+        for container in [SchemaKey.properties, SchemaKey.definitions]:
+            if container in node:
+                if shared:
+                    node[container] = _copy_children(node[container])
+                for k, val in node[container].items():
+                    children.append((val, path + '/' + container + '/' + k, shared))
+
+        for pattern in SchemaKey.sub_patterns:
+            if pattern in node:
+                if shared:
+                    node[pattern] = _copy_children(node[pattern])
+                for i, val in enumerate(node[pattern]):
+                    children.append((val, path + '/' + pattern + '/' + str(i), shared))
+
+        if SchemaKey.items in node and isinstance(node[SchemaKey.items], dict):
+            if shared:
+                node[SchemaKey.items] = node[SchemaKey.items].copy()
+            children.append((node[SchemaKey.items], path + '/items', shared))
+
+        stack.extend(reversed(children))
+
+    return schema
+
+
+def _bundle_schema_references(schema, resolver, loaded_schemas):
+    """ Add each schema referenced, directly or not, by the given schema once under its
+    'definitions' and rewrite every $ref to a local pointer. The local $refs of a bundled
+    schema are prefixed with its location. The bundled schemas are copied as they are walked,
+    so that the documents held by the resolver are never modified.
+
+    :param schema: the root schema, updated in place
+    :param resolver: the RefResolver object used to load the referenced schemas
+    :param loaded_schemas: a dictionary of schema names and their location in the bundle
+    :return schema: the bundled schema
+    """
+    definitions = OrderedDict()
+    # each entry is a document, its base URL, its location in the bundle and whether it is
+    # shared with the resolver
+    documents = [(schema, resolver.resolution_scope, '#', False)]
+
+    while documents:
+        document, base_url, location, shared = documents.pop(0)
+        stack = [document]
+
+        while stack:
+            node = stack.pop()
+
+            if SchemaKey.ref in node:
+                if node[SchemaKey.ref][0] == '#':
+                    node[SchemaKey.ref] = location + node[SchemaKey.ref][1:]
+                else:
+                    url, fragment = urldefrag(urljoin(base_url, node[SchemaKey.ref]))
+                    name = get_name(url)
+                    if name not in loaded_schemas:
+                        loaded_schemas[name] = '#/' + SchemaKey.definitions + '/' + name
+                        definitions[name] = OrderedDict(resolver.resolve(url)[1])
+                        # without its id, the local $refs of a bundled schema resolve
+                        # against the bundle instead of its original URL
+                        for id_key in SchemaKey.ids:
+                            definitions[name].pop(id_key, None)
+                        documents.append((definitions[name], url, loaded_schemas[name], True))
+                    node[SchemaKey.ref] = loaded_schemas[name] + fragment
+
+            children = []
+
+            for container in [SchemaKey.properties, SchemaKey.definitions]:
+                if container in node:
+                    if shared:
+                        node[container] = _copy_children(node[container])
+                    children.extend(node[container].values())
+
+            for pattern in SchemaKey.sub_patterns:
+                if pattern in node:
+                    if shared:
+                        node[pattern] = _copy_children(node[pattern])
+                    children.extend(node[pattern])
+
+            if SchemaKey.items in node and isinstance(node[SchemaKey.items], dict):
+                if shared:
+                    node[SchemaKey.items] = node[SchemaKey.items].copy()
+                children.append(node[SchemaKey.items])
+
+            stack.extend(reversed(children))
+
+    if definitions:
+        schema[SchemaKey.definitions] = OrderedDict(schema.get(SchemaKey.definitions, {}))
+        schema[SchemaKey.definitions].update(definitions)
+    return schema
+
+
+def _copy_children(container):
+    """ Shallow copy of a container of schema nodes (a dict or a list) and of each node in it
+
+    :param container: the container to copy
+    :return: the copied container
+    """
+    if isinstance(container, dict):
+        return type(container)((key, val.copy()) for key, val in container.items())
+    return [val.copy() for val in container]
+
+
+class LazySchema(Mapping):
+    """ A read-only view of a schema that resolves its $refs on demand. The external $ref of
+    a node is only fetched when one of the node keys is first read, and the merged node and
+    its wrapped children are memoized. It can be read like the output of
+    resolve_schema_references, but only costs the fetches of the subtrees that are accessed.
+    It is a Mapping, not a dict: call resolve() before serializing it, or give json_default
+    as the default of the JSON encoder.
+
+    :param schema: the schema or portion of schema to wrap
+    :param resolver: the RefResolver object used to load the references
+    """
+
+    def __init__(self, schema, resolver):
+        self.schema = schema
+        self.resolver = resolver
+        self._node = None
+        self._children = {}
+
+    def _target(self):
+        """ Return the node with its external $ref (if any) replaced by the referenced schema """
+        if self._node is None:
+            node = self.schema
+            if SchemaKey.ref in node and node[SchemaKey.ref][0] != '#':
+                resolved = self.resolver.resolve(node[SchemaKey.ref])[1]
+                node = OrderedDict((k, val) for k, val in node.items() if k != SchemaKey.ref)
+                node.update(resolved)
+            self._node = node
+        return self._node
+
+    def __getitem__(self, key):
+        if key not in self._children:
+            self._children[key] = _lazy_value(self._target()[key], self.resolver)
+        return self._children[key]
+
+    def __iter__(self):
+        return iter(self._target())
+
+    def __len__(self):
+        return len(self._target())
+
+    def __repr__(self):
+        return "LazySchema(" + repr(self.schema) + ")"
+
+    def resolve(self, loaded_schemas=None):
+        """ Fully resolve this subtree, as resolve_schema_references does, without modifying
+        the wrapped schema. The schema identified by the subtree (its root or the target of
+        its $ref) is marked as loaded, so that the references back to it point to '#'.
+
+        :param loaded_schemas: a dictionary of already loaded schemas and their path
+        :return: the resolved subtree as a dictionary
+        """
+        loaded_schemas = loaded_schemas if loaded_schemas is not None else {}
+        node = OrderedDict(self._target())
+        if 'id' in node:
+            loaded_schemas.setdefault(get_name(node['id']), '#')
+        return _resolve_schema_references(node, self.resolver, loaded_schemas, '#',
+                                          copy_nodes=True)
+
+
+class LazySchemaList(Sequence):
+    """ A read-only view of a list of schemas (anyOf, oneOf, allOf) whose items are
+    wrapped in LazySchema views when they are accessed
+
+    :param items: the list to wrap
+    :param resolver: the RefResolver object used to load the references
+    """
+
+    def __init__(self, items, resolver):
+        self.items = items
+        self.resolver = resolver
+        self._children = {}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self.items))[index]]
+        if index not in self._children:
+            self._children[index] = _lazy_value(self.items[index], self.resolver)
+        return self._children[index]
+
+    def __len__(self):
+        return len(self.items)
+
+    def resolve(self, loaded_schemas=None):
+        """ Fully resolve each schema of the list, see LazySchema.resolve
+
+        :param loaded_schemas: a dictionary of already loaded schemas and their path
+        :return: the resolved list
+        """
+        loaded_schemas = loaded_schemas if loaded_schemas is not None else {}
+        return [item.resolve(loaded_schemas) if hasattr(item, 'resolve') else item
+                for item in self]
+
+
+def _lazy_value(value, resolver):
+    """ Wrap dictionaries and lists into lazy views, leave other values untouched """
+    if isinstance(value, dict):
+        return LazySchema(value, resolver)
+    if isinstance(value, list):
+        return LazySchemaList(value, resolver)
+    return value
+
+
+def json_default(value):
+    """ The default function of the JSON encoder for lazy views: they are fully resolved
+
+    :param value: the value the encoder cannot serialize
+    :return: the resolved value
+    :raise TypeError: when the value is not a lazy view
+    """
+    if isinstance(value, (LazySchema, LazySchemaList)):
+        return value.resolve()
+    raise TypeError("Object of type " + type(value).__name__ + " is not JSON serializable")
+
+
+def resolve_pointer(schema, pointer):
+    """ Follow a JSON pointer (eg: '/properties/identifier') inside a schema or a LazySchema
+
+    :param schema: the schema to walk
+    :param pointer: the JSON pointer
+    :return: the value found at the given location
+    """
+    value = schema
+    for part in [part for part in pointer.split('/') if part != '']:
+        part = part.replace('~1', '/').replace('~0', '~')
+        if isinstance(value, Sequence) and not isinstance(value, str):
+            part = int(part)
+        value = value[part]
+    return value
 
 
 class SchemaKey:
@@ -136,3 +339,4 @@ class SchemaKey:
     definitions = 'definitions'
     pattern_properties = "patternProperties"
     sub_patterns = ['anyOf', 'oneOf', 'allOf']
+    ids = ['id', '$id']
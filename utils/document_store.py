@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+from utils.http_cache import canonical_url, cached_get
+
+DEFAULT_MAX_DOCUMENTS = 512
+TTL_VARIABLE = "JSONLDSCHEMA_DOCUMENT_TTL"
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class DocumentStore(MutableMapping):
+    """ A thread-safe store of parsed documents (schemas, contexts) keyed by canonical URI.
+    The least recently used documents are evicted once max_documents is reached. The
+    documents are shared by every resolver using the store and must be treated as read-only.
+    With a ttl, the documents stored for longer are dropped and loaded again on their next
+    use, through the HTTP cache which revalidates the remote ones.
+
+    :param max_documents: the maximum number of documents kept in the store
+    :param ttl: the number of seconds a document is kept, None to keep it until it is evicted
+    """
+
+    def __init__(self, max_documents=DEFAULT_MAX_DOCUMENTS, ttl=None):
+        self.max_documents = max_documents
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._documents = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __getitem__(self, uri):
+        key = canonical_url(uri)
+        with self._lock:
+            document, stored = self._documents[key]
+            if self.ttl is not None and time.time() - stored >= self.ttl:
+                del self._documents[key]
+                raise KeyError(uri)
+            self._documents.move_to_end(key)
+            return document
+
+    def __setitem__(self, uri, document):
+        key = canonical_url(uri)
+        with self._lock:
+            self._documents[key] = (document, time.time())
+            self._documents.move_to_end(key)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+                self.evictions += 1
+
+    def __delitem__(self, uri):
+        with self._lock:
+            del self._documents[canonical_url(uri)]
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._documents))
+
+    def __len__(self):
+        return len(self._documents)
+
+    def get_or_load(self, uri, loader):
+        """ Return the document of the given URI, loading and storing it on a miss
+
+        :param uri: the URI of the document
+        :type uri: str
+        :param loader: a function that takes the URI and returns the parsed document
+        :return: the parsed document
+        """
+        try:
+            document = self[uri]
+            with self._lock:
+                self.hits += 1
+            return document
+        except KeyError:
+            pass
+
+        document = loader(uri)
+        with self._lock:
+            self.misses += 1
+            if canonical_url(uri) not in self._documents:
+                self[uri] = document
+            return self._documents[canonical_url(uri)][0]
+
+    def clear(self):
+        """ Remove every document and reset the counters
+        """
+        with self._lock:
+            self._documents.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """ Report the store counters
+
+        :return: a dictionary with the hits, misses, evictions and number of documents
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "documents": len(self._documents)
+            }
+
+
+def configure_document_store(max_documents=DEFAULT_MAX_DOCUMENTS, ttl=None):
+    """ Replace the process-wide document store with an empty one
+
+    :param max_documents: the maximum number of documents kept in the store
+    :type max_documents: int
+    :param ttl: the number of seconds a document is kept, None to keep it until it is evicted
+        (long-running processes such as the API should set one to see updated schemas)
+    :type ttl: int
+    :return: the new DocumentStore
+    """
+    global _store
+    with _store_lock:
+        _store = DocumentStore(max_documents, ttl)
+        return _store
+
+
+def get_document_store():
+    """ Return the process-wide document store, creating it on first use. Its documents are
+    kept until they are evicted, unless the JSONLDSCHEMA_DOCUMENT_TTL environment variable
+    gives their ttl in seconds
+
+    :return: the shared DocumentStore
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            ttl = os.environ.get(TTL_VARIABLE)
+            _store = DocumentStore(ttl=float(ttl) if ttl else None)
+        return _store
+
+
+def load_remote_document(uri):
+    """ Load and parse a JSON document from an http(s) URI, through the HTTP cache
+
+    :param uri: the URI of the document
+    :return: the parsed document
+    """
+    return cached_get(uri).json()
+
+
+def load_file_document(uri):
+    """ Load and parse a JSON document from a file URI
+
+    :param uri: the URI of the document
+    :return: the parsed document
+    """
+    with open(url2pathname(urlsplit(uri).path)) as document_file:
+        return json.load(document_file)
+
+
+def resolver_handlers():
+    """ Build the RefResolver handlers that load documents through the process-wide document
+    store, so that each referenced document is fetched and parsed once per process
+
+    :return: a dictionary of URL schemes and their handler
+    """
+    store = get_document_store()
+
+    def remote_handler(uri):
+        return store.get_or_load(uri, load_remote_document)
+
+    def file_handler(uri):
+        return store.get_or_load(uri, load_file_document)
+
+    return {"http": remote_handler, "https": remote_handler, "file": file_handler}
@@ -0,0 +1,342 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+from utils import transport
+
+DEFAULT_TTL = 3600
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+DEFAULT_SAVE_INTERVAL = 5
+CACHE_DIR_VARIABLE = "JSONLDSCHEMA_CACHE_DIR"
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def canonical_url(url):
+    """ Normalise a URL so that equivalent spellings share the same cache entry
+
+    :param url: the URL to normalise
+    :type url: str
+    :return: the URL with a lower-cased scheme and host, no default port and no fragment
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) \
+            or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+class CachedResponse:
+    """ A minimal stand-in for requests.Response built from a cache entry
+
+    :param url: the URL the content was fetched from
+    :param content: the raw body of the response
+    :param entry: the cache index entry describing the content
+    """
+
+    status_code = 200
+    from_cache = True
+
+    def __init__(self, url, content, entry):
+        self.url = url
+        self.content = content
+        self.encoding = entry.get("encoding") or "utf-8"
+        self.headers = {}
+        if entry.get("etag"):
+            self.headers["ETag"] = entry["etag"]
+        if entry.get("last_modified"):
+            self.headers["Last-Modified"] = entry["last_modified"]
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self, **kwargs):
+        return json.loads(self.text, **kwargs)
+
+
+class HTTPCache:
+    """ A persistent, content-addressed cache for GET requests on schemas and contexts.
+    Bodies are stored once per content hash, the index maps each canonical URL to its hash
+    and validators. Fresh entries (younger than ttl) are served without any request, stale
+    ones are revalidated with If-None-Match/If-Modified-Since, and the least recently used
+    entries are evicted once the stored bodies exceed max_size bytes. The index is written at
+    most once every save_interval seconds and by flush(); the entries whose body is missing
+    are refetched.
+
+    :param directory: the directory where the index and the bodies are stored
+    :param ttl: the number of seconds an entry is served without revalidation
+    :param max_size: the maximum number of bytes of stored bodies
+    :param save_interval: the minimum number of seconds between two writes of the index
+    """
+
+    def __init__(self, directory, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE,
+                 save_interval=DEFAULT_SAVE_INTERVAL):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        self.save_interval = save_interval
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.objects_dir = os.path.join(directory, "objects")
+        self.index_file = os.path.join(directory, "index.json")
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._saved = time.time()
+        # the number of index entries pointing to each stored body, and its size
+        self._references = {}
+        self._sizes = {}
+        self._size = 0
+
+        if not os.path.exists(self.objects_dir):
+            os.makedirs(self.objects_dir)
+        self._index = self.__load_index()
+        for entry in self._index.values():
+            self.__acquire(entry)
+
+    def get(self, url, **kwargs):
+        """ Fetch the given URL, from the cache when possible
+
+        :param url: the URL to fetch
+        :type url: str
+        :param kwargs: extra arguments given to transport.get on a miss
+        :return: a requests.Response or a CachedResponse
+        """
+        key = canonical_url(url)
+
+        with self._lock:
+            entry = self._index.get(key)
+            content = self.__read(entry) if entry is not None else None
+            if content is not None and time.time() - entry["fetched"] < self.ttl:
+                self.hits += 1
+                self.__touch(key)
+                return CachedResponse(url, content, entry)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if content is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = transport.get(url, headers=headers, **kwargs)
+
+        with self._lock:
+            if content is not None and response.status_code == 304:
+                self.hits += 1
+                self.revalidated += 1
+                # the entry may have been invalidated or replaced during the request
+                if self._index.get(key) is entry:
+                    entry["fetched"] = time.time()
+                    self.__touch(key)
+                    self.__changed()
+                return CachedResponse(url, content, entry)
+
+            self.misses += 1
+            if response.status_code == 200:
+                self.__store(key, response)
+        return response
+
+    def stats(self):
+        """ Report the cache counters
+
+        :return: a dictionary with the hits, misses, revalidations, entries and stored bytes
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "entries": len(self._index),
+                "size": self._size
+            }
+
+    def invalidate(self, url):
+        """ Drop the entry of the given URL so that the next get refetches it
+
+        :param url: the URL to forget
+        :type url: str
+        """
+        with self._lock:
+            entry = self._index.pop(canonical_url(url), None)
+            if entry is not None:
+                self.__release(entry)
+                self.__changed()
+
+    def clear(self):
+        """ Remove every entry and stored body, and reset the counters
+        """
+        with self._lock:
+            entries = list(self._index.values())
+            self._index = OrderedDict()
+            for entry in entries:
+                self.__release(entry)
+            self.hits = self.misses = self.revalidated = 0
+            self.flush(force=True)
+
+    def flush(self, force=False):
+        """ Write the index if it changed since it was last written
+
+        :param force: write the index even if it did not change
+        """
+        with self._lock:
+            if self._dirty or force:
+                self.__write(self.index_file, json.dumps(self._index).encode("utf-8"))
+                self._dirty = False
+                self._saved = time.time()
+
+    def __store(self, key, response):
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        object_file = os.path.join(self.objects_dir, digest)
+        if not os.path.exists(object_file):
+            self.__write(object_file, content)
+
+        previous = self._index.get(key)
+        self._index[key] = {
+            "hash": digest,
+            "size": len(content),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "encoding": response.encoding,
+            "fetched": time.time(),
+            "accessed": time.time()
+        }
+        self._index.move_to_end(key)
+        self.__acquire(self._index[key])
+        if previous is not None:
+            self.__release(previous)
+        self.__evict()
+        self.__changed()
+
+    def __evict(self):
+        while len(self._index) > 1 and self._size > self.max_size:
+            key, entry = self._index.popitem(last=False)
+            self.__release(entry)
+
+    def __acquire(self, entry):
+        """ Count a new index entry pointing to a stored body """
+        digest = entry["hash"]
+        self._references[digest] = self._references.get(digest, 0) + 1
+        if self._references[digest] == 1:
+            self._sizes[digest] = entry["size"]
+            self._size += entry["size"]
+
+    def __release(self, entry):
+        """ Forget an index entry, and delete its stored body once no entry points to it """
+        digest = entry["hash"]
+        self._references[digest] -= 1
+        if self._references[digest] > 0:
+            return
+        del self._references[digest]
+        self._size -= self._sizes.pop(digest)
+        try:
+            os.remove(os.path.join(self.objects_dir, digest))
+        except OSError:
+            pass
+
+    def __changed(self):
+        """ Mark the index as changed, and write it if it was not written recently """
+        self._dirty = True
+        if time.time() - self._saved >= self.save_interval:
+            self.flush()
+
+    def __touch(self, key):
+        self._index[key]["accessed"] = time.time()
+        self._index.move_to_end(key)
+        self._dirty = True
+
+    def __read(self, entry):
+        try:
+            with open(os.path.join(self.objects_dir, entry["hash"]), "rb") as object_file:
+                return object_file.read()
+        except OSError:
+            return None
+
+    def __load_index(self):
+        try:
+            with open(self.index_file) as index_file:
+                entries = json.load(index_file)
+        except (OSError, ValueError):
+            return OrderedDict()
+        return OrderedDict(sorted(entries.items(), key=lambda item: item[1]["accessed"]))
+
+    @staticmethod
+    def __write(file_name, content):
+        temporary_file = file_name + ".tmp"
+        with open(temporary_file, "wb") as output_file:
+            output_file.write(content)
+        os.replace(temporary_file, file_name)
+
+
+def configure_cache(directory, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE):
+    """ Enable the shared cache used by every schema and context fetch
+
+    :param directory: the directory where the cache is stored
+    :type directory: str
+    :param ttl: the number of seconds an entry is served without revalidation
+    :type ttl: int
+    :param max_size: the maximum number of bytes of stored bodies
+    :type max_size: int
+    :return: the shared HTTPCache
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.flush()
+        _cache = HTTPCache(directory, ttl, max_size)
+        return _cache
+
+
+def disable_cache():
+    """ Disable the shared cache, fetches go straight to the network again
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.flush()
+        _cache = None
+
+
+@atexit.register
+def flush_cache():
+    """ Write the index of the shared cache if it changed, done when the process exits
+    """
+    with _cache_lock:
+        if _cache is not None:
+            _cache.flush()
+
+
+def get_cache():
+    """ Return the shared cache. It is disabled unless configure_cache() was called or the
+    JSONLDSCHEMA_CACHE_DIR environment variable points to a directory
+
+    :return: the shared HTTPCache or None
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None and os.environ.get(CACHE_DIR_VARIABLE):
+            _cache = HTTPCache(os.environ[CACHE_DIR_VARIABLE])
+        return _cache
+
+
+def cached_get(url, **kwargs):
+    """ GET the given URL through the shared cache when it is enabled
+
+    :param url: the URL to fetch
+    :type url: str
+    :param kwargs: extra arguments given to transport.get
+    :return: a requests.Response or a CachedResponse
+    """
+    cache = get_cache()
+    if cache is None:
+        return transport.get(url, **kwargs)
+    return cache.get(url, **kwargs)
@@ -0,0 +1,76 @@
+from collections import namedtuple
+from urllib.parse import urlparse
+
+ABSOLUTE_SCHEMES = ('http', 'https')
+
+CompactIRI = namedtuple('CompactIRI', ['prefix', 'reference', 'iri'])
+
+
+class IRIExpander:
+    """ Expands the compact IRIs (eg: "sdo:name") of a JSON-LD context. The prefix table of the
+    context is compiled once and every parsed value is memoized: an expander can be kept for
+    as long as its context is not modified (see get_expander), and must be dropped with it.
+
+    :param context: the content of the context (without the "@context" key)
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self.prefixes = dict((term, value) for term, value in context.items()
+                             if isinstance(value, str))
+        self.parsed = {}
+
+    def parse(self, value):
+        """ Parses a value of the context
+
+        :param value: an absolute IRI (http or https) or a compact IRI
+        :return: a CompactIRI with the prefix (the URL scheme for absolute IRIs), the reference
+            (the part following the prefix, up to the next ":", or None without prefix) and the
+            expanded IRI (None when the prefix is not in the context)
+        """
+        try:
+            return self.parsed[value]
+        except KeyError:
+            pass
+
+        prefix = urlparse(value).scheme
+        reference = value.split(":")[1] if ":" in value else None
+        if prefix in ABSOLUTE_SCHEMES:
+            iri = value
+        elif prefix in self.prefixes:
+            iri = value.replace(prefix + ":", self.prefixes[prefix])
+        else:
+            iri = None
+
+        parsed = CompactIRI(prefix, reference, iri)
+        self.parsed[value] = parsed
+        return parsed
+
+    def expand(self, value):
+        """ Expands a compact IRI, absolute IRIs are returned as they are
+
+        :param value: an absolute IRI (http or https) or a compact IRI
+        :return: the expanded IRI
+        :raise KeyError: when the prefix is not defined in the context
+        """
+        parsed = self.parse(value)
+        if parsed.iri is None:
+            raise KeyError(parsed.prefix)
+        return parsed.iri
+
+
+def get_expander(expanders, name, context):
+    """ Returns the expander of a context from the given cache, creating it on first use. The
+    cache must be dropped, or the entry removed, when the context is modified
+
+    :param expanders: a dictionary of context names and their expander, or None to create an
+        expander that is not cached
+    :param name: the name of the context (eg: the name of the schema it is bound to)
+    :param context: the content of the context (without the "@context" key)
+    :return: the IRIExpander of the context
+    """
+    if expanders is None:
+        return IRIExpander(context)
+    if name not in expanders:
+        expanders[name] = IRIExpander(context)
+    return expanders[name]
@@ -0,0 +1,150 @@
+import json
+import mmap
+import os
+import re
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+from utils.http_cache import canonical_url
+from utils.document_store import DocumentStore
+
+MMAP_THRESHOLD = 1024 * 1024
+# the strings (with the colon following a key) and the brackets of a JSON document
+TOKEN_PATTERN = re.compile(rb'"(?:[^"\\]|\\.)*"\s*:?|[{}\[\]]')
+ID_KEYS = (b'"id"', b'"$id"')
+
+
+class LocalSchemaIndex:
+    """ An index of the schemas of a local directory (eg: a checkout of a schema repository),
+    mapping the "id" of each schema to its file. The directory is scanned once and the
+    references are then resolved from the index without any HTTP request. The ids of the files
+    larger than MMAP_THRESHOLD bytes are found through mmap without parsing the files.
+
+    :param directory: the directory to scan, recursively
+    :param extensions: the extensions of the schema files
+    """
+
+    def __init__(self, directory, extensions=(".json",)):
+        self.directory = directory
+        self.extensions = extensions
+        self.paths = {}
+        self.duplicates = {}
+        self.documents = DocumentStore()
+        self.scan()
+
+    def scan(self):
+        """ (Re)build the index from the files of the directory
+        """
+        self.paths = {}
+        self.duplicates = {}
+        self.documents.clear()
+
+        for root, directories, files in os.walk(self.directory):
+            directories.sort()
+            for file_name in sorted(files):
+                if not file_name.endswith(self.extensions):
+                    continue
+                path = os.path.join(root, file_name)
+                schema_id = self.read_id(path)
+                if schema_id is None:
+                    continue
+                key = canonical_url(schema_id)
+                if key in self.paths:
+                    self.duplicates.setdefault(key, []).append(path)
+                else:
+                    self.paths[key] = path
+
+    def __contains__(self, uri):
+        return canonical_url(uri) in self.paths
+
+    def __len__(self):
+        return len(self.paths)
+
+    def path(self, uri):
+        """ Return the file of the given schema id
+
+        :param uri: the id (or a reference) of the schema
+        :return: the path of the file
+        """
+        try:
+            return self.paths[canonical_url(uri)]
+        except KeyError:
+            raise KeyError("No schema with the id " + uri + " in " + self.directory)
+
+    def load(self, uri):
+        """ Load and parse the schema of the given id, or of the given file:// URI
+
+        :param uri: the id (or a reference) of the schema, or a file:// URI
+        :return: the parsed schema
+        """
+        if uri not in self and urlsplit(uri).scheme == "file":
+            return self.documents.get_or_load(uri, lambda file_uri: self.read_document(
+                url2pathname(urlsplit(file_uri).path)))
+        return self.documents.get_or_load(uri, lambda schema_id: self.read_document(
+            self.path(schema_id)))
+
+    def resolver_handlers(self):
+        """ Build the RefResolver handlers that resolve every reference from the index
+
+        :return: a dictionary of URL schemes and their handler
+        """
+        return {"http": self.load, "https": self.load, "file": self.load}
+
+    @staticmethod
+    def read_id(path):
+        """ Find the id of a schema file: the first "id" or "$id" string of the root object.
+        Small files are parsed, larger ones are scanned without building their content.
+
+        :param path: the path of the schema file
+        :return: the id or None
+        """
+        with open(path, "rb") as schema_file:
+            if os.fstat(schema_file.fileno()).st_size >= MMAP_THRESHOLD:
+                with mmap.mmap(schema_file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                    return find_root_id(content)
+            try:
+                schema = json.load(schema_file)
+            except ValueError:
+                return None
+        if isinstance(schema, dict):
+            for key, value in schema.items():
+                if key in ("id", "$id") and isinstance(value, str):
+                    return value
+        return None
+
+    @staticmethod
+    def read_document(path):
+        """ Parse a schema file
+
+        :param path: the path of the schema file
+        :return: the parsed schema
+        """
+        with open(path, "rb") as schema_file:
+            return json.load(schema_file)
+
+
+def find_root_id(content):
+    """ Find the first "id" or "$id" string of the root object of a JSON document, by walking
+    its strings and brackets only, so that large documents are not built in memory
+
+    :param content: the JSON document, as bytes or a buffer (eg: an mmap)
+    :return: the id or None
+    """
+    depth = 0
+    id_value = False
+    for match in TOKEN_PATTERN.finditer(content):
+        token = match.group()
+        if id_value and token[:1] == b'"' and not token.endswith(b':'):
+            return json.loads(token.decode("utf-8"))
+        id_value = False
+
+        if token in (b'{', b'['):
+            if depth == 0 and token == b'[':
+                return None
+            depth += 1
+        elif token in (b'}', b']'):
+            depth -= 1
+            if depth == 0:
+                return None
+        elif depth == 1 and token.endswith(b':'):
+            id_value = token[:-1].rstrip() in ID_KEYS
+    return None
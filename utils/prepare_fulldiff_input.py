@@ -1,35 +1,66 @@
 import json
-import requests
+import logging
 import os
+from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlparse
 from jsonschema.validators import RefResolver
 from utils.compile_schema import SchemaKey, get_name
+from utils.http_cache import cached_get, get_cache
+from utils.document_store import resolver_handlers, get_document_store
+from utils.schema_graph import SchemaGraph, iter_references
+from utils.aio import run_sync, run_blocking, gather_blocking
 
 mapping_dir = os.path.join(os.path.dirname(__file__), "../tests/data")
+DEFAULT_WORKERS = 8
+DEFAULT_NETWORK_WORKERS = 4
+DEFAULT_TIMEOUT = 30
 
 
-def prepare_multiple_input(networks_mapping):
+def prepare_multiple_input(networks_mapping, max_workers=DEFAULT_NETWORK_WORKERS,
+                           progress_callback=None):
+    """ Function to help preparing the full_diff input of several networks. The networks are
+    resolved and their contexts loaded in parallel, the output keeps the order of the input.
 
-    networks = []
+    :param networks_mapping: a list of [schema URL, mapping file name] pairs
+    :param max_workers: the maximum number of networks prepared at the same time
+    :param progress_callback: a function called with the number of networks prepared, the
+        total number of networks and the name of the last prepared network
+    :return: a list of fully prepared networks ready to be used by full_diff
+    """
+    networks = [None] * len(networks_mapping)
 
-    for network in networks_mapping:
-        mapping_file = os.path.join(mapping_dir, network[1])
-        try:
-            with open(mapping_file) as mapper:
-                mapping = json.load(mapper)
-                mapper.close()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = dict((pool.submit(prepare_network, network), position)
+                       for position, network in enumerate(networks_mapping))
+        for done, future in enumerate(as_completed(futures), 1):
+            networks[futures[future]] = future.result()
+            if progress_callback is not None:
+                progress_callback(done, len(networks), networks[futures[future]]['name'])
 
-                resolved_network = {
-                    "schemas": resolve_network(network[0]),
-                    "name": mapping["networkName"],
-                    "contexts": load_context(mapping)
-                }
+    return networks
 
-                networks.append(resolved_network)
 
-        except FileNotFoundError:
-            raise FileNotFoundError("Error with one of your context file")
+def prepare_network(network):
+    """ Resolves a network and loads its contexts
 
-    return networks
+    :param network: a [schema URL, mapping file name] pair
+    :return: the resolved network, its name and its contexts
+    """
+    mapping_file = os.path.join(mapping_dir, network[1])
+    try:
+        with open(mapping_file) as mapper:
+            mapping = json.load(mapper)
+            mapper.close()
+
+            return {
+                "schemas": resolve_network(network[0]),
+                "name": mapping["networkName"],
+                "contexts": load_context(mapping)
+            }
+
+    except FileNotFoundError:
+        raise FileNotFoundError("Error with one of your context file")
 
 
 def prepare_input(schema_1_url, schema_2_url, mapping_1, mapping_2):
@@ -56,62 +87,362 @@ def prepare_input(schema_1_url, schema_2_url, mapping_1, mapping_2):
 
 
 def load_context(context):
-    """ Load the context variable from the given URL mapping
+    """ Load the context variable from the given URL mapping. The contexts that could not be
+    loaded are logged and left out, see load_context_with_report
 
     :param context: a mapping of context URL
     :return: a context variable
     """
+    return run_sync(load_context_async(context))
+
+
+async def load_context_async(context):
+    """ Asynchronous version of load_context
+
+    :param context: a mapping of context URL
+    :return: a context variable
+    """
+    full_context, failures = await load_context_with_report_async(context)
+
+    for schema in failures:
+        logging.warning("Could not load the context of %s from %s: %s",
+                        schema, failures[schema]['url'], failures[schema]['message'])
+
+    return full_context
+
+
+def load_context_with_report(context, max_workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT):
+    """ Load the context variable from the given URL mapping, fetching the contexts
+    concurrently
+
+    :param context: a mapping of context URL
+    :param max_workers: the maximum number of contexts fetched at the same time
+    :param timeout: the number of seconds to wait for each context
+    :return: a context variable and a dictionary of the schemas whose context could not be
+        loaded, with the context URL, the error type and its message
+    """
+    return run_sync(load_context_with_report_async(context, max_workers, timeout))
+
+
+async def load_context_with_report_async(context, max_workers=DEFAULT_WORKERS,
+                                         timeout=DEFAULT_TIMEOUT):
+    """ Asynchronous version of load_context_with_report
+
+    :param context: a mapping of context URL
+    :param max_workers: the maximum number of contexts fetched at the same time
+    :param timeout: the number of seconds to wait for each context
+    :return: a context variable and a dictionary of the schemas whose context could not be
+        loaded, with the context URL, the error type and its message
+    """
     full_context = {}
+    failures = {}
 
-    for schema in context['contexts']:
+    def fetch(schema):
         try:
-            context_content = requests.get(context['contexts'][schema])
-            full_context[schema] = json.loads(context_content.text)['@context']
-        except Exception:
-            pass
+            context_content = cached_get(context['contexts'][schema], timeout=timeout)
+            return json.loads(context_content.text)['@context'], None
+        except Exception as e:
+            return None, {
+                "url": context['contexts'][schema],
+                "error": type(e).__name__,
+                "message": str(e)
+            }
+
+    schemas = list(context['contexts'])
+    results = await gather_blocking(fetch, schemas, max_workers)
+    for schema, (loaded, failure) in zip(schemas, results):
+        if failure is None:
+            full_context[schema] = loaded
+        else:
+            failures[schema] = failure
+
+    return full_context, failures
+
+
+def resolve_network(schema_location, max_workers=DEFAULT_WORKERS, index=None):
+    """ Resolves all the schemas referenced, directly or not, by the given schema. The
+    schemas are copies of the documents held by the document store, the caller can modify them.
+
+    :param schema_location: a schema URL (http, https or file)
+    :param max_workers: the maximum number of references fetched at the same time
+    :param index: a LocalSchemaIndex to resolve the schemas from, without any HTTP request
+    :return: a dictionary of schema names and their content
+    """
+    return run_sync(resolve_network_async(schema_location, max_workers, index))
 
-    return full_context
 
+async def resolve_network_async(schema_location, max_workers=DEFAULT_WORKERS, index=None):
+    """ Asynchronous version of resolve_network
 
-def resolve_network(schema_location):
+    :param schema_location: a schema URL (http, https or file)
+    :param max_workers: the maximum number of references fetched at the same time
+    :param index: a LocalSchemaIndex to resolve the schemas from, without any HTTP request
+    :return: a dictionary of schema names and their content
+    """
     if schema_location.startswith("http://") or schema_location.startswith("https://"):
-        return resolve_network_url(schema_location)
+        return await resolve_network_url_async(schema_location, max_workers, index)
     elif schema_location.startswith("file://"):
-        return resolve_network_file(schema_location)
+        return await resolve_network_file_async(schema_location, max_workers, index)
 
 
-def resolve_network_file(schema_file):
+def resolve_network_file(schema_file, max_workers=DEFAULT_WORKERS, index=None):
+    """ Function that triggers the crawl_schema_refs function on a local file
+
+    :param schema_file: a schema file URL (file://)
+    :param max_workers: the maximum number of references fetched at the same time
+    :param index: a LocalSchemaIndex to resolve the references from, by schema id
+    :return: a fully resolved network
+    """
+    return run_sync(resolve_network_file_async(schema_file, max_workers, index))
+
+
+async def resolve_network_file_async(schema_file, max_workers=DEFAULT_WORKERS, index=None):
+    """ Asynchronous version of resolve_network_file
+
+    :param schema_file: a schema file URL (file://)
+    :param max_workers: the maximum number of references fetched at the same time
+    :param index: a LocalSchemaIndex to resolve the references from, by schema id
+    :return: a fully resolved network
+    """
     network_schemas = {}
     try:
         with open(schema_file.replace("file:/", '')) as f:
             schema_content = json.load(f)
-            network_schemas[get_name(schema_content['id'])] = schema_content
-            resolver = RefResolver(schema_file, schema_content, store={})
-            return resolve_schema_ref(schema_content, resolver, network_schemas)
+        network_schemas[get_name(schema_content['id'])] = schema_content
+        if index is not None:
+            resolver = RefResolver(schema_content['id'], schema_content, store={},
+                                   handlers=index.resolver_handlers())
+        else:
+            resolver = RefResolver(schema_file, schema_content, store={},
+                                   handlers=resolver_handlers())
+        return await crawl_schema_refs_async(schema_content, resolver, network_schemas,
+                                             max_workers)
     except Exception as e:
         raise Exception("There is a problem with your url or schema: ", schema_file, ", ", e)
 
 
-def resolve_network_url(schema_url):
-    """ Function that triggers the resolved_schema_ref function
+def resolve_network_url(schema_url, max_workers=DEFAULT_WORKERS, index=None):
+    """ Function that triggers the crawl_schema_refs function
+
+    :param schema_url: a schema URL
+    :param max_workers: the maximum number of references fetched at the same time
+    :param index: a LocalSchemaIndex to load the schemas from instead of fetching them
+    :return: a fully resolved network
+    """
+    return run_sync(resolve_network_url_async(schema_url, max_workers, index))
+
+
+async def resolve_network_url_async(schema_url, max_workers=DEFAULT_WORKERS, index=None):
+    """ Asynchronous version of resolve_network_url
 
     :param schema_url: a schema URL
+    :param max_workers: the maximum number of references fetched at the same time
+    :param index: a LocalSchemaIndex to load the schemas from instead of fetching them
     :return: a fully resolved network
     """
     network_schemas = {}
     try:
-        schema_content = json.loads(requests.get(schema_url).text)
+        if index is not None:
+            schema_content = deepcopy(await run_blocking(index.load, schema_url))
+            handlers = index.resolver_handlers()
+        else:
+            schema_content = json.loads((await run_blocking(cached_get, schema_url)).text)
+            handlers = resolver_handlers()
         network_schemas[get_name(schema_content['id'])] = schema_content
-        resolver = RefResolver(schema_url, schema_content, store={})
-        return resolve_schema_ref(schema_content, resolver, network_schemas)
+        resolver = RefResolver(schema_url, schema_content, store={}, handlers=handlers)
+        return await crawl_schema_refs_async(schema_content, resolver, network_schemas,
+                                             max_workers)
     except Exception as e:
         raise Exception("There is a problem with your url or schema", schema_url, "exception ", e)
 
 
+def re_resolve_network(schema_location, network, changed, max_workers=DEFAULT_WORKERS):
+    """ Updates a previously resolved network after some of its schemas changed. Only the
+    changed schemas are refetched (bypassing the HTTP cache and the document store) and only
+    the references they add are crawled, the other schemas are reused as they are. Schemas that
+    are no longer reachable from the root are removed.
+
+    :param schema_location: the URL (http, https or file) the network was resolved from
+    :param network: the previously resolved network
+    :param changed: the URLs or names of the schemas that changed, the names are loaded from
+        the URL matching their id (see get_schema_url)
+    :param max_workers: the maximum number of references fetched at the same time
+    :return: the updated network and a report of the reused, refetched, added and removed
+        schema names
+    """
+    network_schemas = {}
+    handlers = resolver_handlers()
+    root_name = get_root_name(schema_location, network, handlers)
+    root_id = network.get(root_name, {}).get('id', schema_location)
+    schema_urls = dict((name, get_schema_url(schema_location, root_id, schema['id']))
+                       for name, schema in network.items() if 'id' in schema)
+    url_names = dict((url, name) for name, url in schema_urls.items())
+
+    changed_names = []
+    changed_urls = []
+    for location in changed:
+        if urlparse(location).scheme != '':
+            changed_names.append(url_names.get(location.split('#')[0], get_name(location)))
+            changed_urls.append(location)
+        else:
+            changed_names.append(get_name(location))
+            changed_urls.append(schema_urls.get(get_name(location),
+                                                urljoin(schema_location, location)))
+
+    for name, schema in network.items():
+        if name not in changed_names:
+            network_schemas[name] = schema
+
+    cache = get_cache()
+    store = get_document_store()
+    for url in changed_urls:
+        if cache is not None:
+            cache.invalidate(url)
+        store.pop(url, None)
+
+    refetched = []
+    for name, url in zip(changed_names, changed_urls):
+        try:
+            schema = deepcopy(handlers[urlparse(url).scheme](url))
+        except Exception as e:
+            raise Exception("There is a problem with your url or schema", url, "exception ", e)
+        if name == root_name and 'id' in schema:
+            root_name = get_name(schema['id'])
+        name = get_name(schema['id']) if 'id' in schema else name
+        network_schemas[name] = schema
+        refetched.append(name)
+
+    resolver = RefResolver(schema_location, network_schemas.get(root_name, {}), store={},
+                           handlers=handlers)
+
+    for name in refetched:
+        crawl_schema_refs(network_schemas[name], resolver, network_schemas, max_workers)
+
+    reachable = SchemaGraph(network_schemas).reachable(root_name)
+    for name in list(network_schemas):
+        if name not in reachable:
+            del network_schemas[name]
+
+    report = {
+        "reused": [name for name in network_schemas
+                   if name in network and name not in refetched],
+        "refetched": [name for name in refetched if name in network_schemas],
+        "added": [name for name in network_schemas
+                  if name not in network and name not in refetched],
+        "removed": [name for name in network if name not in network_schemas]
+    }
+    return network_schemas, report
+
+
+def get_root_name(schema_location, network, handlers):
+    """ Finds the name of the root of a network: the schema whose id is its location or,
+    when the network was resolved from another location than its ids (eg: a local copy),
+    the name of the id of the document at that location
+
+    :param schema_location: the URL (http, https or file) the network was resolved from
+    :param network: the resolved network
+    :param handlers: the RefResolver handlers loading the documents
+    :return: the name of the root schema in the network
+    """
+    location = schema_location.split('#')[0]
+    for name, schema in network.items():
+        if schema.get('id', '').split('#')[0] == location:
+            return name
+    try:
+        root = handlers[urlparse(location).scheme](location)
+    except Exception as e:
+        raise Exception("There is a problem with your url or schema", location, "exception ", e)
+    return get_name(root.get('id', location))
+
+
+def get_schema_url(schema_location, root_id, schema_id):
+    """ Computes the URL a schema of a network is loaded from. The references of a network are
+    resolved relative to the location of its root, so a schema whose id is under the id of the
+    root is loaded from the same path under that location, any other id is loaded as it is
+
+    :param schema_location: the URL (http, https or file) the network was resolved from
+    :param root_id: the id of the root schema of the network
+    :param schema_id: the id of the schema
+    :return: the URL of the schema
+    """
+    root_id = root_id.split('#')[0]
+    schema_id = schema_id.split('#')[0]
+    root_directory = root_id[:root_id.rfind('/') + 1]
+    if root_directory != '' and schema_id.startswith(root_directory):
+        return urljoin(schema_location, schema_id[len(root_directory):])
+    return schema_id
+
+
+def get_external_refs(schema):
+    """ Collects the external references ($ref not starting with '#') of a schema, looking in
+    the same places as resolve_schema_ref but without following the references
+
+    :param schema: the schema to inspect
+    :return: a list of references, in document order and without duplicates
+    """
+    references = []
+    for pointer, reference in iter_references(schema):
+        if reference not in references:
+            references.append(reference)
+    return references
+
+
+def crawl_schema_refs(schema, resolver, network, max_workers=DEFAULT_WORKERS, graph=None):
+    """ Resolves the references in the schemas level by level and add them to the network.
+    At each level, every reference that is not in the network yet is fetched concurrently,
+    at most max_workers at the same time. The output is the same as resolve_schema_ref, except
+    that the schemas added to the network are copies of the resolved documents.
+
+    :param schema: the schema to resolve
+    :param resolver: the refResolver object
+    :param network: the network to add the schemas to
+    :param max_workers: the maximum number of references fetched at the same time
+    :param graph: a SchemaGraph filled with the crawled schemas and their references
+    :return: a fully processed network with resolved ref
+    """
+    return run_sync(crawl_schema_refs_async(schema, resolver, network, max_workers, graph))
+
+
+async def crawl_schema_refs_async(schema, resolver, network, max_workers=DEFAULT_WORKERS,
+                                  graph=None):
+    """ Asynchronous version of crawl_schema_refs
+
+    :param schema: the schema to resolve
+    :param resolver: the refResolver object
+    :param network: the network to add the schemas to
+    :param max_workers: the maximum number of references fetched at the same time
+    :param graph: a SchemaGraph filled with the crawled schemas and their references
+    :return: a fully processed network with resolved ref
+    """
+    if graph is None:
+        graph = SchemaGraph()
+    frontier = [graph.add_schema(get_name(schema.get('id', '')), schema)]
+
+    while frontier:
+        references = []
+        for schema_references in frontier:
+            for reference in schema_references:
+                if reference.ref.replace('#', '') not in network \
+                        and reference.ref not in references:
+                    references.append(reference.ref)
+
+        frontier = []
+        for resolved in await gather_blocking(lambda ref: resolver.resolve(ref)[1],
+                                              references, max_workers):
+            if not isinstance(resolved, Exception) \
+                    and get_name(resolved['id']) not in network:
+                # the resolved documents are shared with the document store
+                network[get_name(resolved['id'])] = deepcopy(resolved)
+                frontier.append(graph.add_schema(get_name(resolved['id']),
+                                                 network[get_name(resolved['id'])]))
+
+    return network
+
+
 def resolve_schema_ref(schema, resolver, network):
     """ Recursively resolves the references in the schemas and add them to the network
 
-    .. warning:: use resolve network instead
+    .. warning:: use resolve network or crawl_schema_refs instead
 
     :param schema: the schema to resolve
     :param resolver: the refResolver object
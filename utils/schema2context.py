@@ -1,11 +1,14 @@
 from collections import OrderedDict
-from urllib.parse import urlparse, quote_plus
-from copy import deepcopy
+from urllib.parse import quote_plus
 import requests
 import json
 import re
 import os
-from utils.prepare_fulldiff_input import resolve_network
+from utils.prepare_fulldiff_input import resolve_network, DEFAULT_WORKERS
+from utils.http_cache import cached_get
+from utils import transport
+from utils.aio import run_sync, gather_blocking
+from utils.iri_expander import ABSOLUTE_SCHEMES, get_expander
 
 
 def get_json_from_url(json_url):
@@ -16,7 +19,7 @@ def get_json_from_url(json_url):
     :return: a dictionary with the json content
     """
     try:
-        response = requests.get(json_url)
+        response = cached_get(json_url)
         if response.status_code == 200:
             json_dict = json.loads(response.text)
             return json_dict
@@ -96,13 +99,31 @@ def create_network_context(mapping, semantic_types):
     :type semantic_types: dict
     :return: the resolved contexts
     """
+    return run_sync(create_network_context_async(mapping, semantic_types))
+
+
+async def create_network_context_async(mapping, semantic_types, max_workers=DEFAULT_WORKERS):
+    """ Asynchronous version of create_network_context, the schemas are fetched concurrently
+
+    :param mapping: a file containing a mapping dict {"schemaName": "schemaURL"}
+    :type mapping: dict
+    :param semantic_types: a mapping dict of ontologies {"ontologyName": "Ontology URL"}
+    :type semantic_types: dict
+    :param max_workers: the maximum number of schemas fetched at the same time
+    :type max_workers: int
+    :return: the resolved contexts
+    """
 
     contexts = {}
+    schema_names = list(mapping['schemas'])
+    local_contexts = await gather_blocking(
+        lambda schema_name: create_context_template_from_url(mapping['schemas'][schema_name],
+                                                             semantic_types),
+        schema_names, max_workers)
+
     # For each schema
-    for schema_name in mapping['schemas']:
+    for schema_name, local_context in zip(schema_names, local_contexts):
         contexts[schema_name] = {}
-        schema_url = mapping['schemas'][schema_name]
-        local_context = create_context_template_from_url(schema_url, semantic_types)
         for context_type in local_context:
             contexts[schema_name][context_type] = local_context[context_type]
     return contexts
@@ -236,23 +257,47 @@ def generate_context_mapping(schema_url, regex_input):
         raise e
 
 
-def generate_labels_from_contexts(contexts, labels):
+def generate_labels_from_contexts(contexts, labels, expanders=None):
     """  Generate labels from given context using OLS
 
     :param contexts: a dictionary containing contexts associated to schema names
     :type contexts: dict
     :param labels: pre-existing labels to avoid triggering twice the same query
     :type labels: dict
+    :param expanders: a dictionary caching the IRIExpander of each context by schema name
+        (see utils.iri_expander.get_expander)
+    :type expanders: dict
+    :return: labels
+    """
+    return run_sync(generate_labels_from_contexts_async(contexts, labels, expanders=expanders))
+
+
+async def generate_labels_from_contexts_async(contexts, labels, max_workers=DEFAULT_WORKERS,
+                                              expanders=None):
+    """ Asynchronous version of generate_labels_from_contexts, the OLS queries are sent
+    concurrently
+
+    :param contexts: a dictionary containing contexts associated to schema names
+    :type contexts: dict
+    :param labels: pre-existing labels to avoid triggering twice the same query
+    :type labels: dict
+    :param max_workers: the maximum number of OLS queries sent at the same time
+    :type max_workers: int
+    :param expanders: a dictionary caching the IRIExpander of each context by schema name
+        (see utils.iri_expander.get_expander)
+    :type expanders: dict
     :return: labels
     """
 
     ignored_keys = ["@language"]
+    queries = OrderedDict()
 
     # For each schema
     for schemaName in contexts:
-        local_context = deepcopy(contexts[schemaName])
+        local_context = contexts[schemaName]
         local_context = local_context["@context"] \
             if ("@context" in local_context) else local_context
+        expander = get_expander(expanders, schemaName, local_context)
 
         # For each team in that schema
         for term in local_context:
@@ -262,40 +307,43 @@ def generate_labels_from_contexts(contexts, labels):
             if term not in ignored_keys:
 
                 # if the terms exists (is not none or blank) and hasn't already been processed
-                if local_context[term] and local_context[term] not in labels.keys():
+                if local_context[term] and local_context[term] not in labels.keys() \
+                        and local_context[term] not in queries:
+                    parsed_term = expander.parse(local_context[term])
 
                     # if we have a direct URL
-                    if urlparse(deepcopy(local_context[term])).scheme in ['http', 'https']:
+                    if parsed_term.prefix in ABSOLUTE_SCHEMES:
                         term_url = local_context[term]
 
                     # if we have an identifier
                     else:
-                        url_param = deepcopy(local_context[term]).split(":")
 
                         # the identifier is an EDAM term
-                        if url_param[0] == "edam":
+                        if parsed_term.prefix == "edam":
                             base_request_url = "https://www.ebi.ac.uk/ols/api/ontologies/" \
                                                "edam/terms/"
 
                         # the identifier is not an EDAM term
                         else:
-                            url_sub_params = url_param[1].split("_")[0]
+                            url_sub_params = parsed_term.reference.split("_")[0]
                             base_request_url += url_sub_params + "/terms/"
-                        term_url = local_context[url_param[0]] + url_param[1]
+                        term_url = expander.expand(local_context[term])
 
                     # Double quote plus the URL or OLS won't work (??)
                     term_safe_url = quote_plus(quote_plus(term_url))
-                    local_request_url = base_request_url + term_safe_url
-                    resp = requests.get(local_request_url)
+                    queries[local_context[term]] = base_request_url + term_safe_url
 
-                    if resp.status_code == 200:
-                        if "label" in json.loads(resp.text).keys():
-                            labels[local_context[term]] = json.loads(resp.text)["label"]
-                        else:
-                            labels[local_context[term]] = None
+    responses = await gather_blocking(transport.get, list(queries.values()), max_workers)
 
-                    else:
-                        labels[local_context[term]] = None
+    for term, resp in zip(queries, responses):
+        if resp.status_code == 200:
+            if "label" in json.loads(resp.text).keys():
+                labels[term] = json.loads(resp.text)["label"]
+            else:
+                labels[term] = None
+
+        else:
+            labels[term] = None
 
     return labels
 
@@ -0,0 +1,227 @@
+from collections import namedtuple, OrderedDict
+from urllib.parse import urldefrag
+from utils.compile_schema import SchemaKey, get_name
+
+Reference = namedtuple('Reference', ['source', 'pointer', 'ref', 'target'])
+
+
+def iter_references(schema, pointer='', external_only=True):
+    """ Walks a schema once and yields the location of each $ref, looking in properties,
+    definitions, anyOf/oneOf/allOf and items
+
+    :param schema: the schema (or portion of schema) to walk
+    :param pointer: the JSON pointer of the given schema inside its document
+    :param external_only: skip the local references (starting with '#')
+    :return: a generator of (pointer, ref) tuples in document order
+    """
+    stack = [(schema, pointer)]
+
+    while stack:
+        item, path = stack.pop()
+        children = []
+
+        if SchemaKey.ref in item \
+                and not (external_only and item[SchemaKey.ref].startswith('#')):
+            yield path, item[SchemaKey.ref]
+
+        for container in [SchemaKey.properties, SchemaKey.definitions]:
+            if container in item:
+                for k, val in item[container].items():
+                    children.append((val, path + '/' + container + '/' + escape_pointer(k)))
+
+        for pattern in SchemaKey.sub_patterns:
+            if pattern in item:
+                for i, val in enumerate(item[pattern]):
+                    children.append((val, path + '/' + pattern + '/' + str(i)))
+
+        if SchemaKey.items in item and isinstance(item[SchemaKey.items], dict):
+            children.append((item[SchemaKey.items], path + '/items'))
+
+        stack.extend(reversed(children))
+
+
+def escape_pointer(key):
+    """ Escape a key to be used in a JSON pointer """
+    return key.replace('~', '~0').replace('/', '~1')
+
+
+def reference_target(ref):
+    """ Return the name of the schema targeted by a $ref (eg: 'item_schema.json') """
+    return get_name(urldefrag(ref)[0])
+
+
+class SchemaGraph:
+    """ An index of the $ref dependencies of a network of schemas, built in one pass over the
+    network. It stores the location of every reference, the adjacency lists and reverse edges
+    between schemas and computes the topological order and cycles on demand.
+
+    :param network: a dictionary of schema names and their content
+    """
+
+    def __init__(self, network=None):
+        self.schemas = OrderedDict()
+        self.references = OrderedDict()
+        self.edges = OrderedDict()
+        self.reverse_edges = OrderedDict()
+        self._order = None
+        self._cycles = None
+
+        for name, schema in (network or {}).items():
+            self.add_schema(name, schema)
+
+    def add_schema(self, name, schema):
+        """ Index a schema, replacing a previous schema of the same name
+
+        :param name: the name of the schema in the network
+        :param schema: the schema content
+        :return: the list of references found in the schema
+        """
+        if name in self.schemas:
+            self.remove_schema(name)
+
+        self.schemas[name] = schema
+        self.references[name] = [Reference(name, pointer, ref, reference_target(ref))
+                                 for pointer, ref in iter_references(schema)]
+        self.edges[name] = []
+        self.reverse_edges.setdefault(name, [])
+
+        for reference in self.references[name]:
+            if reference.target not in self.edges[name]:
+                self.edges[name].append(reference.target)
+                self.reverse_edges.setdefault(reference.target, []).append(name)
+
+        self._order = self._cycles = None
+        return self.references[name]
+
+    def remove_schema(self, name):
+        """ Remove a schema and its outgoing edges from the graph
+
+        :param name: the name of the schema to remove
+        """
+        for target in self.edges.pop(name, []):
+            self.reverse_edges[target].remove(name)
+        self.schemas.pop(name, None)
+        self.references.pop(name, None)
+        self._order = self._cycles = None
+
+    def dependencies(self, name):
+        """ The schemas directly referenced by the given schema """
+        return list(self.edges.get(name, []))
+
+    def dependents(self, name):
+        """ The schemas directly referencing the given schema """
+        return list(self.reverse_edges.get(name, []))
+
+    def missing(self):
+        """ The referenced schemas that are not part of the network """
+        return [name for name, sources in self.reverse_edges.items()
+                if sources and name not in self.schemas]
+
+    def reachable(self, name, reverse=False):
+        """ All the schemas reachable from the given schema (itself included), breadth first
+
+        :param name: the name of the starting schema
+        :param reverse: follow the reverse edges (schemas depending on the given one) instead
+        :return: a list of schema names
+        """
+        adjacency = self.reverse_edges if reverse else self.edges
+        visited = [name]
+        position = 0
+        while position < len(visited):
+            for target in adjacency.get(visited[position], []):
+                if target not in visited:
+                    visited.append(target)
+            position += 1
+        return visited
+
+    def topological_order(self):
+        """ The schemas ordered so that each schema comes after the schemas it references.
+        Schemas that are part of a cycle are ordered by depth-first post-order.
+
+        :return: a list of schema names
+        """
+        if self._order is None:
+            order = []
+            visited = set()
+            for root in self.schemas:
+                if root in visited:
+                    continue
+                visited.add(root)
+                stack = [(root, iter(self.edges[root]))]
+                while stack:
+                    node, targets = stack[-1]
+                    for target in targets:
+                        if target in self.schemas and target not in visited:
+                            visited.add(target)
+                            stack.append((target, iter(self.edges[target])))
+                            break
+                    else:
+                        stack.pop()
+                        order.append(node)
+            self._order = order
+        return list(self._order)
+
+    def cycles(self):
+        """ The groups of schemas that reference each other in a cycle (strongly connected
+        components with more than one schema, or a schema referencing itself)
+
+        :return: a list of lists of schema names
+        """
+        if self._cycles is None:
+            self._cycles = [component for component in self.__strongly_connected_components()
+                            if len(component) > 1
+                            or component[0] in self.edges[component[0]]]
+        return [list(component) for component in self._cycles]
+
+    def has_cycles(self):
+        return len(self.cycles()) > 0
+
+    def __strongly_connected_components(self):
+        """ Iterative Tarjan algorithm """
+        index = {}
+        low_link = {}
+        on_stack = set()
+        stack = []
+        components = []
+
+        for root in self.schemas:
+            if root in index:
+                continue
+            work = [(root, iter(self.edges[root]))]
+            index[root] = low_link[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+
+            while work:
+                node, targets = work[-1]
+                descended = False
+                for target in targets:
+                    if target not in self.schemas:
+                        continue
+                    if target not in index:
+                        index[target] = low_link[target] = len(index)
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(self.edges[target])))
+                        descended = True
+                        break
+                    elif target in on_stack:
+                        low_link[node] = min(low_link[node], index[target])
+                if descended:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low_link[parent] = min(low_link[parent], low_link[node])
+                if low_link[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(list(reversed(component)))
+
+        return components
@@ -0,0 +1,58 @@
+import marshal
+import sys
+
+SNAPSHOT_MAGIC = b"JLDSNAP"
+SNAPSHOT_VERSION = 3
+MARSHAL_VERSION = 4
+# marshal data is only readable by the interpreter (and version) that wrote it
+PYTHON_TAG = (sys.implementation.cache_tag or sys.implementation.name).encode("ascii")
+
+
+def save_snapshot(path, content):
+    """ Save JSON-like content (eg: a list of prepared networks with their schemas, contexts,
+    labels and name, or the output of FullDiffGenerator) to a compact binary snapshot.
+    The file starts with a magic string, the snapshot version, the marshal version and the tag
+    of the interpreter (eg: "cpython-311"), followed by the marshal dump of the content, left
+    uncompressed as decompressing it costs about as much as marshal saves over json. Snapshots
+    are a cache: they are only loaded by the same version of the library and of Python, from
+    a trusted location.
+
+    :param path: the path of the snapshot file
+    :param content: the content to save, made of dicts, lists, strings, numbers, booleans
+        and None
+    """
+    header = SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION, MARSHAL_VERSION, len(PYTHON_TAG)]) \
+        + PYTHON_TAG
+    payload = marshal.dumps(_plain(content), MARSHAL_VERSION)
+    with open(path, "wb") as snapshot_file:
+        snapshot_file.write(header + payload)
+
+
+def load_snapshot(path):
+    """ Load the content of a snapshot saved with save_snapshot
+
+    :param path: the path of the snapshot file
+    :return: the saved content
+    """
+    with open(path, "rb") as snapshot_file:
+        data = snapshot_file.read()
+
+    if not data.startswith(SNAPSHOT_MAGIC) or len(data) < len(SNAPSHOT_MAGIC) + 3:
+        raise ValueError("Not a snapshot file: " + path)
+    versions = len(SNAPSHOT_MAGIC)
+    header_size = versions + 3 + data[versions + 2]
+    if data[versions] != SNAPSHOT_VERSION or data[versions + 1] != MARSHAL_VERSION \
+            or data[versions + 3:header_size] != PYTHON_TAG:
+        raise ValueError("Unsupported snapshot version, please recreate " + path)
+
+    return marshal.loads(memoryview(data)[header_size:])
+
+
+def _plain(value):
+    """ Convert the OrderedDicts (and other dict or list subclasses) that marshal cannot
+    serialize to plain dicts and lists, keeping their order """
+    if isinstance(value, dict):
+        return dict((key, _plain(val)) for key, val in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_plain(val) for val in value]
+    return value
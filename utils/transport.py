@@ -0,0 +1,113 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = (5, 60)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_POOL_CONNECTIONS = 16
+DEFAULT_POOL_MAXSIZE = 8
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+class Transport:
+    """ A pooled HTTP transport shared by every module: connections are kept alive and reused,
+    at most pool_maxsize connections are opened per host, idempotent requests are retried with
+    an exponential backoff on connection errors and on the RETRY_STATUSES, and every request
+    gets a default timeout.
+
+    :param timeout: the default timeout, in seconds, or a (connect, read) tuple
+    :param retries: the maximum number of retries of a request
+    :param backoff_factor: the backoff factor between retries (0.5 waits 0.5s, 1s, 2s, ...)
+    :param pool_connections: the number of hosts whose connection pool is kept
+    :param pool_maxsize: the maximum number of connections opened per host
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE):
+        self.timeout = timeout
+        self.session = requests.Session()
+
+        retry = Retry(total=retries,
+                      backoff_factor=backoff_factor,
+                      status_forcelist=RETRY_STATUSES,
+                      allowed_methods=RETRY_METHODS,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize,
+                              max_retries=retry,
+                              pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, url, **kwargs):
+        """ Send a request, with the default timeout unless one is given
+
+        :param method: the HTTP method
+        :param url: the URL
+        :param kwargs: the arguments of requests.request
+        :return: a requests.Response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def close(self):
+        """ Close the pooled connections
+        """
+        self.session.close()
+
+
+def configure_transport(**options):
+    """ Replace the shared transport with a new one, see Transport for the options
+
+    :return: the new Transport
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
+        _transport = Transport(**options)
+        return _transport
+
+
+def get_transport():
+    """ Return the shared transport, creating it with the default options on first use
+
+    :return: the shared Transport
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport()
+        return _transport
+
+
+def request(method, url, **kwargs):
+    """ Send a request through the shared transport, same arguments as requests.request """
+    return get_transport().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    """ Send a GET request through the shared transport """
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    """ Send a POST request through the shared transport """
+    return request("POST", url, **kwargs)
+
+
+def put(url, **kwargs):
+    """ Send a PUT request through the shared transport """
+    return request("PUT", url, **kwargs)
+
+
+def delete(url, **kwargs):
+    """ Send a DELETE request through the shared transport """
+    return request("DELETE", url, **kwargs)
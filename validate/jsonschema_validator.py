@@ -5,6 +5,7 @@ from jsonschema.validators import (
      Draft4Validator, RefResolver
 )
 import logging
+from utils.document_store import resolver_handlers
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -60,7 +61,8 @@ def validate_instance(schemapath, schemafile, instancepath, instancefile, error_
     schema = json.load(schema_file)
     schema_file.close()
 
-    resolver = RefResolver('file://' + schemapath + '/' + schemafile, schema, store)
+    resolver = RefResolver('file://' + schemapath + '/' + schemafile, schema, store,
+                           handlers=resolver_handlers())
     return validate_instance_against_schema(instance, resolver, schema)
 
 
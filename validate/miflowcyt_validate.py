@@ -1,4 +1,3 @@
-import requests
 import xmljson
 import xml.etree.ElementTree as elemTree
 from json import dump, load
@@ -8,6 +7,8 @@ import json
 from collections import OrderedDict
 from jsonschema.validators import RefResolver, Draft4Validator
 from validate.jsonschema_validator import validate_instance
+from utils.document_store import resolver_handlers
+from utils import transport
 
 
 class FlowRepoClient:
@@ -49,7 +50,7 @@ class FlowRepoClient:
 
         full_url = "http://flowrepository.org/list?client=" + self.clientID
         ids = []
-        response = requests.request("GET", full_url)
+        response = transport.request("GET", full_url)
 
         if response.status_code == 404:
             return Exception("Verify your client ID (" + self.clientID + ")")
@@ -74,7 +75,7 @@ class FlowRepoClient:
                    + item_identifier \
                    + "?client=" \
                    + self.clientID
-        response = requests.request("GET", full_url)
+        response = transport.request("GET", full_url)
         if response.status_code == 404 or response.status_code == 400:
             return Exception("Item %s could not be found" % item_identifier)
         return response.text
@@ -179,7 +180,7 @@ class FlowRepoClient:
 
         instances, errors = self.make_validation()
 
-        context_mapping = json.loads(requests.get(self.mapping_url).text)["contexts"]
+        context_mapping = json.loads(transport.get(self.mapping_url).text)["contexts"]
         self.main_context_url = context_mapping[self.base_schema]
 
         for instance_name in instances:
@@ -278,8 +279,8 @@ class FlowRepoClient:
             return Exception("Error with client ID " + self.clientID)
 
         else:
-            schema = json.loads(requests.get(self.schema_url).text)
-            resolver = RefResolver(self.schema_url, schema, {})
+            schema = json.loads(transport.get(self.schema_url).text)
+            resolver = RefResolver(self.schema_url, schema, {}, handlers=resolver_handlers())
             validator = Draft4Validator(schema, resolver=resolver)
             content = self.get_all_experiments(self.item_number, user_accessible_ids)
 